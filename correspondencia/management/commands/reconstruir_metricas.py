@@ -0,0 +1,37 @@
+#Comando para reconstruir el resumen MetricaDiaria desde las tablas de correspondencia (carga inicial o reparación).
+#Uso: python manage.py reconstruir_metricas [--desde 2024-01-01] [--hasta 2026-10-18] [--dias-por-lote 31]
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from correspondencia.models import Correspondencia
+from correspondencia.services.metricas import recalcular_por_lotes
+
+
+class Command(BaseCommand):
+    help = "Recalcula MetricaDiaria por tramos de días (por defecto, todo el historial)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", type=date.fromisoformat, help="Primer día (AAAA-MM-DD). Por defecto el registro más antiguo")
+        parser.add_argument("--hasta", type=date.fromisoformat, help="Último día (AAAA-MM-DD). Por defecto hoy")
+        parser.add_argument("--dias-por-lote", type=int, default=31, help="Días recalculados por transacción")
+
+    def handle(self, *args, **options):
+        hasta = options["hasta"] or timezone.localdate()
+        desde = options["desde"]
+        if desde is None:
+            primero = Correspondencia.objects.aggregate(primero=Min("fecha_registro"))["primero"]
+            if primero is None:
+                self.stdout.write("ℹ️ No hay correspondencia registrada")
+                return
+            desde = primero.date()
+        if desde > hasta:
+            raise CommandError("--desde no puede ser posterior a --hasta")
+
+        total = 0
+        for inicio, fin, filas in recalcular_por_lotes(desde, hasta, options["dias_por_lote"]):
+            total += filas
+            self.stdout.write(f"🔄 {inicio} .. {fin}: {filas} filas")
+        self.stdout.write(self.style.SUCCESS(f"✅ MetricaDiaria reconstruida del {desde} al {hasta}: {total} filas"))
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 10:38
+
+import pgvector.django.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ('correspondencia', '0028_presellorecibida_estado_and_more'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='correspondenciaelaborada',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['vector_embedding_html'], m=16, name='elaborada_vector_html_hnsw_idx', opclasses=['vector_cosine_ops']),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('correspondencia', '0029_correspondenciaelaborada_vector_html_hnsw_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='correspondenciaelaborada',
+            name='huella_semantica',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+    ]
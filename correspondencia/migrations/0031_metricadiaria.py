@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-18 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('correspondencia', '0030_correspondenciaelaborada_huella_semantica'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('metrica', models.CharField(choices=[('registro', 'Registro'), ('envio', 'Envío')], max_length=10)),
+                ('tipo', models.CharField(choices=[('recibida', 'Recibida'), ('elaborada', 'Elaborada'), ('enviada', 'Enviada'), ('otra', 'Otra')], max_length=15)),
+                ('estado', models.CharField(choices=[('borrador', 'Borrador'), ('en_revision', 'En revisión'), ('aprobado', 'Aprobado'), ('rechazado', 'Rechazado'), ('enviado', 'Enviado'), ('archivado', 'Archivado'), ('devuelto', 'Devuelto'), ('entregado', 'Entregado')], max_length=20)),
+                ('ambito', models.CharField(blank=True, default='', max_length=20)),
+                ('plantilla_tipo', models.CharField(blank=True, default='', max_length=50)),
+                ('cantidad', models.PositiveIntegerField(default=0)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['metrica', 'fecha'], name='metrica_diaria_fecha_idx')],
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'metrica', 'tipo', 'estado', 'ambito', 'plantilla_tipo'), name='metrica_diaria_unica')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-18 18:30
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ('correspondencia', '0031_metricadiaria'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='correspondencia',
+            index=models.Index(fields=['-fecha_registro', '-id_correspondencia'], name='corresp_fecha_id_idx'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Carga inicial de MetricaDiaria: sin ella el dashboard muestra ceros hasta que se corra
+# reconstruir_metricas. La agregación es la de services/metricas.py, pero escrita contra los
+# modelos históricos (apps.get_model) para que la migración no dependa del estado actual de
+# los modelos. Una transacción por tramo de días, por eso la migración no es atómica.
+from datetime import datetime, time, timedelta
+
+from django.db import migrations, transaction
+from django.db.models import Case, CharField, Count, Min, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+DIAS_POR_LOTE = 31
+
+
+def _filas(queryset, campo_fecha, tipo, prefijo_elaborada):
+    return queryset.annotate(
+        fecha=TruncDate(campo_fecha),
+        tipo_metrica=tipo,
+        ambito_metrica=Coalesce(f'{prefijo_elaborada}ambito', Value(''), output_field=CharField()),
+        plantilla_metrica=Coalesce(f'{prefijo_elaborada}plantilla__tipo', Value(''), output_field=CharField()),
+    ).values(
+        'fecha', 'tipo_metrica', 'estado', 'ambito_metrica', 'plantilla_metrica'
+    ).annotate(cantidad=Count('pk')).order_by()
+
+
+def reconstruir_metricas(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Correspondencia = apps.get_model('correspondencia', 'Correspondencia')
+    CorrespondenciaElaborada = apps.get_model('correspondencia', 'CorrespondenciaElaborada')
+    MetricaDiaria = apps.get_model('correspondencia', 'MetricaDiaria')
+
+    primero = Correspondencia.objects.using(alias).aggregate(primero=Min('fecha_registro'))['primero']
+    if primero is None:
+        return
+
+    tipo_registro = Case(
+        When(recibida__isnull=False, then=Value('recibida')),
+        When(correspondenciaelaborada__isnull=False, then=Value('elaborada')),
+        When(enviada__isnull=False, then=Value('enviada')),
+        default=Value('otra'),
+        output_field=CharField(),
+    )
+    tipo_envio = Value('elaborada', output_field=CharField())
+
+    desde, hasta = primero.date(), timezone.localdate()
+    while desde <= hasta:
+        fin = min(desde + timedelta(days=DIAS_POR_LOTE - 1), hasta)
+        inicio_dt = datetime.combine(desde, time.min)
+        fin_dt = datetime.combine(fin + timedelta(days=1), time.min)
+
+        registro = _filas(
+            Correspondencia.objects.using(alias).filter(fecha_registro__gte=inicio_dt, fecha_registro__lt=fin_dt),
+            'fecha_registro', tipo_registro, 'correspondenciaelaborada__',
+        )
+        envio = _filas(
+            CorrespondenciaElaborada.objects.using(alias).filter(fecha_envio__gte=inicio_dt, fecha_envio__lt=fin_dt),
+            'fecha_envio', tipo_envio, '',
+        )
+        filas = [
+            MetricaDiaria(
+                fecha=fila['fecha'],
+                metrica=metrica,
+                tipo=fila['tipo_metrica'],
+                estado=fila['estado'],
+                ambito=fila['ambito_metrica'],
+                plantilla_tipo=fila['plantilla_metrica'],
+                cantidad=fila['cantidad'],
+            )
+            for metrica, consulta in (('registro', registro), ('envio', envio))
+            for fila in consulta
+        ]
+        with transaction.atomic(using=alias):
+            MetricaDiaria.objects.using(alias).filter(fecha__range=(desde, fin)).delete()
+            MetricaDiaria.objects.using(alias).bulk_create(filas)
+        desde = fin + timedelta(days=1)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('correspondencia', '0032_correspondencia_corresp_fecha_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(reconstruir_metricas, migrations.RunPython.noop),
+    ]
@@ -5,10 +5,10 @@ from django.utils.timezone import now
 from django.db import models, transaction
 from django.db.models import Max
 from jinja2 import Template
+import hashlib
 import html
 import re
-from pgvector.django import VectorField
-from gestion_documental.ai.model_loader import get_model
+from pgvector.django import VectorField, HnswIndex
 
 def _strip_html_to_text(value):
     if not value:
@@ -32,6 +32,13 @@ def _build_semantic_text(instance):
     # Fallback: use full HTML if no structured content available.
     return _strip_html_to_text(instance.contenido_html or "")
 
+def _semantic_fingerprint(text):
+    # Hash of the semantic text plus the model id: changes when either one changes.
+    if not text:
+        return None
+    from gestion_documental.ai.model_loader import get_model_id
+    return hashlib.sha256(f"{get_model_id()}\n{text}".encode("utf-8")).hexdigest()
+
 class Correspondencia(models.Model):
     # Estados globales del documento en un solo lugar (alineados con acciones).
     TIPO_CHOICES_ESTADO = [
@@ -61,6 +68,10 @@ class Correspondencia(models.Model):
     
     class Meta:
         ordering = ['-fecha_registro']
+        indexes = [
+            # Paginación keyset de los listados: ORDER BY fecha_registro DESC, id_correspondencia DESC
+            models.Index(fields=['-fecha_registro', '-id_correspondencia'], name='corresp_fecha_id_idx'),
+        ]
         
     def __str__(self):
         return f"{self.referencia} - {self.tipo}"
@@ -128,6 +139,7 @@ class CorrespondenciaElaborada(Correspondencia):
     cite = models.CharField(max_length=100, unique=True, blank=True)
     contenido_html = models.TextField(blank=True, null=True)
     vector_embedding_html = VectorField(dimensions=384, null=True, blank=True)
+    huella_semantica = models.CharField(max_length=64, blank=True, null=True, editable=False)  # Huella del texto con el que se calculó vector_embedding_html
     firmado = models.BooleanField(default=False)
     fecha_envio = models.DateTimeField(null=True, blank=True)
     fecha_recepcion = models.DateTimeField(null=True, blank=True)
@@ -159,6 +171,18 @@ class CorrespondenciaElaborada(Correspondencia):
     numero_intentos = models.PositiveIntegerField(default=0)
     destino_interno = models.ForeignKey('usuario.CustomUser', on_delete=models.SET_NULL, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Índice ANN por distancia coseno para consulta_semantica sobre el HTML
+            HnswIndex(
+                name='elaborada_vector_html_hnsw_idx',
+                fields=['vector_embedding_html'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops'],
+            ),
+        ]
+
     def generar_contenido_html(self):
         from correspondencia.services.renderizado import generar_html_desde_objeto
         self.contenido_html = generar_html_desde_objeto(self)
@@ -198,9 +222,13 @@ class CorrespondenciaElaborada(Correspondencia):
 
         # --- Embedding semántico desde contenido_html ---
         # Solo recalcula si no existe o si el contenido cambió.
+        # La tarea guarda la huella al terminar; si falla, el próximo save vuelve a encolarla.
+        huella = _semantic_fingerprint(_build_semantic_text(self))
+        necesita_embedding = huella and (huella != self.huella_semantica or self.vector_embedding_html is None)
         
         super().save(*args, **kwargs)
-        generar_embedding_html_task.delay(self.pk)
+        if necesita_embedding:
+            generar_embedding_html_task.delay(self.pk)
 
 
 class AccionCorrespondencia(models.Model):
@@ -242,4 +270,43 @@ class AccionCorrespondencia(models.Model):
 
         if self.estado_resultante:
             self.correspondencia.estado = self.estado_resultante
-            self.correspondencia.save(update_fields=["estado"])
\ No newline at end of file
+            self.correspondencia.save(update_fields=["estado"])
+
+class MetricaDiaria(models.Model):
+    """
+    Resumen diario de correspondencia para el dashboard: cantidad de documentos por
+    día × tipo × estado × ámbito × tipo de plantilla. Se recalcula por días completos
+    (ver services/metricas.py), nunca se incrementa a mano.
+    """
+    METRICA_CHOICES = [
+        ('registro', 'Registro'),  # fecha = fecha_registro
+        ('envio', 'Envío'),        # fecha = fecha_envio (solo elaborada)
+    ]
+    TIPO_CHOICES = [
+        ('recibida', 'Recibida'),
+        ('elaborada', 'Elaborada'),
+        ('enviada', 'Enviada'),
+        ('otra', 'Otra'),
+    ]
+    fecha = models.DateField()
+    metrica = models.CharField(max_length=10, choices=METRICA_CHOICES)
+    tipo = models.CharField(max_length=15, choices=TIPO_CHOICES)
+    estado = models.CharField(max_length=20, choices=Correspondencia.TIPO_CHOICES_ESTADO)
+    ambito = models.CharField(max_length=20, blank=True, default='')
+    plantilla_tipo = models.CharField(max_length=50, blank=True, default='')
+    cantidad = models.PositiveIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fecha', 'metrica', 'tipo', 'estado', 'ambito', 'plantilla_tipo'],
+                name='metrica_diaria_unica',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['metrica', 'fecha'], name='metrica_diaria_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.metrica} {self.tipo}/{self.estado}: {self.cantidad}"
@@ -1,4 +1,4 @@
-from documento.busquedaSemantica.embeddings import generar_embedding
+from documento.busquedaSemantica.cache_embeddings import generar_embedding_consulta
 from pgvector.django import CosineDistance
 
 def get_semantic_queryset(
@@ -20,6 +20,9 @@ def get_semantic_queryset(
         
     Returns:
         QuerySet: Queryset filtrado y ordenado por similitud descendente
+
+    Para ajustar ef_search/probes del índice, evaluar el queryset dentro de
+    documento.busquedaSemantica.indices.parametros_busqueda_vectorial().
     """
     
     if not consulta or not consulta.strip():
@@ -27,7 +30,7 @@ def get_semantic_queryset(
     
     try:
         # Generar embedding para la consulta
-        embedding = generar_embedding(consulta)
+        embedding = generar_embedding_consulta(consulta).tolist()
         
         # Aplicar búsqueda semántica
         queryset = queryset.annotate(
@@ -0,0 +1,120 @@
+#Caché de las estadísticas del dashboard en Redis, por (periodo, cantidad).
+#Cada copia guarda la "generación" con la que se calculó; guardar correspondencia incrementa la
+#generación (invalidar_dashboard) y las copias anteriores pasan a ser viejas: se sirven igual
+#mientras un worker de Celery las recalcula (stale-while-revalidate).
+#La clave se arma con los parámetros normalizados, así que hay a lo sumo
+#len(PERIODOS) * DASHBOARD_CANTIDAD_MAX copias.
+import json
+import logging
+import time
+
+import redis
+from django.conf import settings
+from django.db import transaction
+
+from correspondencia.services.estadisticas import PERIODOS, estadisticas_dashboard
+from documento.redis_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+CLAVE_GENERACION = "dashboard:generacion"
+
+
+def normalizar_parametros(periodo, cantidad):
+    """(periodo, cantidad) válidos: periodo conocido (si no, "dia" y 7) y 1 <= cantidad <= DASHBOARD_CANTIDAD_MAX."""
+    if periodo not in PERIODOS:
+        return "dia", 7
+    return periodo, min(max(int(cantidad), 1), settings.DASHBOARD_CANTIDAD_MAX)
+
+
+def _clave(periodo, cantidad):
+    return f"dashboard:{periodo}:{cantidad}"
+
+
+def _clave_refresco(periodo, cantidad):
+    return f"dashboard:refrescando:{periodo}:{cantidad}"
+
+
+def _generacion(valor):
+    return int(valor) if valor else 0
+
+
+def guardar_dashboard(periodo, cantidad, generacion=None):
+    """Calcula las estadísticas y las guarda con la generación vigente antes de calcular."""
+    cliente = get_redis_client()
+    if generacion is None:
+        generacion = _generacion(cliente.get(CLAVE_GENERACION))
+    datos = estadisticas_dashboard(periodo, cantidad)
+    cliente.set(
+        _clave(periodo, cantidad),
+        json.dumps({"generacion": generacion, "calculado": time.time(), "datos": datos}),
+        ex=settings.DASHBOARD_CACHE_TTL,
+    )
+    return datos
+
+
+def _programar_refresco(cliente, periodo, cantidad):
+    # Un solo refresco en cola por clave; el lock expira solo si el worker se cae
+    if cliente.set(_clave_refresco(periodo, cantidad), 1, nx=True, ex=settings.DASHBOARD_CACHE_FRESCO):
+        from correspondencia.tasks import refrescar_dashboard_task
+        try:
+            refrescar_dashboard_task.delay(periodo, cantidad)
+        except Exception as e:
+            # Sin broker se sigue sirviendo la copia vieja; el próximo request lo vuelve a intentar
+            cliente.delete(_clave_refresco(periodo, cantidad))
+            logger.warning(f"⚠️ No se pudo encolar el refresco del dashboard: {e}")
+
+
+def obtener_dashboard(periodo, cantidad):
+    """
+    Estadísticas del dashboard desde la caché (una sola ida a Redis).
+      - copia vigente: se devuelve tal cual
+      - copia vieja (otra generación o más antigua que DASHBOARD_CACHE_FRESCO): se devuelve y se encola el refresco
+      - sin copia: se calcula en el request y se guarda
+    Sin Redis (o si no responde) se calcula directo desde la BD.
+    """
+    periodo, cantidad = normalizar_parametros(periodo, cantidad)
+    if not settings.REDIS_URL:
+        return estadisticas_dashboard(periodo, cantidad)
+    try:
+        cliente = get_redis_client()
+        copia, generacion = cliente.mget(_clave(periodo, cantidad), CLAVE_GENERACION)
+        generacion = _generacion(generacion)
+        if copia is None:
+            return guardar_dashboard(periodo, cantidad, generacion)
+
+        copia = json.loads(copia)
+        vieja = (
+            copia["generacion"] != generacion
+            or time.time() - copia["calculado"] > settings.DASHBOARD_CACHE_FRESCO
+        )
+        if vieja:
+            _programar_refresco(cliente, periodo, cantidad)
+        return copia["datos"]
+    except redis.RedisError as e:
+        logger.warning(f"⚠️ Caché del dashboard no disponible, se calcula directo: {e}")
+        return estadisticas_dashboard(periodo, cantidad)
+
+
+def refrescar_dashboard(periodo, cantidad):
+    """Recalcula una copia (lo llama el worker) y libera el lock de refresco."""
+    cliente = get_redis_client()
+    periodo, cantidad = normalizar_parametros(periodo, cantidad)
+    try:
+        return guardar_dashboard(periodo, cantidad)
+    finally:
+        cliente.delete(_clave_refresco(periodo, cantidad))
+
+
+def invalidar_dashboard():
+    """Marca todas las copias como viejas (al confirmarse la transacción en curso)."""
+    if not settings.REDIS_URL:
+        return
+
+    def _incrementar():
+        try:
+            get_redis_client().incr(CLAVE_GENERACION)
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ No se pudo invalidar la caché del dashboard: {e}")
+
+    transaction.on_commit(_incrementar)
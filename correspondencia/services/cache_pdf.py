@@ -0,0 +1,78 @@
+#Caché de PDFs renderizados, direccionada por contenido: la clave es el hash del HTML final
+#más la versión de la cabecera/pie y del motor. El mismo documento se renderiza una sola vez.
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, storages
+
+from correspondencia.services.pdf import generar_pdf, html_para_pdf
+
+logger = logging.getLogger(__name__)
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def get_storage_pdf():
+    """Storage de la caché: un alias de STORAGES (p. ej. S3) o una carpeta local privada."""
+    if settings.PDF_CACHE_STORAGE:
+        return storages[settings.PDF_CACHE_STORAGE]
+    return FileSystemStorage(location=settings.PDF_CACHE_DIR)
+
+
+@lru_cache(maxsize=1)
+def version_plantillas():
+    """Hash de header.html, footer.html y el motor de PDF: si cambian, cambian todas las claves."""
+    sha = hashlib.sha256(settings.PDF_BACKEND.encode("utf-8"))
+    directorio = Path(settings.BASE_DIR) / "documento" / "templates" / "Documento"
+    for plantilla in ("header.html", "footer.html"):
+        sha.update((directorio / plantilla).read_bytes())
+    return sha.hexdigest()
+
+
+def clave_pdf(html):
+    return hashlib.sha256(f"{version_plantillas()}\n{html}".encode("utf-8")).hexdigest()
+
+
+def nombre_archivo(clave):
+    return f"{clave[:2]}/{clave}.pdf"
+
+
+def _lock_para(clave):
+    with _locks_lock:
+        return _locks.setdefault(clave, threading.Lock())
+
+
+def asegurar_pdf(html, clave=None):
+    """
+    Devuelve el nombre en el storage del PDF de `html`, renderizándolo solo si no existe.
+    Peticiones simultáneas del mismo documento en un proceso esperan al primer render.
+    """
+    clave = clave or clave_pdf(html)
+    nombre = nombre_archivo(clave)
+    storage = get_storage_pdf()
+    if storage.exists(nombre):
+        return nombre
+
+    lock = _lock_para(clave)
+    with lock:
+        if not storage.exists(nombre):
+            guardado = storage.save(nombre, ContentFile(generar_pdf(html)))
+            if guardado != nombre:
+                # Otro proceso lo guardó primero: el storage renombró esta copia, se descarta
+                storage.delete(guardado)
+            logger.info(f"📄 PDF cacheado: {nombre}")
+    with _locks_lock:
+        _locks.pop(clave, None)
+    return nombre
+
+
+def precalentar_pdf(correspondencia):
+    """Renderiza y guarda el PDF de la correspondencia si aún no está en la caché."""
+    return asegurar_pdf(html_para_pdf(correspondencia))
@@ -0,0 +1,260 @@
+#Estadísticas del dashboard calculadas por conjuntos: cada serie sale de una sola consulta
+#agrupada (Trunc* + Sum con filtro) sobre MetricaDiaria, sin importar cuántos periodos se pidan.
+from datetime import date, timedelta
+
+from django.db.models import Avg, DateField, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from correspondencia.models import MetricaDiaria, Recibida
+
+MESES = {
+    1: "Ene",
+    2: "Feb",
+    3: "Mar",
+    4: "Abr",
+    5: "May",
+    6: "Jun",
+    7: "Jul",
+    8: "Ago",
+    9: "Sep",
+    10: "Oct",
+    11: "Nov",
+    12: "Dic"
+}
+
+#periodo -> (kind de Trunc, paso entre las fechas de referencia)
+PERIODOS = {
+    "dia": ("day", timedelta(days=1)),
+    "semana": ("week", timedelta(weeks=1)),
+    "mes": ("month", timedelta(days=30)),
+    "gestion": ("year", timedelta(days=365)),
+}
+
+ESTADOS_PROCESADOS = ['aprobado', 'archivado', 'enviado']
+ESTADOS_PENDIENTES = ['borrador', 'en_revision']
+
+
+def formatear_fecha(fecha, periodo):
+    if periodo == "dia":
+        return fecha.strftime("%d/%m")
+    elif periodo == "semana":
+        return f"Sem {fecha.isocalendar().week}"
+    elif periodo == "mes":
+        return MESES[fecha.month]
+    elif periodo == "gestion":
+        return str(fecha.year)
+    return fecha.strftime("%d/%m")
+
+
+def inicio_bucket(fecha, periodo):
+    """Primer día del bucket de `fecha`: el mismo valor que devuelve Trunc(kind) en la BD."""
+    if periodo == "semana":
+        return fecha - timedelta(days=fecha.weekday())
+    if periodo == "mes":
+        return fecha.replace(day=1)
+    if periodo == "gestion":
+        return fecha.replace(month=1, day=1)
+    return fecha
+
+
+def siguiente_bucket(inicio, periodo):
+    if periodo == "semana":
+        return inicio + timedelta(weeks=1)
+    if periodo == "mes":
+        return date(inicio.year + inicio.month // 12, inicio.month % 12 + 1, 1)
+    if periodo == "gestion":
+        return date(inicio.year + 1, 1, 1)
+    return inicio + timedelta(days=1)
+
+
+def generar_buckets(hoy, periodo, cantidad):
+    """
+    Fechas de referencia de los `cantidad` periodos que termina en `hoy`, de la más antigua
+    a la más reciente, y el bucket al que pertenece cada una. Mes y gestión retroceden
+    30 y 365 días como el dashboard original, así que dos fechas pueden caer en el mismo bucket.
+    """
+    _, paso = PERIODOS[periodo]
+    fechas = [hoy - paso * (cantidad - 1 - i) for i in range(cantidad)]
+    return [(fecha, inicio_bucket(fecha.date(), periodo)) for fecha in fechas]
+
+
+def contar_por_bucket(queryset, campo, periodo, buckets, **conteos):
+    """
+    Suma `cantidad` de las filas de MetricaDiaria en cada bucket con una sola consulta agrupada.
+    `conteos` es nombre -> Q; cada conteo es un Sum condicional sobre el mismo GROUP BY.
+    Devuelve {inicio_bucket: {nombre: cantidad}}; los buckets sin registros quedan en 0.
+    """
+    kind, _ = PERIODOS[periodo]
+    inicios = sorted({inicio for _, inicio in buckets})
+    resultado = {inicio: dict.fromkeys(conteos, 0) for inicio in inicios}
+    if not inicios:
+        return resultado
+
+    filas = queryset.filter(
+        **{
+            f"{campo}__gte": inicios[0],
+            f"{campo}__lt": siguiente_bucket(inicios[-1], periodo),
+        }
+    ).annotate(
+        bucket=Trunc(campo, kind, output_field=DateField())
+    ).values('bucket').annotate(
+        **{nombre: Sum('cantidad', filter=filtro, default=0) for nombre, filtro in conteos.items()}
+    ).order_by()
+
+    for fila in filas:
+        if fila['bucket'] in resultado:
+            resultado[fila['bucket']] = {nombre: fila[nombre] for nombre in conteos}
+    return resultado
+
+
+def serie_agrupada(queryset, periodo, fecha_inicio=None):
+    """Filas de MetricaDiaria desde `fecha_inicio` sumadas por periodo (solo los buckets con datos)."""
+    kind, _ = PERIODOS[periodo]
+    if fecha_inicio is not None:
+        queryset = queryset.filter(fecha__gte=fecha_inicio)
+    return queryset.annotate(
+        bucket=Trunc('fecha', kind, output_field=DateField())
+    ).values('bucket').annotate(
+        cantidad=Sum('cantidad')
+    )
+
+
+def estadisticas_dashboard(periodo="dia", cantidad=7, hoy=None):
+    """
+    Todas las series del dashboard. Los conteos salen del resumen MetricaDiaria (ver
+    services/metricas.py), así que el costo depende de los días pedidos y no del historial.
+    La cantidad de consultas es fija (una por serie): no crece con `cantidad`.
+    """
+    hoy = hoy or timezone.now()
+    if periodo not in PERIODOS:
+        periodo, cantidad = "dia", 7
+    _, paso = PERIODOS[periodo]
+    fecha_inicio = hoy - paso * cantidad
+    # El resumen es por día: el primer día del rango se cuenta completo
+    dia_inicio = fecha_inicio.date()
+    buckets = generar_buckets(hoy, periodo, cantidad)
+
+    registro = MetricaDiaria.objects.filter(metrica='registro')
+
+    # 1 y 2. Correspondencia recibida (por fecha de registro) y enviada (por fecha de envío)
+    recibida_data = serie_agrupada(registro.filter(tipo='recibida'), periodo, dia_inicio).order_by('bucket')
+    enviada_data = serie_agrupada(MetricaDiaria.objects.filter(metrica='envio'), periodo, dia_inicio).order_by('bucket')
+
+    # 3 y 11. Recibida vs enviada y procesados/pendientes: un solo GROUP BY
+    conteos = contar_por_bucket(
+        registro, 'fecha', periodo, buckets,
+        recibida=Q(tipo='recibida'),
+        enviada=Q(tipo='elaborada'),
+        procesados=Q(estado__in=ESTADOS_PROCESADOS),
+        pendientes=Q(estado__in=ESTADOS_PENDIENTES),
+    )
+    recibida_vs_enviada = [
+        {
+            'fecha': formatear_fecha(fecha, periodo),
+            'recibida': conteos[inicio]['recibida'],
+            'enviada': conteos[inicio]['enviada'],
+        }
+        for fecha, inicio in buckets
+    ]
+    procesados_por_dia = [
+        {
+            'fecha': formatear_fecha(fecha, periodo),
+            'procesados': conteos[inicio]['procesados'],
+            'pendientes': conteos[inicio]['pendientes'],
+        }
+        for fecha, inicio in buckets
+    ]
+
+    # 4. Estado de documentos
+    estado_documentos = registro.values('estado').annotate(
+        cantidad=Sum('cantidad')
+    ).order_by('-cantidad')
+
+    # 5. Documentos pendientes y atrasados
+    pendientes_atrasados = registro.filter(
+        estado__in=ESTADOS_PENDIENTES
+    ).aggregate(
+        pendientes=Sum('cantidad', default=0),
+        atrasados=Sum('cantidad', filter=Q(fecha__lt=dia_inicio), default=0),
+    )
+
+    # 6. Tiempo promedio de respuesta (para Recibida): promedio de duraciones, no se resume por día
+    tiempo_promedio = Recibida.objects.filter(
+        fecha_respuesta__isnull=False,
+        fecha_recepcion__gte=fecha_inicio
+    ).aggregate(
+        avg=Avg(ExpressionWrapper(
+            F('fecha_respuesta') - F('fecha_recepcion'),
+            output_field=DurationField()
+        ))
+    )['avg']
+    tiempo_promedio_horas = tiempo_promedio.total_seconds() / 3600 if tiempo_promedio else 0
+
+    # 7. Tiempo promedio de búsqueda semántica (simulado - necesitarías logs de búsqueda)
+    tiempo_busqueda = 0.8  # Placeholder - necesitarías registrar tiempos de búsqueda
+
+    # 8. Búsquedas exitosas vs sin resultados (simulado - necesitarías logs de búsqueda)
+    busquedas_exitosas = 85  # Placeholder
+    busquedas_sin_resultados = 15  # Placeholder
+
+    # 9. Tipos de documentos (tipo de plantilla) por ámbito
+    tipos_documentos = registro.filter(tipo='elaborada').exclude(plantilla_tipo='').values(
+        'plantilla_tipo'
+    ).annotate(
+        internos=Sum('cantidad', filter=Q(ambito='interno'), default=0),
+        externos=Sum('cantidad', filter=Q(ambito='externo'), default=0)
+    ).order_by('plantilla_tipo')
+
+    # 10. Flujo de correspondencia
+    flujo_correspondencia = serie_agrupada(registro, periodo, dia_inicio).order_by('bucket')
+
+    # 12. Días con mayor actividad
+    dias_actividad = serie_agrupada(registro, periodo).order_by('-cantidad')[:5]
+
+    # 13. Rendimiento del sistema de búsqueda (simulado)
+    rendimiento_busqueda = 94  # Placeholder - necesitarías métricas reales
+
+    return {
+        'recibida_data': [
+            {'fecha': formatear_fecha(item['bucket'], periodo), 'cantidad': item['cantidad']}
+            for item in recibida_data
+        ],
+        'enviada_data': [
+            {'fecha': formatear_fecha(item['bucket'], periodo), 'cantidad': item['cantidad']}
+            for item in enviada_data
+        ],
+        'recibida_vs_enviada': recibida_vs_enviada,
+        'estado_documentos': [
+            {'name': item['estado'].capitalize(), 'cantidad': item['cantidad']}
+            for item in estado_documentos
+        ],
+        'pendientes_atrasados': [
+            {'name': 'Pendientes', 'cantidad': pendientes_atrasados['pendientes']},
+            {'name': 'Atrasados', 'cantidad': pendientes_atrasados['atrasados']}
+        ],
+        'tiempo_promedio_respuesta': round(tiempo_promedio_horas, 2),
+        'tiempo_busqueda': tiempo_busqueda,
+        'busquedas_exitosas_sin_resultados': [
+            {'name': 'Exitosas', 'cantidad': busquedas_exitosas},
+            {'name': 'Sin resultados', 'cantidad': busquedas_sin_resultados}
+        ],
+        'tipos_documentos': [
+            {
+                'tipo': item['plantilla_tipo'].capitalize(),
+                'internos': item['internos'],
+                'externos': item['externos'],
+            }
+            for item in tipos_documentos
+        ],
+        'flujo_correspondencia': [
+            {'fecha': formatear_fecha(item['bucket'], periodo), 'cantidad': item['cantidad']}
+            for item in flujo_correspondencia
+        ],
+        'procesados_por_dia': procesados_por_dia,
+        'dias_mayor_actividad': [
+            {'fecha': formatear_fecha(item['bucket'], periodo), 'cantidad': item['cantidad']}
+            for item in dias_actividad
+        ],
+        'rendimiento_busqueda': rendimiento_busqueda
+    }
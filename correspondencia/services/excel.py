@@ -0,0 +1,129 @@
+#Exportación de correspondencia a Excel sin cargar todo en memoria: openpyxl en modo write-only
+#(cada fila se escribe al disco al agregarla) y lecturas con cursor del servidor (iterator).
+import tempfile
+
+from openpyxl import Workbook
+
+from correspondencia.models import CorrespondenciaElaborada, Recibida
+
+# Filas leídas por viaje al cursor del servidor
+CHUNK_SIZE = 2000
+
+ENCABEZADOS = [
+    "TIPO",
+    "ID",
+    "NRO REGISTRO/CITE",
+    "FECHA RECEPCIÓN",
+    "FECHA RESPUESTA",
+    "FECHA ENVÍO",
+    "FECHA SEGUIMIENTO",
+    "ESTADO",
+    "PRIORIDAD",
+    "ÁMBITO"
+]
+
+
+def _fecha(valor):
+    return valor.strftime("%d/%m/%Y") if valor else "-"
+
+
+def _filtrar(queryset, campo_fecha, desde=None, hasta=None, estado=None):
+    if desde:
+        queryset = queryset.filter(**{f"{campo_fecha}__gte": desde})
+    if hasta:
+        queryset = queryset.filter(**{f"{campo_fecha}__lt": hasta})
+    if estado:
+        queryset = queryset.filter(estado=estado)
+    return queryset.order_by()
+
+
+def queryset_recibidas(desde=None, hasta=None, estado=None, ambito=None, **kwargs):
+    # La correspondencia recibida no tiene ámbito: si se filtra por ámbito no entra ninguna
+    queryset = _filtrar(Recibida.objects.all(), 'fecha_registro', desde, hasta, estado)
+    return queryset.none() if ambito else queryset
+
+
+def queryset_enviadas(desde=None, hasta=None, estado=None, ambito=None, **kwargs):
+    queryset = _filtrar(CorrespondenciaElaborada.objects.all(), 'fecha_envio', desde, hasta, estado)
+    return queryset.filter(ambito=ambito) if ambito else queryset
+
+
+def _filas_recibidas(filtros):
+    filas = queryset_recibidas(**filtros).values_list(
+        'id_correspondencia', 'nro_registro', 'fecha_recepcion', 'fecha_respuesta', 'estado', 'prioridad'
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+    for id_correspondencia, nro_registro, fecha_recepcion, fecha_respuesta, estado, prioridad in filas:
+        yield [
+            "RECIBIDA",
+            str(id_correspondencia),
+            nro_registro,
+            _fecha(fecha_recepcion),
+            _fecha(fecha_respuesta),
+            "-",  # fecha envio
+            "-",  # fecha seguimiento
+            estado,
+            prioridad,
+            "-"  # ambito no existe
+        ]
+
+
+def _filas_enviadas(filtros):
+    filas = queryset_enviadas(**filtros).values_list(
+        'id_correspondencia', 'cite', 'fecha_envio', 'fecha_seguimiento', 'estado', 'prioridad', 'ambito'
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+    for id_correspondencia, cite, fecha_envio, fecha_seguimiento, estado, prioridad, ambito in filas:
+        yield [
+            "ENVIADA",
+            str(id_correspondencia),
+            cite,
+            "-",  # fecha recepcion
+            "-",  # fecha respuesta
+            _fecha(fecha_envio),
+            _fecha(fecha_seguimiento),
+            estado,
+            prioridad,
+            ambito
+        ]
+
+
+def filas_reporte(filtros):
+    """
+    Filas del reporte (recibidas y luego enviadas) como listas alineadas con ENCABEZADOS.
+    `filtros`: desde/hasta (datetime, hasta exclusivo), tipo ("recibida" | "enviada"), estado y ambito.
+    """
+    if filtros.get("tipo") in (None, "recibida"):
+        yield from _filas_recibidas(filtros)
+    if filtros.get("tipo") in (None, "enviada"):
+        yield from _filas_enviadas(filtros)
+
+
+def contar_filas(filtros):
+    total = 0
+    if filtros.get("tipo") in (None, "recibida"):
+        total += queryset_recibidas(**filtros).count()
+    if filtros.get("tipo") in (None, "enviada"):
+        total += queryset_enviadas(**filtros).count()
+    return total
+
+
+def escribir_xlsx(filas, archivo):
+    """Escribe ENCABEZADOS + `filas` en `archivo` (binario) con un libro write-only."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Reporte Correspondencia")
+    ws.append(ENCABEZADOS)
+    for fila in filas:
+        ws.append(fila)
+    wb.save(archivo)
+
+
+def generar_excel(fecha_inicio):
+    """
+    Escribe el reporte de correspondencia desde `fecha_inicio` en un archivo temporal y lo
+    devuelve abierto al inicio. El archivo se borra al cerrarlo (FileResponse lo cierra al terminar).
+    """
+    archivo = tempfile.TemporaryFile(suffix=".xlsx")
+    escribir_xlsx(filas_reporte({"desde": fecha_inicio}), archivo)
+    archivo.seek(0)
+    return archivo
@@ -0,0 +1,135 @@
+#Trabajos de exportación (PDF/Word) en segundo plano. El estado de cada trabajo vive en Redis
+#con TTL y el archivo final en un storage propio; la vista solo crea, consulta y descarga.
+#Los archivos se borran pasado EXPORTACIONES_TTL (limpiar_exportaciones).
+import logging
+import tempfile
+import zipfile
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, storages
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from correspondencia.services.trabajos import AlmacenTrabajos, limpiar_vencidos
+
+logger = logging.getLogger(__name__)
+
+FORMATOS = ("pdf", "word")
+ESTADOS = ("pendiente", "procesando", "completado", "error")
+
+
+@lru_cache(maxsize=1)
+def get_storage_exportaciones():
+    """Storage de los archivos exportados: un alias de STORAGES o una carpeta local privada."""
+    if settings.EXPORTACIONES_STORAGE:
+        return storages[settings.EXPORTACIONES_STORAGE]
+    return FileSystemStorage(location=settings.EXPORTACIONES_DIR)
+
+
+TRABAJOS = AlmacenTrabajos("exportacion", "EXPORTACIONES_TTL", "Trabajo de exportación")
+obtener_trabajo = TRABAJOS.obtener
+actualizar_trabajo = TRABAJOS.actualizar
+
+
+def crear_trabajo(usuario_id, formato, ids):
+    return TRABAJOS.crear(
+        usuario_id=usuario_id,
+        formato=formato,
+        ids=list(ids),
+        archivo=None,
+        nombre_descarga=None,
+        errores=[],
+    )
+
+
+def _renderizar(correspondencia, formato):
+    """Devuelve (nombre_archivo, archivo binario abierto) de una correspondencia."""
+    if formato == "pdf":
+        from correspondencia.services.cache_pdf import get_storage_pdf, precalentar_pdf
+        # Reutiliza la caché de PDFs: si ya se renderizó, no se vuelve a generar
+        nombre = precalentar_pdf(correspondencia)
+        return f"documento_{correspondencia.pk}.pdf", get_storage_pdf().open(nombre, "rb")
+
+    from correspondencia.utils import generar_documento_word
+    buffer, filename = generar_documento_word(correspondencia)
+    return filename, buffer
+
+
+def _exportar_unico(trabajo, correspondencia, storage):
+    nombre, contenido = _renderizar(correspondencia, trabajo["formato"])
+    nombre = get_valid_filename(nombre)
+    with contenido:
+        return storage.save(f"{trabajo['id']}/{nombre}", File(contenido)), nombre
+
+
+def _exportar_zip(trabajo, correspondencias, storage, errores):
+    """Escribe los documentos en un ZIP temporal en disco y lo sube al storage."""
+    archivos = 0
+    with tempfile.TemporaryFile() as temporal:
+        # PDF y DOCX ya vienen comprimidos: se guardan sin volver a comprimir
+        with zipfile.ZipFile(temporal, "w", zipfile.ZIP_STORED, allowZip64=True) as zip_salida:
+            for correspondencia in correspondencias:
+                try:
+                    nombre, contenido = _renderizar(correspondencia, trabajo["formato"])
+                    with contenido, zip_salida.open(get_valid_filename(nombre), "w", force_zip64=True) as destino:
+                        for bloque in iter(lambda: contenido.read(1024 * 1024), b""):
+                            destino.write(bloque)
+                    archivos += 1
+                except Exception as e:
+                    logger.exception(f"❌ Error exportando correspondencia {correspondencia.pk}")
+                    errores.append({"id": correspondencia.pk, "error": str(e)})
+
+        if not archivos:
+            return None, None
+        nombre = f"exportacion_{trabajo['formato']}_{timezone.now():%Y%m%d_%H%M}.zip"
+        temporal.seek(0)
+        return storage.save(f"{trabajo['id']}/{nombre}", File(temporal)), nombre
+
+
+def ejecutar_trabajo(trabajo_id):
+    """
+    Renderiza los documentos del trabajo y guarda el resultado en el storage de exportaciones.
+    Un solo id produce el archivo directo; varios, un ZIP. En el ZIP los documentos que
+    fallan se registran en `errores` y no detienen el resto.
+    """
+    from correspondencia.models import CorrespondenciaElaborada
+
+    trabajo = actualizar_trabajo(trabajo_id, estado="procesando")
+    storage = get_storage_exportaciones()
+    errores = []
+
+    correspondencias = CorrespondenciaElaborada.objects.filter(pk__in=trabajo["ids"]).select_related(
+        "plantilla", "contacto__institucion", "usuario", "destino_interno"
+    ).order_by("pk")
+
+    try:
+        if len(trabajo["ids"]) == 1:
+            archivo, nombre_descarga = _exportar_unico(trabajo, correspondencias.get(), storage)
+        else:
+            archivo, nombre_descarga = _exportar_zip(trabajo, correspondencias.iterator(chunk_size=50), storage, errores)
+    except Exception as e:
+        logger.exception(f"❌ Error en la exportación {trabajo_id}")
+        errores.append({"error": str(e)})
+        archivo = None
+
+    if not archivo:
+        return actualizar_trabajo(trabajo_id, estado="error", errores=errores or [{"error": "Sin documentos"}])
+
+    logger.info(f"📦 Exportación {trabajo_id} lista: {archivo} ({len(errores)} errores)")
+    return actualizar_trabajo(
+        trabajo_id,
+        estado="completado",
+        archivo=archivo,
+        nombre_descarga=nombre_descarga,
+        errores=errores,
+        terminado=timezone.now().isoformat(),
+    )
+
+
+def limpiar_exportaciones():
+    """Borra las exportaciones con más de EXPORTACIONES_TTL segundos (tarea periódica)."""
+    borrados = limpiar_vencidos(get_storage_exportaciones(), settings.EXPORTACIONES_TTL)
+    logger.info(f"🧹 Exportaciones vencidas borradas: {borrados}")
+    return borrados
@@ -0,0 +1,128 @@
+#Mantenimiento de MetricaDiaria: cada día se recalcula completo desde las tablas de correspondencia
+#(delete + insert del día), así el resultado es el mismo sin importar qué cambió ni cuántas veces se repita.
+import logging
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Case, CharField, Count, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+
+from correspondencia.models import Correspondencia, CorrespondenciaElaborada, MetricaDiaria
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_METRICA = ('fecha', 'metrica', 'tipo', 'estado', 'ambito', 'plantilla_tipo')
+
+
+def _rango(desde, hasta):
+    """Límites datetime [desde 00:00, hasta+1 00:00) para que el filtro use el índice de la columna."""
+    return datetime.combine(desde, time.min), datetime.combine(hasta + timedelta(days=1), time.min)
+
+
+def _filas_registro(desde, hasta):
+    inicio, fin = _rango(desde, hasta)
+    # Recibida, Enviada y CorrespondenciaElaborada heredan de Correspondencia: el tipo sale de la tabla hija
+    return Correspondencia.objects.filter(
+        fecha_registro__gte=inicio,
+        fecha_registro__lt=fin,
+    ).annotate(
+        fecha=TruncDate('fecha_registro'),
+        tipo_metrica=Case(
+            When(recibida__isnull=False, then=Value('recibida')),
+            When(correspondenciaelaborada__isnull=False, then=Value('elaborada')),
+            When(enviada__isnull=False, then=Value('enviada')),
+            default=Value('otra'),
+            output_field=CharField(),
+        ),
+        ambito_metrica=Coalesce('correspondenciaelaborada__ambito', Value(''), output_field=CharField()),
+        plantilla_metrica=Coalesce('correspondenciaelaborada__plantilla__tipo', Value(''), output_field=CharField()),
+    ).values(
+        'fecha', 'tipo_metrica', 'estado', 'ambito_metrica', 'plantilla_metrica'
+    ).annotate(cantidad=Count('pk')).order_by()
+
+
+def _filas_envio(desde, hasta):
+    inicio, fin = _rango(desde, hasta)
+    return CorrespondenciaElaborada.objects.filter(
+        fecha_envio__gte=inicio,
+        fecha_envio__lt=fin,
+    ).annotate(
+        fecha=TruncDate('fecha_envio'),
+        tipo_metrica=Value('elaborada', output_field=CharField()),
+        ambito_metrica=Coalesce('ambito', Value(''), output_field=CharField()),
+        plantilla_metrica=Coalesce('plantilla__tipo', Value(''), output_field=CharField()),
+    ).values(
+        'fecha', 'tipo_metrica', 'estado', 'ambito_metrica', 'plantilla_metrica'
+    ).annotate(cantidad=Count('pk')).order_by()
+
+
+def recalcular_metricas(desde, hasta=None):
+    """
+    Recalcula MetricaDiaria para los días [desde, hasta] (fechas, inclusive).
+    Dos consultas agrupadas de lectura y un delete + bulk insert por llamada.
+    Devuelve la cantidad de filas de resumen escritas.
+    """
+    hasta = hasta or desde
+    filas = [
+        MetricaDiaria(
+            fecha=fila['fecha'],
+            metrica=metrica,
+            tipo=fila['tipo_metrica'],
+            estado=fila['estado'],
+            ambito=fila['ambito_metrica'],
+            plantilla_tipo=fila['plantilla_metrica'],
+            cantidad=fila['cantidad'],
+        )
+        for metrica, consulta in (('registro', _filas_registro), ('envio', _filas_envio))
+        for fila in consulta(desde, hasta)
+    ]
+
+    with transaction.atomic():
+        MetricaDiaria.objects.filter(fecha__range=(desde, hasta)).delete()
+        # Si otra tarea recalcula el mismo día a la vez, el conflicto se resuelve actualizando
+        MetricaDiaria.objects.bulk_create(
+            filas,
+            update_conflicts=True,
+            unique_fields=CAMPOS_METRICA,
+            update_fields=['cantidad', 'actualizado'],
+        )
+    logger.info(f"📊 MetricaDiaria {desde}..{hasta}: {len(filas)} filas")
+    return len(filas)
+
+
+def recalcular_por_lotes(desde, hasta, dias_por_lote=31):
+    """Recalcula un rango largo en tramos (una transacción corta por tramo). Genera (inicio, fin, filas)."""
+    inicio = desde
+    while inicio <= hasta:
+        fin = min(inicio + timedelta(days=dias_por_lote - 1), hasta)
+        yield inicio, fin, recalcular_metricas(inicio, fin)
+        inicio = fin + timedelta(days=1)
+
+
+CAMPOS_FECHA = ('fecha_registro', 'fecha_envio')
+
+
+def _campos_fecha(modelo):
+    nombres = {campo.name for campo in modelo._meta.get_fields()}
+    return [campo for campo in CAMPOS_FECHA if campo in nombres]
+
+
+def dias_guardados(instance):
+    """
+    Días de las fechas que tiene guardadas la fila antes de este save (pre_save): si se cambia
+    fecha_registro o fecha_envio, el día anterior también hay que recalcularlo.
+    """
+    if instance._state.adding or instance.pk is None:
+        return set()
+    fila = type(instance).objects.filter(pk=instance.pk).values(*_campos_fecha(type(instance))).first()
+    return {valor.date() for valor in (fila or {}).values() if valor}
+
+
+def dias_afectados(instance):
+    """Días de MetricaDiaria que dependen de esta correspondencia (los actuales y los de antes del save)."""
+    dias = set(getattr(instance, '_dias_metricas_previos', ()))
+    for campo in CAMPOS_FECHA:
+        valor = getattr(instance, campo, None)
+        if valor:
+            dias.add(valor.date())
+    return sorted(dias)
@@ -0,0 +1,182 @@
+#Servicio de generación de PDF para la correspondencia elaborada.
+#El motor se elige con PDF_BACKEND ("wkhtmltopdf" o "weasyprint"); los membretes y el sello se leen
+#del disco (MEDIA_ROOT) y la cantidad de renders simultáneos por proceso está acotada.
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+import pdfkit
+from django.conf import settings
+from django.template.loader import render_to_string
+
+# Márgenes de la hoja: la cabecera y el pie se dibujan dentro de los márgenes superior e inferior
+MARGENES = {"superior": "5cm", "inferior": "3cm", "izquierdo": "2.5cm", "derecho": "2.5cm"}
+
+
+class ServicioPdfOcupado(Exception):
+    """No se liberó un turno de render dentro de PDF_ESPERA_MAX segundos."""
+
+
+def recursos_locales():
+    """URIs file:// de los membretes y el sello: el motor los lee del disco, no por HTTP."""
+    media = Path(settings.MEDIA_ROOT).resolve()
+    return {
+        "url_membrete_superior": (media / "Membrete.PNG").as_uri(),
+        "url_membrete_inferior": (media / "MembreteInferior.PNG").as_uri(),
+        "url_sello": (media / "Sello.PNG").as_uri(),
+    }
+
+
+def get_pdfkit_config():
+    #1) Permite fijar ruta por variable de entorno (Railway/local)
+    #2) Si no existe, busca "WKHTMLTOPDF_PATH" en Path del sistema
+    wkhtml_path = os.getenv("WKHTMLTOPDF_PATH") or shutil.which("wkhtmltopdf")
+    if not wkhtml_path:
+        raise RuntimeError(
+            "wkhtmltopdf no está instalado o no está en Path"
+            "Instalalo o define WKHTMLTOPDF_PATH"
+        )
+    return pdfkit.configuration(wkhtmltopdf=wkhtml_path)
+
+
+class BackendWkhtmltopdf:
+    """
+    wkhtmltopdf vía pdfkit. Cada render es un proceso nuevo (la CLI no admite quedar
+    en ejecución entre documentos), así que se evita todo lo demás: la configuración,
+    la cabecera y el pie se preparan una sola vez por proceso. Para no pagar el
+    arranque en cada PDF, PDF_BACKEND=weasyprint.
+    """
+
+    nombre = "wkhtmltopdf"
+
+    def __init__(self):
+        self._config = get_pdfkit_config()
+        # header.html y footer.html ya renderizados con las rutas locales de los membretes
+        directorio = tempfile.mkdtemp(prefix="pdf_cabeceras_")
+        recursos = recursos_locales()
+        self._rutas = {}
+        for plantilla in ("header.html", "footer.html"):
+            ruta = os.path.join(directorio, plantilla)
+            with open(ruta, "w", encoding="utf-8") as archivo:
+                archivo.write(render_to_string(f"Documento/{plantilla}", recursos))
+            self._rutas[plantilla] = ruta
+
+    def renderizar(self, html):
+        options = {
+            'page-size': 'Letter',
+            'margin-top': MARGENES["superior"],
+            'margin-bottom': MARGENES["inferior"],
+            'margin-left': MARGENES["izquierdo"],
+            'margin-right': MARGENES["derecho"],
+            'header-html': self._rutas["header.html"],
+            'footer-html': self._rutas["footer.html"],
+            'zoom': '1.0',
+            'disable-smart-shrinking': '',
+            'enable-local-file-access': '',
+            'encoding': 'UTF-8',
+            'quiet': '',
+        }
+        return pdfkit.from_string(html, False, options=options, configuration=self._config)
+
+
+class BackendWeasyPrint:
+    """
+    WeasyPrint en el mismo proceso (sin lanzar procesos externos). La cabecera y el pie
+    se insertan como elementos "running" de CSS en los márgenes de cada página.
+    Es el motor "en caliente": no hay proceso que arrancar por PDF. Está en requirements;
+    además necesita Pango instalado en el sistema.
+    """
+
+    nombre = "weasyprint"
+
+    def __init__(self):
+        try:
+            import weasyprint
+            from weasyprint.text.fonts import FontConfiguration
+        except ImportError:
+            raise ImportError("Necesitas instalar weasyprint: pip install weasyprint")
+        self._weasyprint = weasyprint
+        recursos = recursos_locales()
+        self._css = weasyprint.CSS(string=f"""
+            @page {{
+                size: Letter;
+                margin: {MARGENES["superior"]} {MARGENES["derecho"]} {MARGENES["inferior"]} {MARGENES["izquierdo"]};
+                @top-center {{ content: element(cabecera); width: 100%; vertical-align: bottom; }}
+                @bottom-center {{ content: element(pie); width: 100%; vertical-align: top; }}
+            }}
+            .pdf-cabecera {{ position: running(cabecera); padding-bottom: 0.7cm; }}
+            .pdf-pie {{ position: running(pie); }}
+            .pdf-cabecera img, .pdf-pie img {{ width: 100%; display: block; }}
+        """)
+        self._cabecera = (
+            f'<div class="pdf-cabecera"><img src="{recursos["url_membrete_superior"]}"></div>'
+            f'<div class="pdf-pie"><img src="{recursos["url_membrete_inferior"]}"></div>'
+        )
+        # Caché de fuentes compartida entre renders del proceso
+        self._fuentes = FontConfiguration()
+
+    def renderizar(self, html):
+        # Los elementos running deben estar al inicio del body para aparecer desde la primera página
+        if "<body>" in html:
+            html = html.replace("<body>", f"<body>{self._cabecera}", 1)
+        else:
+            html = self._cabecera + html
+        documento = self._weasyprint.HTML(string=html, base_url=str(settings.MEDIA_ROOT))
+        return documento.write_pdf(stylesheets=[self._css], font_config=self._fuentes)
+
+
+BACKENDS = {
+    BackendWkhtmltopdf.nombre: BackendWkhtmltopdf,
+    BackendWeasyPrint.nombre: BackendWeasyPrint,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+_turnos = None
+
+
+def get_backend():
+    """Motor de PDF del proceso, creado una sola vez."""
+    global _backend, _turnos
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                clase = BACKENDS.get(settings.PDF_BACKEND)
+                if clase is None:
+                    raise ValueError(f"PDF_BACKEND inválido: {settings.PDF_BACKEND}. Opciones: {', '.join(BACKENDS)}")
+                _turnos = threading.BoundedSemaphore(settings.PDF_MAX_CONCURRENTES)
+                _backend = clase()
+    return _backend
+
+
+def generar_pdf(html):
+    """
+    Convierte HTML a PDF con el motor configurado.
+
+    Como mucho PDF_MAX_CONCURRENTES renders corren a la vez en el proceso; el resto
+    espera en cola hasta PDF_ESPERA_MAX segundos.
+
+    Raises:
+        ServicioPdfOcupado: Si no se consiguió turno a tiempo
+    """
+    backend = get_backend()
+    if not _turnos.acquire(timeout=settings.PDF_ESPERA_MAX):
+        raise ServicioPdfOcupado("Demasiados PDF en proceso, intenta nuevamente en unos segundos")
+    try:
+        return backend.renderizar(html)
+    finally:
+        _turnos.release()
+
+
+def html_para_pdf(correspondencia):
+    """HTML completo de la correspondencia elaborada, con los recursos desde el disco."""
+    return render_to_string("Documento/base_documento.html", {
+        "contenido": correspondencia.contenido_html,
+        **recursos_locales(),
+    })
+
+
+def generar_pdf_correspondencia(correspondencia):
+    return generar_pdf(html_para_pdf(correspondencia))
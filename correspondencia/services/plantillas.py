@@ -0,0 +1,101 @@
+#Registro de plantillas Jinja2 compiladas. Comparte un solo Environment con caché de bytecode
+#para base_documento.html y para las plantillas de PlantillaDocumento guardadas en la BD.
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from jinja2 import BaseLoader, ChoiceLoader, Environment, FileSystemBytecodeCache, FileSystemLoader, TemplateNotFound
+
+PREFIJO_PLANTILLA = "plantilla/"
+
+
+class CargadorPlantillasBD(BaseLoader):
+    """
+    Entrega a Jinja2 el código de las plantillas de la BD registradas con `registrar`.
+    El nombre incluye el hash del contenido, así que una plantilla compilada
+    nunca queda desactualizada: si el contenido cambia, cambia el nombre.
+    """
+
+    def __init__(self):
+        self._fuentes = {}
+        # Se toma al registrar + compilar y al olvidar, así una invalidación
+        # en otro hilo no borra la fuente justo antes de compilarla
+        self.lock = threading.RLock()
+
+    def registrar(self, nombre, fuente):
+        with self.lock:
+            self._fuentes[nombre] = fuente
+
+    def olvidar(self, prefijo):
+        with self.lock:
+            for nombre in [n for n in self._fuentes if n.startswith(prefijo)]:
+                del self._fuentes[nombre]
+
+    def get_source(self, environment, template):
+        fuente = self._fuentes.get(template)
+        if fuente is None:
+            raise TemplateNotFound(template)
+        return fuente, None, lambda: True
+
+
+_cargador_bd = CargadorPlantillasBD()
+_entorno = None
+_entorno_lock = threading.Lock()
+
+
+def get_entorno():
+    """Environment compartido por el proceso (se crea en el primer render)."""
+    global _entorno
+    if _entorno is None:
+        with _entorno_lock:
+            if _entorno is None:
+                directorio_cache = settings.JINJA2_BYTECODE_CACHE_DIR or os.path.join(
+                    tempfile.gettempdir(), "gestion_documental_jinja2"
+                )
+                os.makedirs(directorio_cache, exist_ok=True)
+                _entorno = Environment(
+                    loader=ChoiceLoader([
+                        _cargador_bd,
+                        FileSystemLoader(Path(settings.BASE_DIR) / "documento" / "templates" / "Documento"),
+                    ]),
+                    # Igual que jinja2.Template(...): sin autoescape
+                    autoescape=False,
+                    bytecode_cache=FileSystemBytecodeCache(directorio_cache),
+                    cache_size=settings.JINJA2_PLANTILLAS_CACHE,
+                )
+    return _entorno
+
+
+def _prefijo(plantilla_id):
+    return f"{PREFIJO_PLANTILLA}{plantilla_id}/"
+
+
+def obtener_plantilla(plantilla):
+    """
+    Plantilla compilada de un PlantillaDocumento, por id + hash de estructura_html.
+    Solo se compila la primera vez que aparece un contenido nuevo.
+    """
+    huella = hashlib.sha1(plantilla.estructura_html.encode("utf-8")).hexdigest()
+    nombre = f"{_prefijo(plantilla.pk)}{huella}"
+    with _cargador_bd.lock:
+        _cargador_bd.registrar(nombre, plantilla.estructura_html)
+        return get_entorno().get_template(nombre)
+
+
+def obtener_base():
+    """base_documento.html compilado (Jinja2 lo recarga solo si el archivo cambia)."""
+    return get_entorno().get_template("base_documento.html")
+
+
+def invalidar_plantilla(plantilla_id):
+    """Descarta las versiones compiladas de una plantilla (al guardarla o eliminarla)."""
+    prefijo = _prefijo(plantilla_id)
+    with _cargador_bd.lock:
+        _cargador_bd.olvidar(prefijo)
+        if _entorno is not None:
+            for clave in list(_entorno.cache.keys()):
+                if clave[1].startswith(prefijo):
+                    del _entorno.cache[clave]
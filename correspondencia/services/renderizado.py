@@ -1,10 +1,8 @@
 #Renderizado.py se encarga de armar todo el HTML a partir del objeto de correspondencia.
 #Especialmente para la elaboración de documentos del FrontEND
 
-from jinja2 import Template #Se usa para renderizar plantillas HTML dinámicamente
+from correspondencia.services.plantillas import get_entorno, obtener_base, obtener_plantilla #Plantillas Jinja2 compiladas y cacheadas
 from django.utils.timezone import now #Obtiene la fecha y hora actual considerando la zona horaria de Django.
-from pathlib import Path #Para construir rutas absolutas a archivos del proyecto (ej. templates base).
-from django.conf import settings
 
 #Para construir rutas absolutas a archivos del proyecto (ej. templates base).
 MESES_ES = {
@@ -24,7 +22,7 @@ MESES_ES = {
 #Recibe un string de plantilla HTML y un diccionario de contexto.
                               #Lo convierte en un objeto Jinja2 para procesar las variables y sustituir los placeholders.
 def renderizar_contenido_html(template_string, context):
-    template = Template(template_string)
+    template = get_entorno().from_string(template_string)
     return template.render(**context)
                     #Reemplaza las variables de la plantilla con los valores del contexto.
 
@@ -140,12 +138,11 @@ def generar_html_desde_objeto(correspondencia_elaborada):
 
     # Renderizar el contenido HTML
     #Llama a la función de Jinja2 para reemplazar todas las variables de la plantilla con los datos del contexto.
-    contenido = renderizar_contenido_html(correspondencia_elaborada.plantilla.estructura_html, context)
+    # La plantilla se compila una sola vez por contenido (ver plantillas.py)
+    contenido = obtener_plantilla(correspondencia_elaborada.plantilla).render(**context)
 
-    # Ruta del template base
-    base_template_path = Path(settings.BASE_DIR) / "documento" / "templates" / "Documento" / "base_documento.html"
-    base_template_string = base_template_path.read_text(encoding="utf-8")
-    base_template = Template(base_template_string)
+    # Template base (documento/templates/Documento/base_documento.html), ya compilado
+    base_template = obtener_base()
 
     # Renderizar HTML final
     # Combina el contenido renderizado con el template base para crear el documento final
@@ -0,0 +1,152 @@
+#Reportes de correspondencia en segundo plano (XLSX, CSV o Parquet) para rangos grandes.
+#Igual que las exportaciones PDF/Word: el estado del trabajo vive en Redis con TTL y el archivo
+#en un storage propio; los archivos se borran pasado REPORTES_RETENCION (limpiar_reportes).
+import csv
+import importlib.util
+import io
+import logging
+import tempfile
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, storages
+from django.utils import timezone
+
+from correspondencia.services.excel import CHUNK_SIZE, ENCABEZADOS, contar_filas, escribir_xlsx, filas_reporte
+from correspondencia.services.trabajos import AlmacenTrabajos, limpiar_vencidos
+
+logger = logging.getLogger(__name__)
+
+FORMATOS_REPORTE = ("xlsx", "csv", "parquet")
+TIPOS_REPORTE = ("recibida", "enviada")
+AMBITOS_REPORTE = ("interno", "externo")
+
+
+@lru_cache(maxsize=1)
+def get_storage_reportes():
+    """Storage de los reportes generados: un alias de STORAGES o una carpeta local privada."""
+    if settings.REPORTES_STORAGE:
+        return storages[settings.REPORTES_STORAGE]
+    return FileSystemStorage(location=settings.REPORTES_DIR)
+
+
+TRABAJOS = AlmacenTrabajos("reporte", "REPORTES_RETENCION", "Reporte")
+obtener_trabajo = TRABAJOS.obtener
+actualizar_trabajo = TRABAJOS.actualizar
+
+
+def crear_trabajo(usuario_id, formato, filtros):
+    """`filtros` ya validados y serializables (fechas en ISO)."""
+    return TRABAJOS.crear(
+        usuario_id=usuario_id,
+        formato=formato,
+        filtros=filtros,
+        total=None,
+        procesadas=0,
+        archivo=None,
+        nombre_descarga=None,
+        error=None,
+    )
+
+
+def filtros_para_consulta(filtros):
+    """Filtros guardados en el trabajo -> argumentos de filas_reporte (hasta es inclusivo en el trabajo)."""
+    consulta = {k: filtros.get(k) for k in ("tipo", "estado", "ambito")}
+    if filtros.get("desde"):
+        consulta["desde"] = datetime.fromisoformat(filtros["desde"])
+    if filtros.get("hasta"):
+        consulta["hasta"] = datetime.fromisoformat(filtros["hasta"]) + timedelta(days=1)
+    return consulta
+
+
+def _con_progreso(filas, trabajo_id, total):
+    """Deja pasar las filas y actualiza `procesadas` en Redis cada CHUNK_SIZE filas."""
+    procesadas = 0
+    for fila in filas:
+        yield fila
+        procesadas += 1
+        if procesadas % CHUNK_SIZE == 0:
+            actualizar_trabajo(trabajo_id, procesadas=procesadas, total=max(total, procesadas))
+    actualizar_trabajo(trabajo_id, procesadas=procesadas, total=procesadas)
+
+
+def _escribir_csv(filas, archivo):
+    texto = io.TextIOWrapper(archivo, encoding="utf-8-sig", newline="")
+    escritor = csv.writer(texto)
+    escritor.writerow(ENCABEZADOS)
+    for fila in filas:
+        escritor.writerow(["" if valor is None else valor for valor in fila])
+    texto.flush()
+    # El archivo sigue abierto para subirlo al storage
+    texto.detach()
+
+
+def _escribir_parquet(filas, archivo):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Necesitas instalar pyarrow para reportes Parquet: pip install pyarrow")
+
+    esquema = pa.schema([(columna, pa.string()) for columna in ENCABEZADOS])
+    with pq.ParquetWriter(archivo, esquema, compression="zstd") as escritor:
+        lote = []
+        for fila in filas:
+            lote.append(fila)
+            if len(lote) == CHUNK_SIZE:
+                escritor.write_table(pa.Table.from_pylist([dict(zip(ENCABEZADOS, f)) for f in lote], schema=esquema))
+                lote = []
+        if lote:
+            escritor.write_table(pa.Table.from_pylist([dict(zip(ENCABEZADOS, f)) for f in lote], schema=esquema))
+
+
+def formato_disponible(formato):
+    """Parquet es opcional: depende de que pyarrow esté instalado."""
+    return formato != "parquet" or importlib.util.find_spec("pyarrow") is not None
+
+
+ESCRITORES = {
+    "xlsx": escribir_xlsx,
+    "csv": _escribir_csv,
+    "parquet": _escribir_parquet,
+}
+
+
+def ejecutar_trabajo(trabajo_id):
+    """
+    Genera el archivo del reporte en un temporal (filas leídas por bloques del cursor del
+    servidor), lo sube al storage de reportes y deja el trabajo en "completado" o "error".
+    """
+    trabajo = actualizar_trabajo(trabajo_id, estado="procesando")
+    filtros = filtros_para_consulta(trabajo["filtros"])
+    formato = trabajo["formato"]
+
+    try:
+        total = contar_filas(filtros)
+        actualizar_trabajo(trabajo_id, total=total)
+        with tempfile.TemporaryFile() as temporal:
+            ESCRITORES[formato](_con_progreso(filas_reporte(filtros), trabajo_id, total), temporal)
+            temporal.seek(0)
+            nombre = f"reporte_correspondencia_{timezone.now():%Y%m%d_%H%M}.{formato}"
+            archivo = get_storage_reportes().save(f"{trabajo_id}/{nombre}", File(temporal))
+    except Exception as e:
+        logger.exception(f"❌ Error generando el reporte {trabajo_id}")
+        return actualizar_trabajo(trabajo_id, estado="error", error=str(e))
+
+    logger.info(f"📑 Reporte {trabajo_id} listo: {archivo}")
+    return actualizar_trabajo(
+        trabajo_id,
+        estado="completado",
+        archivo=archivo,
+        nombre_descarga=nombre,
+        terminado=timezone.now().isoformat(),
+    )
+
+
+def limpiar_reportes():
+    """Borra los reportes con más de REPORTES_RETENCION segundos (tarea periódica)."""
+    borrados = limpiar_vencidos(get_storage_reportes(), settings.REPORTES_RETENCION)
+    logger.info(f"🧹 Reportes vencidos borrados: {borrados}")
+    return borrados
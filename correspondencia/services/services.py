@@ -2,7 +2,7 @@
 import logging
 from pgvector.django import CosineDistance
 from rest_framework import serializers
-from gestion_documental.ai.model_loader import get_model
+from documento.busquedaSemantica.cache_embeddings import generar_embedding_consulta
 logger = logging.getLogger(__name__)
 
 def consulta_semantica(queryset, consulta, campo_embedding='documentos__vector_embedding'):
@@ -13,8 +13,7 @@ def consulta_semantica(queryset, consulta, campo_embedding='documentos__vector_e
         return queryset
 
     try:
-        modelo = get_model()
-        embedding = modelo.encode(consulta).tolist()
+        embedding = generar_embedding_consulta(consulta).tolist()
 
         queryset = queryset.filter(**{f"{campo_embedding}__isnull": False})
         queryset = queryset.annotate(similitud=CosineDistance(campo_embedding, embedding)).order_by('similitud')
@@ -0,0 +1,83 @@
+#Trabajos en segundo plano (exportaciones PDF/Word, reportes XLSX/CSV/Parquet): el estado de cada
+#trabajo vive en Redis como JSON con TTL y el archivo generado en un storage propio, dentro de una
+#carpeta por trabajo (<trabajo_id>/<archivo>) que se borra pasada la retención.
+import json
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from documento.redis_utils import get_redis_client
+
+
+class AlmacenTrabajos:
+    """
+    Estado de un tipo de trabajo en Redis, bajo las claves `<prefijo>:<trabajo_id>`.
+    `setting_ttl` es el nombre del setting con los segundos que se conserva el estado.
+    """
+
+    def __init__(self, prefijo, setting_ttl, descripcion):
+        self.prefijo = prefijo
+        self.setting_ttl = setting_ttl
+        self.descripcion = descripcion
+
+    @property
+    def ttl(self):
+        return getattr(settings, self.setting_ttl)
+
+    def _clave(self, trabajo_id):
+        return f"{self.prefijo}:{trabajo_id}"
+
+    def _guardar(self, trabajo):
+        get_redis_client().set(self._clave(trabajo["id"]), json.dumps(trabajo), ex=self.ttl)
+        return trabajo
+
+    def crear(self, **campos):
+        """Nuevo trabajo "pendiente"; `campos` deben ser serializables a JSON."""
+        return self._guardar({
+            "id": uuid.uuid4().hex,
+            "estado": "pendiente",
+            "creado": timezone.now().isoformat(),
+            **campos,
+        })
+
+    def obtener(self, trabajo_id):
+        datos = get_redis_client().get(self._clave(trabajo_id))
+        return json.loads(datos) if datos else None
+
+    def actualizar(self, trabajo_id, **campos):
+        trabajo = self.obtener(trabajo_id)
+        if trabajo is None:
+            raise LookupError(f"{self.descripcion} no encontrado o expirado: {trabajo_id}")
+        trabajo.update(campos)
+        return self._guardar(trabajo)
+
+
+def limpiar_vencidos(storage, segundos):
+    """
+    Política de retención: borra los archivos con más de `segundos` de las carpetas de trabajos
+    y las carpetas que quedan vacías. Para entonces el estado en Redis ya expiró y el enlace de
+    descarga no existe. Devuelve la cantidad de archivos borrados.
+    """
+    limite = timezone.now() - timedelta(seconds=segundos)
+    try:
+        carpetas, _ = storage.listdir("")
+    except FileNotFoundError:
+        return 0
+
+    borrados = 0
+    for carpeta in carpetas:
+        subcarpetas, archivos = storage.listdir(carpeta)
+        restantes = len(subcarpetas)
+        for nombre in archivos:
+            ruta = f"{carpeta}/{nombre}"
+            if storage.get_modified_time(ruta) < limite:
+                storage.delete(ruta)
+                borrados += 1
+            else:
+                restantes += 1
+        if not restantes:
+            # FileSystemStorage borra el directorio vacío; en S3 las carpetas no existen y no hace nada
+            storage.delete(carpeta)
+    return borrados
@@ -1,11 +1,12 @@
-from django.db.models.signals import post_save  #Despuesta de guardar un modelo 
+from django.db.models.signals import pre_save, post_save, post_delete  #Despuesta de guardar un modelo 
 from django.dispatch import receiver
 from django.core.mail import EmailMessage
 from django.conf import settings
-from .models import Recibida, CorrespondenciaElaborada
+from .models import Correspondencia, Recibida, Enviada, CorrespondenciaElaborada
 from .models import AccionCorrespondencia
 from usuario.models import CustomUser
-from .tasks import procesar_notificacion_task
+from documento.models import PlantillaDocumento
+from .tasks import procesar_notificacion_task, precalentar_pdf_task, actualizar_metricas_task
 import requests
 import json
 import os
@@ -124,3 +125,55 @@ def crear_notificacion_al_accion(sender, instance, created, **kwargs):
             instance.visto = False
             instance.save(update_fields=['visto'])
             print(f"Signal: Modificado visto a False para id={instance.id}")
+
+#Descarta la plantilla Jinja2 compilada cuando se edita o elimina la plantilla
+@receiver(post_save, sender=PlantillaDocumento)
+@receiver(post_delete, sender=PlantillaDocumento)
+def invalidar_plantilla_compilada(sender, instance, **kwargs):
+    from correspondencia.services.plantillas import invalidar_plantilla
+    invalidar_plantilla(instance.pk)
+
+#Renderiza el PDF en segundo plano cuando cambia el contenido (los correos enlazan directo al PDF)
+@receiver(post_save, sender=CorrespondenciaElaborada)
+def precalentar_pdf_elaborada(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'contenido_html' not in update_fields:
+        return
+    if not instance.contenido_html:
+        return
+    transaction.on_commit(lambda: precalentar_pdf_task.delay(instance.pk))
+
+#Mantiene MetricaDiaria: recalcula en segundo plano los días del documento guardado o eliminado,
+#incluidos los días que tenía antes del save si cambió fecha_registro o fecha_envio
+@receiver(pre_save, sender=Correspondencia)
+@receiver(pre_save, sender=Recibida)
+@receiver(pre_save, sender=Enviada)
+@receiver(pre_save, sender=CorrespondenciaElaborada)
+def guardar_dias_metricas_previos(sender, instance, update_fields=None, **kwargs):
+    from correspondencia.services.metricas import CAMPOS_FECHA, dias_guardados
+    # save(update_fields=[...]) sin fechas (p. ej. el cambio de estado de AccionCorrespondencia) no mueve de día
+    if update_fields is not None and not set(update_fields) & set(CAMPOS_FECHA):
+        instance._dias_metricas_previos = set()
+        return
+    instance._dias_metricas_previos = dias_guardados(instance)
+
+@receiver(post_save, sender=Correspondencia)
+@receiver(post_save, sender=Recibida)
+@receiver(post_save, sender=Enviada)
+@receiver(post_save, sender=CorrespondenciaElaborada)
+@receiver(post_delete, sender=Correspondencia)
+@receiver(post_delete, sender=Recibida)
+@receiver(post_delete, sender=Enviada)
+@receiver(post_delete, sender=CorrespondenciaElaborada)
+def actualizar_metricas_correspondencia(sender, instance, **kwargs):
+    from correspondencia.services.metricas import dias_afectados
+    fechas = [dia.isoformat() for dia in dias_afectados(instance)]
+    if fechas:
+        transaction.on_commit(lambda: actualizar_metricas_task.delay(fechas))
+
+#Las copias del dashboard en caché pasan a ser viejas cuando entra, se elabora o cambia de estado un documento
+@receiver(post_save, sender=Recibida)
+@receiver(post_save, sender=CorrespondenciaElaborada)
+@receiver(post_save, sender=AccionCorrespondencia)
+def invalidar_cache_dashboard(sender, instance, **kwargs):
+    from correspondencia.services.cache_dashboard import invalidar_dashboard
+    invalidar_dashboard()
@@ -1,5 +1,5 @@
 from celery import shared_task
-from gestion_documental.ai.model_loader import get_model
+from documento.busquedaSemantica.embeddings import generar_embedding
 #bind=True acceso a self
 #autoretry_for reintenta si falla countdown=10 espera 10 segundos entre intentos
 @shared_task(bind=True, autoretry_for=(Exception,), retry_kwargs={'max_retries': 3, 'countdown': 10})
@@ -28,8 +28,7 @@ def procesar_ia_pesada_task(self, texto):
     Tarea de ejemplo para inferencia pesada.
     Mantiene la carga de sentence-transformers fuera del servicio web.
     """
-    model = get_model()
-    embedding = model.encode(texto).tolist()
+    embedding = generar_embedding(texto).tolist()
 
     return {
         "ok": True,
@@ -46,7 +45,8 @@ def generar_embedding_html_task(self, correspondencia_id):
 
     from .models import (
         CorrespondenciaElaborada,
-        _build_semantic_text
+        _build_semantic_text,
+        _semantic_fingerprint
     )
 
     doc = CorrespondenciaElaborada.objects.get(
@@ -58,16 +58,25 @@ def generar_embedding_html_task(self, correspondencia_id):
     if not texto_plano:
         return
 
-    model = get_model()
-
-    embedding = model.encode(
+    # Puede haber varias tareas en cola para la misma fila: si otra ya
+    # calculó el vector con este mismo texto y modelo, no se vuelve a inferir
+    huella = _semantic_fingerprint(texto_plano)
+    if huella == doc.huella_semantica and doc.vector_embedding_html is not None:
+        return {
+            "ok": True,
+            "correspondencia_id": correspondencia_id,
+            "sin_cambios": True
+        }
+
+    embedding = generar_embedding(
         texto_plano
     ).tolist()
 
     CorrespondenciaElaborada.objects.filter(
         pk=correspondencia_id
     ).update(
-        vector_embedding_html=embedding
+        vector_embedding_html=embedding,
+        huella_semantica=huella
     )
 
     return {
@@ -75,6 +84,127 @@ def generar_embedding_html_task(self, correspondencia_id):
         "correspondencia_id": correspondencia_id
     }
 
+@shared_task(
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_kwargs={"max_retries": 2, "countdown": 30}
+)
+def precalentar_pdf_task(self, correspondencia_id):
+    """Deja el PDF en la caché después de guardar, para que los destinatarios no esperen el render."""
+    from .models import CorrespondenciaElaborada
+    from .services.cache_pdf import precalentar_pdf
+
+    doc = CorrespondenciaElaborada.objects.filter(pk=correspondencia_id).first()
+    if not doc or not doc.contenido_html:
+        return
+
+    return {
+        "ok": True,
+        "correspondencia_id": correspondencia_id,
+        "archivo": precalentar_pdf(doc)
+    }
+
+@shared_task(bind=True)
+def exportar_documentos_task(self, trabajo_id):
+    """Renderiza una exportación PDF/Word (uno o varios documentos) fuera del request."""
+    from .services.exportaciones import ejecutar_trabajo
+
+    trabajo = ejecutar_trabajo(trabajo_id)
+    return {
+        "ok": trabajo["estado"] == "completado",
+        "trabajo_id": trabajo_id,
+        "estado": trabajo["estado"]
+    }
+
+@shared_task(bind=True)
+def limpiar_exportaciones_task(self):
+    """Tarea periódica (beat): borra los archivos exportados que superan EXPORTACIONES_TTL."""
+    from .services.exportaciones import limpiar_exportaciones
+
+    return {
+        "ok": True,
+        "borrados": limpiar_exportaciones()
+    }
+
+@shared_task(
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_kwargs={"max_retries": 3, "countdown": 10}
+)
+def actualizar_metricas_task(self, fechas):
+    """Recalcula MetricaDiaria de los días tocados por un guardado o borrado (fechas ISO)."""
+    from datetime import date
+    from .services.metricas import recalcular_metricas
+
+    from .services.cache_dashboard import invalidar_dashboard
+
+    dias = sorted({date.fromisoformat(fecha) for fecha in fechas})
+    for dia in dias:
+        recalcular_metricas(dia)
+    # El dashboard lee MetricaDiaria: recién ahora las copias en caché quedan desactualizadas
+    invalidar_dashboard()
+    return {
+        "ok": True,
+        "dias": [dia.isoformat() for dia in dias]
+    }
+
+@shared_task(bind=True)
+def repasar_metricas_task(self):
+    """
+    Tarea periódica (beat): recalcula los últimos METRICAS_DIAS_REPASO días.
+    Cubre los cambios que no pasan por señales (queryset.update, cargas masivas).
+    """
+    from datetime import timedelta
+    from django.conf import settings
+    from django.utils import timezone
+    from .services.metricas import recalcular_metricas
+
+    from .services.cache_dashboard import invalidar_dashboard
+
+    hasta = timezone.localdate()
+    desde = hasta - timedelta(days=settings.METRICAS_DIAS_REPASO - 1)
+    filas = recalcular_metricas(desde, hasta)
+    invalidar_dashboard()
+    return {
+        "ok": True,
+        "desde": desde.isoformat(),
+        "filas": filas
+    }
+
+@shared_task(bind=True)
+def refrescar_dashboard_task(self, periodo, cantidad):
+    """Recalcula en segundo plano una copia vieja de la caché del dashboard."""
+    from .services.cache_dashboard import refrescar_dashboard
+
+    refrescar_dashboard(periodo, cantidad)
+    return {
+        "ok": True,
+        "periodo": periodo,
+        "cantidad": cantidad
+    }
+
+@shared_task(bind=True)
+def generar_reporte_task(self, trabajo_id):
+    """Genera un reporte XLSX/CSV/Parquet fuera del request (rangos de varias gestiones)."""
+    from .services.reportes import ejecutar_trabajo
+
+    trabajo = ejecutar_trabajo(trabajo_id)
+    return {
+        "ok": trabajo["estado"] == "completado",
+        "trabajo_id": trabajo_id,
+        "estado": trabajo["estado"]
+    }
+
+@shared_task(bind=True)
+def limpiar_reportes_task(self):
+    """Tarea periódica (beat): borra los reportes generados que superan REPORTES_RETENCION."""
+    from .services.reportes import limpiar_reportes
+
+    return {
+        "ok": True,
+        "borrados": limpiar_reportes()
+    }
+
 #Define tareas Celery
 #Maneja reintentos
 #Llama la lógica pesada
\ No newline at end of file
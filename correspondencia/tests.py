@@ -1,3 +1,222 @@
-from django.test import TestCase
+import base64
+import json
+from datetime import datetime, timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import mixins, serializers, viewsets
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from correspondencia.models import Correspondencia, MetricaDiaria, Recibida
+from correspondencia.services.estadisticas import estadisticas_dashboard
+from correspondencia.services.metricas import dias_afectados, recalcular_metricas
+from gestion_documental.mixins import PaginacionYAllDataMixin
+from gestion_documental.pagination import PaginacionKeyset
+
+# Una consulta por serie sobre MetricaDiaria: recibida, enviada, buckets (recibida vs enviada + procesados),
+# estados, pendientes/atrasados, tiempo de respuesta, tipos, flujo y días de mayor actividad
+CONSULTAS_DASHBOARD = 9
+
+
+class EstadisticasDashboardTest(TestCase):
+    """El dashboard hace la misma cantidad de consultas para cualquier `cantidad` de periodos."""
+
+    HOY = datetime(2026, 3, 31, 10, 0)
+
+    @classmethod
+    def setUpTestData(cls):
+        for dias, estado in [(0, 'aprobado'), (0, 'borrador'), (1, 'enviado'), (3, 'en_revision'), (40, 'archivado')]:
+            recibida = Recibida.objects.create(
+                tipo='recibido',
+                prioridad='media',
+                estado=estado,
+                fecha_recepcion=cls.HOY - timedelta(days=dias),
+            )
+            # fecha_registro es auto_now_add: se fija con update
+            Correspondencia.objects.filter(pk=recibida.pk).update(fecha_registro=cls.HOY - timedelta(days=dias))
+        # update() no dispara señales: el resumen diario se arma directamente
+        recalcular_metricas((cls.HOY - timedelta(days=40)).date(), cls.HOY.date())
+
+    def test_cantidad_de_consultas_no_depende_de_los_periodos(self):
+        for periodo in ("dia", "semana", "mes", "gestion"):
+            for cantidad in (7, 30):
+                with self.subTest(periodo=periodo, cantidad=cantidad):
+                    with self.assertNumQueries(CONSULTAS_DASHBOARD):
+                        datos = estadisticas_dashboard(periodo, cantidad, hoy=self.HOY)
+                    self.assertEqual(len(datos['recibida_vs_enviada']), cantidad)
+                    self.assertEqual(len(datos['procesados_por_dia']), cantidad)
+
+    def test_conteos_por_bucket(self):
+        datos = estadisticas_dashboard("dia", 7, hoy=self.HOY)
+
+        self.assertEqual(datos['recibida_vs_enviada'][-1], {'fecha': '31/03', 'recibida': 2, 'enviada': 0})
+        self.assertEqual(datos['recibida_vs_enviada'][-2], {'fecha': '30/03', 'recibida': 1, 'enviada': 0})
+        self.assertEqual(datos['procesados_por_dia'][-1], {'fecha': '31/03', 'procesados': 1, 'pendientes': 1})
+        self.assertEqual(datos['procesados_por_dia'][-4], {'fecha': '28/03', 'procesados': 0, 'pendientes': 1})
+        self.assertEqual(sum(b['recibida'] for b in datos['recibida_vs_enviada']), 4)
+
+
+class MetricaDiariaTest(TestCase):
+    """Recalcular un día deja el resumen igual a las tablas, sin duplicar filas."""
+
+    def test_recalcular_es_idempotente(self):
+        hoy = datetime(2026, 3, 31, 10, 0)
+        for estado in ('borrador', 'borrador', 'aprobado'):
+            recibida = Recibida.objects.create(tipo='recibido', prioridad='media', estado=estado, fecha_recepcion=hoy)
+            Correspondencia.objects.filter(pk=recibida.pk).update(fecha_registro=hoy)
+
+        recalcular_metricas(hoy.date())
+        Correspondencia.objects.filter(estado='borrador').update(estado='en_revision')
+        recalcular_metricas(hoy.date())
+
+        resumen = {
+            (m.tipo, m.estado): m.cantidad
+            for m in MetricaDiaria.objects.filter(fecha=hoy.date(), metrica='registro')
+        }
+        self.assertEqual(resumen, {('recibida', 'en_revision'): 2, ('recibida', 'aprobado'): 1})
+
+    def test_cambiar_fecha_recalcula_tambien_el_dia_anterior(self):
+        antes = datetime(2026, 3, 30, 10, 0)
+        despues = datetime(2026, 3, 31, 10, 0)
+        recibida = Recibida.objects.create(tipo='recibido', prioridad='media', estado='borrador', fecha_recepcion=antes)
+        Correspondencia.objects.filter(pk=recibida.pk).update(fecha_registro=antes)
+        recibida.refresh_from_db()
+
+        recibida.fecha_registro = despues
+        recibida.save()
+
+        self.assertEqual(dias_afectados(recibida), [antes.date(), despues.date()])
+
+
+class PaginacionKeysetTest(TestCase):
+    """El cursor recorre todo el listado en orden (fecha_registro, id) sin repetir ni saltear filas."""
+
+    HOY = datetime(2026, 3, 31, 10, 0)
+
+    @classmethod
+    def setUpTestData(cls):
+        # Tres registros con la misma fecha: el empate se resuelve por id_correspondencia
+        for dias in (1, 0, 0, 0, -1):
+            recibida = Recibida.objects.create(tipo='recibido', prioridad='media', estado='borrador', fecha_recepcion=cls.HOY)
+            Correspondencia.objects.filter(pk=recibida.pk).update(fecha_registro=cls.HOY - timedelta(days=dias))
+
+    def _pagina(self, queryset=None, **params):
+        paginador = PaginacionKeyset()
+        request = Request(APIRequestFactory().get('/', params))
+        filas = paginador.paginate_queryset(queryset if queryset is not None else Correspondencia.objects.all(), request)
+        return paginador, filas
+
+    def test_recorrido_completo_con_empates(self):
+        esperado = list(
+            Correspondencia.objects.order_by('-fecha_registro', '-id_correspondencia')
+            .values_list('id_correspondencia', flat=True)
+        )
+        vistos = []
+        cursor = ''
+        while True:
+            paginador, filas = self._pagina(cursor=cursor, per_page=2)
+            vistos += [fila.id_correspondencia for fila in filas]
+            if not paginador.siguiente:
+                break
+            cursor = paginador.siguiente
+        self.assertEqual(vistos, esperado)
+
+    def test_cursor_invalido_responde_404(self):
+        for token in ('no-es-base64', base64.urlsafe_b64encode(b'"solo"').decode(),
+                      base64.urlsafe_b64encode(json.dumps(['no-es-fecha', 1]).encode()).decode()):
+            with self.subTest(token=token), self.assertRaises(NotFound):
+                self._pagina(cursor=token)
+
+    def test_count_approx_es_estimado(self):
+        for queryset in (Correspondencia.objects.all(), Correspondencia.objects.filter(estado='borrador')):
+            with self.subTest(filtrado=bool(queryset.query.where)):
+                paginador, _ = self._pagina(queryset, cursor='', count='approx')
+                self.assertIsInstance(paginador.total, int)
+                self.assertGreaterEqual(paginador.total, 0)
+                self.assertTrue(paginador.estimado)
+
+    def test_count_exact_y_sin_count(self):
+        paginador, _ = self._pagina(cursor='', count='exact')
+        self.assertEqual(paginador.total, 5)
+        self.assertFalse(paginador.estimado)
+        paginador, _ = self._pagina(cursor='')
+        self.assertIsNone(paginador.total)
+
+
+class CursorKeysetTest(SimpleTestCase):
+    """El token del cursor ida y vuelta, y los tokens alterados se rechazan sin tocar la BD."""
+
+    def test_ida_y_vuelta(self):
+        paginador = PaginacionKeyset()
+        fila = Correspondencia(id_correspondencia=42, fecha_registro=datetime(2026, 3, 31, 10, 0, 5))
+        self.assertEqual(paginador.decodificar_cursor(paginador.codificar_cursor(fila)), (fila.fecha_registro, 42))
+
+    def test_token_alterado(self):
+        paginador = PaginacionKeyset()
+        token = paginador.codificar_cursor(Correspondencia(id_correspondencia=42, fecha_registro=datetime(2026, 3, 31)))
+        for alterado in (token[:-4], token[1:], 'x' + token, base64.urlsafe_b64encode(b'{"a": 1}').decode()):
+            with self.subTest(alterado=alterado), self.assertRaises(NotFound):
+                paginador.decodificar_cursor(alterado)
+
+
+class _FilasEnMemoria(list):
+    """Lo mínimo de un queryset que usa all_data: slicing, exists() e iterator()."""
+
+    def __getitem__(self, indice):
+        resultado = super().__getitem__(indice)
+        return _FilasEnMemoria(resultado) if isinstance(indice, slice) else resultado
+
+    def exists(self):
+        return bool(self)
+
+    def iterator(self, chunk_size):
+        return iter(self)
+
+
+class _FilaSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+
+
+class _VistaAllData(PaginacionYAllDataMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    serializer_class = _FilaSerializer
+    authentication_classes = []
+    permission_classes = []
+
+    def get_queryset(self):
+        return _FilasEnMemoria({'id': i} for i in range(5))
+
+
+@override_settings(ALL_DATA_MAX_FILAS=3, ALL_DATA_CHUNK_SIZE=2)
+class AllDataStreamingTest(SimpleTestCase):
+    """all_data se envía por bloques, como mucho ALL_DATA_MAX_FILAS filas, y avisa si se truncó."""
+
+    def _listar(self, **params):
+        request = APIRequestFactory().get('/', {'all_data': 'true', **params})
+        response = _VistaAllData.as_view({'get': 'list'})(request)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_json_truncado_con_cabecera(self):
+        response, cuerpo = self._listar()
+        self.assertEqual(json.loads(cuerpo), [{'id': 0}, {'id': 1}, {'id': 2}])
+        self.assertEqual(response['X-All-Data-Truncado'], '3')
+        # El frontend está en otro origen: la cabecera debe estar expuesta por CORS
+        self.assertIn('X-All-Data-Truncado', settings.CORS_EXPOSE_HEADERS)
+
+    def test_ndjson_truncado_con_marca_final(self):
+        response, cuerpo = self._listar(formato='ndjson')
+        lineas = [json.loads(linea) for linea in cuerpo.splitlines()]
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(lineas[:-1], [{'id': 0}, {'id': 1}, {'id': 2}])
+        self.assertEqual(lineas[-1], {'_truncado': True, 'limite': 3})
+
+    @override_settings(ALL_DATA_MAX_FILAS=10)
+    def test_sin_truncar(self):
+        response, cuerpo = self._listar()
+        self.assertEqual(len(json.loads(cuerpo)), 5)
+        self.assertNotIn('X-All-Data-Truncado', response)
+
+        response, cuerpo = self._listar(formato='ndjson')
+        self.assertEqual([json.loads(linea) for linea in cuerpo.splitlines()], [{'id': i} for i in range(5)])
+        self.assertNotIn('X-All-Data-Truncado', response)
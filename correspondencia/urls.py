@@ -15,7 +15,13 @@ from .views import (
     proximo_nro_registro,
     iniciar_tarea_ia,
     estado_tarea_ia,
+    crear_exportacion,
+    estado_exportacion,
+    descargar_exportacion,
     exportar_excel,
+    crear_reporte,
+    estado_reporte,
+    descargar_reporte,
     pre_sellos_disponibles,
 )
 
@@ -34,6 +40,12 @@ urlpatterns = [
     path("notificacion/vista/<int:id>/", marcar_notificacion_vista, name="marcar_notificacion_vista"),
     path("ia/tarea/iniciar/", iniciar_tarea_ia, name="iniciar_tarea_ia"),
     path("ia/tarea/estado/<str:task_id>/", estado_tarea_ia, name="estado_tarea_ia"),
+    path("exportaciones/", crear_exportacion, name="crear_exportacion"),
+    path("exportaciones/<str:trabajo_id>/", estado_exportacion, name="estado_exportacion"),
+    path("exportaciones/<str:trabajo_id>/descargar/", descargar_exportacion, name="descargar_exportacion"),
+    path("reportes/", crear_reporte, name="crear_reporte"),
+    path("reportes/<str:trabajo_id>/", estado_reporte, name="estado_reporte"),
+    path("reportes/<str:trabajo_id>/descargar/", descargar_reporte, name="descargar_reporte"),
     path("proximo_nro_registro/", proximo_nro_registro),
     path("generar_pre_sello/", generar_pre_sello),
     path("pre_sellos_disponibles/", pre_sellos_disponibles),
@@ -5,54 +5,13 @@ from docx import Document
 from docx.shared import Pt
 from django.utils.timezone import now
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-import pdfkit
 from usuario.models import CustomUser
 from jinja2 import Template
-import os
-import shutil
-
-def get_pdfkit_config():
-    #1) Permite fijar ruta por variable de entorno (Railway/local)
-    #2) Si no existe, busca "WKHTMLTOPDF_PATH" en Path del sistema
-
-    
-    wkhtml_path = os.getenv("WKHTMLTOPDF_PATH") or shutil.which("wkhtmltopdf")
-    if not wkhtml_path:
-        raise RuntimeError(
-            "wkhtmltopdf no está instalado o no está en Path"
-            "Instalalo o define WKHTMLTOPDF_PATH"
-        )
-    return pdfkit.configuration(wkhtmltopdf=wkhtml_path)
 
 def generar_pdf_desde_html(html_content):
-    # Get the base directory of your Django project
-    import os
-    from django.conf import settings
-    
-    # Build absolute paths to your header and footer
-    header_path = os.path.join(settings.BASE_DIR, 'documento', 'templates', 'Documento', 'header.html')
-    footer_path = os.path.join(settings.BASE_DIR, 'documento', 'templates', 'Documento', 'footer.html')
-
-    options = {
-        'page-size': 'Letter',
-        'margin-top': '5cm',
-        'margin-bottom': '3cm',
-        'margin-left': '2.5cm',
-        'margin-right': '2.5cm',
-        'header-html': header_path,
-        'footer-html': footer_path,
-        'zoom': '1.0',
-        'disable-smart-shrinking': '',
-        'enable-local-file-access': '',
-        'encoding': 'UTF-8',
-    }
-    config = get_pdfkit_config()
-    return pdfkit.from_string(
-        html_content,
-        False,
-        options=options,
-        configuration=config,
-    )
+    # El motor (wkhtmltopdf o weasyprint), la cabecera y el pie los maneja services/pdf.py
+    from .services.pdf import generar_pdf
+    return generar_pdf(html_content)
 
 #GENERAR DOCUMENTO WORD
 from django.utils.html import strip_tags
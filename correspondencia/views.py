@@ -16,8 +16,14 @@ from .serializers import (
 )
 from .filters import CorrespondenciaFilter, RecibidaFilter, EnviadaFilter, CorrespondenciaElaboradaFilter
 from gestion_documental.mixins import PaginacionYAllDataMixin
-from .utils import generar_documento_word, generar_pdf_desde_html
+from .utils import generar_documento_word
+from .services.pdf import ServicioPdfOcupado, html_para_pdf
+from .services.cache_pdf import asegurar_pdf, clave_pdf, get_storage_pdf, nombre_archivo
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from .services.services import consulta_semantica, crear_objetos_multiple
+from documento.busquedaSemantica.indices import parametros_busqueda_vectorial, parametros_desde_request
+from django.conf import settings
 from django.utils import timezone
 from django.utils.timezone import now
 from django.template.loader import render_to_string
@@ -59,6 +65,9 @@ class BaseViewSet(PaginacionYAllDataMixin, viewsets.ModelViewSet):
     filterset_class = None
     search_fields = []
     ordering_fields = []
+    # Ordenar por un vector de otra tabla (JOIN con documentos) no usa el índice HNSW: es un
+    # recorrido exacto y ef_search no aplica. Solo los campos del propio modelo (p. ej.
+    # vector_embedding_html de CorrespondenciaElaborada) se aceleran con el índice.
     semantic_search_field = 'documentos__vector_embedding'
 
     def get_serializer_context(self):
@@ -71,6 +80,36 @@ class BaseViewSet(PaginacionYAllDataMixin, viewsets.ModelViewSet):
         consulta = self.request.query_params.get('consulta_semantica')
         return consulta_semantica(queryset, consulta, self.semantic_search_field)
 
+    def usar_paginacion_cursor(self):
+        # La búsqueda semántica ordena por similitud: no es compatible con el cursor por fecha
+        return super().usar_paginacion_cursor() and not self.request.query_params.get('consulta_semantica')
+
+    def contexto_consulta(self):
+        # all_data se evalúa mientras se envía la respuesta, fuera de list()
+        if not self.request.query_params.get('consulta_semantica'):
+            return super().contexto_consulta()
+        return parametros_busqueda_vectorial(
+            **parametros_desde_request(self.request, filas=settings.ALL_DATA_MAX_FILAS)
+        )
+
+    def filas_hasta_pagina(self, request):
+        """Filas que el índice debe devolver para llegar a la página pedida (OFFSET + LIMIT)."""
+        paginator = self.paginator
+        try:
+            pagina = max(int(request.query_params.get(paginator.page_query_param, 1)), 1)
+        except ValueError:
+            pagina = 1
+        return pagina * paginator.get_page_size(request)
+
+    def list(self, request, *args, **kwargs):
+        if not request.query_params.get('consulta_semantica'):
+            return super().list(request, *args, **kwargs)
+        # El queryset se evalúa dentro de list(), así ef_search/probes aplican a la búsqueda.
+        # Con el ef_search por defecto (100) las páginas más allá de la fila 100 saldrían vacías
+        filas = self.filas_hasta_pagina(request)
+        with parametros_busqueda_vectorial(**parametros_desde_request(request, filas=filas)):
+            return super().list(request, *args, **kwargs)
+
 
 # =============================================
 # Documentos Word
@@ -102,6 +141,7 @@ class PreSelloRecibidaView(BaseViewSet, AuditableModelViewSet):
 
 class RecibidaView(BaseViewSet, AuditableModelViewSet):
     serializer_class = RecibidaSerializer
+    paginacion_cursor = True
     queryset = Recibida.objects.all().order_by('-fecha_registro')
     filterset_class = RecibidaFilter
     search_fields = [
@@ -309,6 +349,7 @@ def pre_sellos_disponibles(request):
 
 class EnviadaView(BaseViewSet, AuditableModelViewSet):
     serializer_class = EnviadaSerializer
+    paginacion_cursor = True
     queryset = Enviada.objects.all().order_by('-fecha_registro')
     filterset_class = EnviadaFilter
     search_fields = ['cite']
@@ -343,6 +384,7 @@ class EnviadaView(BaseViewSet, AuditableModelViewSet):
 # =============================================
 class CorrespondenciaElaboradaView(BaseViewSet, AuditableModelViewSet):
     queryset = CorrespondenciaElaborada.objects.all().order_by('-fecha_registro')
+    paginacion_cursor = True
     serializer_class = CorrespondenciaElaboradaSerializer
     filterset_class = CorrespondenciaElaboradaFilter
     semantic_search_field = 'vector_embedding_html'
@@ -391,17 +433,34 @@ class CorrespondenciaElaboradaView(BaseViewSet, AuditableModelViewSet):
     def obtener_pdf(self, request, pk=None):
         correspondencia = self.get_object()
         
-        html_completo = render_to_string("Documento/base_documento.html", {
-            "contenido": correspondencia.contenido_html,
-            "url_membrete_superior": request.build_absolute_uri("/media/Membrete.PNG"),
-            "url_sello": request.build_absolute_uri("/media/Sello.PNG"),
-            "url_membrete_inferior": request.build_absolute_uri("/media/MembreteInferior.PNG"),
-        })
-        
-        pdf = generar_pdf_desde_html(html_completo)
+        # El PDF se guarda por hash del HTML final: solo se renderiza si el contenido cambió
+        html_completo = html_para_pdf(correspondencia)
+        clave = clave_pdf(html_completo)
+        etag = f'"{clave}"'
+        storage = get_storage_pdf()
+        nombre = nombre_archivo(clave)
+        existe = storage.exists(nombre)
+        ultima_modificacion = storage.get_modified_time(nombre).timestamp() if existe else None
+
+        # If-None-Match / If-Modified-Since: el cliente ya tiene esta versión
+        no_modificado = get_conditional_response(request, etag=etag, last_modified=ultima_modificacion)
+        if no_modificado is not None:
+            return no_modificado
+
+        if not existe:
+            # Membretes y sello se leen del disco (MEDIA_ROOT), no con una petición HTTP al mismo servidor
+            try:
+                asegurar_pdf(html_completo, clave)
+            except ServicioPdfOcupado as e:
+                return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            ultima_modificacion = storage.get_modified_time(nombre).timestamp()
         
-        response = HttpResponse(pdf, content_type='application/pdf')
+        response = FileResponse(storage.open(nombre, 'rb'), content_type='application/pdf')
         response['Content-Disposition'] = f'inline; filename="documento_{pk}.pdf"'
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(ultima_modificacion)
+        # Endpoint autenticado: el navegador puede guardarlo pero debe revalidar con el ETag
+        response['Cache-Control'] = 'private, no-cache'
         return response
 
 
@@ -530,493 +589,252 @@ def estado_tarea_ia(request, task_id):
     return Response(payload, status=status.HTTP_200_OK)
 
 # =============================================
-# ESTADISTICAS
+# EXPORTACIONES ASÍNCRONAS (PDF / WORD)
 # =============================================
-from django.db.models import Count, Q, Avg, F, ExpressionWrapper, DurationField
-from django.utils import timezone
-from datetime import timedelta, datetime
-from django.db.models.functions import TruncDay, TruncWeek, TruncMonth, TruncYear
-from documento.models import PlantillaDocumento
+from django.urls import reverse
+from .services.exportaciones import FORMATOS, crear_trabajo, obtener_trabajo, get_storage_exportaciones
+from .tasks import exportar_documentos_task
 
 
-@api_view(['GET'])
+def _obtener_trabajo_usuario(request, trabajo_id):
+    trabajo = obtener_trabajo(trabajo_id)
+    if not trabajo or trabajo["usuario_id"] != request.user.id:
+        return None
+    return trabajo
+
+
+@api_view(["POST"])
 @permission_classes([IsAuthenticated])
-def estadisticas_dashboard(request):
+def crear_exportacion(request):
     """
-    Endpoint principal que retorna todas las estadísticas para el dashboard
+    Crea un trabajo de exportación en Celery.
+    Body: {"ids": [1, 2, ...], "formato": "pdf" | "word"}. Varios ids se entregan en un ZIP.
     """
-    hoy = timezone.now() #Obtiene la fecha actual
-    periodo = request.GET.get("periodo", "dia")
-    cantidad = int(request.GET.get("cantidad",7))
-
-    MESES = {
-        1: "Ene",
-        2: "Feb",
-        3: "Mar",
-        4: "Abr",
-        5: "May",
-        6: "Jun",
-        7: "Jul",
-        8: "Ago",
-        9: "Sep",
-        10: "Oct",
-        11: "Nov",
-        12: "Dic"   
-        }
-
-    #### CONFIGURACIÓN DINAMICA ####
-
-    if periodo == "dia":
-        fecha_inicio = hoy - timedelta(days=cantidad)
-        truncado = TruncDay #Define como agrupar en este caso por día
-    
-    elif periodo == "semana":
-        fecha_inicio = hoy - timedelta(weeks=cantidad)
-        truncado = TruncWeek #Define como agrupar en este caso por semana
-    
-    elif periodo == "mes":
-        fecha_inicio = hoy - timedelta(days=30 * cantidad)
-        truncado = TruncMonth
-    
-    elif periodo == "gestion":
-        fecha_inicio = hoy - timedelta(days=365 * cantidad)
-        truncado = TruncYear
-    
-    else:
-        fecha_inicio = hoy - timedelta(days=7)
-        truncado = TruncDay
+    formato = request.data.get("formato", "pdf")
+    ids = request.data.get("ids") or []
+    if formato not in FORMATOS:
+        return Response({"error": f"Formato no soportado. Opciones: {', '.join(FORMATOS)}"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        ids = sorted({int(i) for i in ids})
+    except (TypeError, ValueError):
+        return Response({"error": "'ids' debe ser una lista de números."}, status=status.HTTP_400_BAD_REQUEST)
+    if not ids:
+        return Response({"error": "Debe enviar al menos un id en 'ids'."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(ids) > settings.EXPORTACIONES_MAX_IDS:
+        return Response({"error": f"Máximo {settings.EXPORTACIONES_MAX_IDS} documentos por exportación."}, status=status.HTTP_400_BAD_REQUEST)
+
+    existentes = set(CorrespondenciaElaborada.objects.filter(pk__in=ids).values_list("pk", flat=True))
+    faltantes = [i for i in ids if i not in existentes]
+    if faltantes:
+        return Response({"error": "Documentos no encontrados.", "ids": faltantes}, status=status.HTTP_404_NOT_FOUND)
+
+    trabajo = crear_trabajo(request.user.id, formato, ids)
+    exportar_documentos_task.delay(trabajo["id"])
+    return Response({
+        "id": trabajo["id"],
+        "estado": trabajo["estado"],
+        "url_estado": reverse("estado_exportacion", args=[trabajo["id"]]),
+    }, status=status.HTTP_202_ACCEPTED)
 
-    
-    def formatear_fecha(fecha, periodo):
-        if periodo == "dia":
-            return fecha.strftime("%d/%m")
-        elif periodo == "semana":
-            return f"Sem {fecha.isocalendar().week}"
-        elif periodo == "mes":
-            return MESES[fecha.month]
-        elif periodo == "gestion":
-            return str(fecha.year)
-        return fecha.strftime("%d/%m")
-
-    # 1. Correspondencia recibida semanal //Recibida.objects --> voy a trabajar con la tabla Recibida
-    # .filter --> solo dame algunos registros que cumplan con la condición
-    # gte --> greater than or equal (mayor o igual)
-    recibida_data = Recibida.objects.filter(
-        #Means: Dame registros desde hace 7 días hasta hoy
-        fecha_registro__gte=fecha_inicio
-    ).annotate( #Agrupa por día
-        fecha=truncado('fecha_registro')
-    #values() = solo quiero el día
-    ).values('fecha').annotate(
-                 #count = cuenta cuantos documentos hay por día
-        cantidad=Count('id_correspondencia')
-    ).order_by('fecha')
-    
-    # 2. Correspondencia enviada semanal
-    enviada_data = CorrespondenciaElaborada.objects.filter(
-        fecha_envio__gte=fecha_inicio ##PORQUE
-    ).annotate(
-        fecha=truncado('fecha_envio')
-    ).values('fecha').annotate(
-        cantidad=Count('id_correspondencia')
-    ).order_by('fecha')
-    
-    # 3. Correspondencia recibida vs enviada (combinado)
- 
-    recibida_vs_enviada = []
 
-    for i in range(cantidad):
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def estado_exportacion(request, trabajo_id):
+    trabajo = _obtener_trabajo_usuario(request, trabajo_id)
+    if not trabajo:
+        return Response({"error": "Exportación no encontrada o expirada."}, status=status.HTTP_404_NOT_FOUND)
+
+    payload = {k: trabajo.get(k) for k in ("id", "estado", "formato", "creado", "terminado", "errores")}
+    payload["total"] = len(trabajo["ids"])
+    if trabajo["estado"] == "completado":
+        payload["url_descarga"] = reverse("descargar_exportacion", args=[trabajo["id"]])
+    return Response(payload, status=status.HTTP_200_OK)
 
-        ## Generar fecha según periodo
 
-        if periodo == "dia":
-            fecha_actual = hoy - timedelta(days=cantidad - 1 - i)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def descargar_exportacion(request, trabajo_id):
+    trabajo = _obtener_trabajo_usuario(request, trabajo_id)
+    if not trabajo:
+        return Response({"error": "Exportación no encontrada o expirada."}, status=status.HTTP_404_NOT_FOUND)
+    if trabajo["estado"] != "completado":
+        return Response({"error": "La exportación aún no está lista.", "estado": trabajo["estado"]}, status=status.HTTP_409_CONFLICT)
+
+    # FileResponse envía el archivo por bloques, sin cargarlo completo en memoria
+    return FileResponse(
+        get_storage_exportaciones().open(trabajo["archivo"], "rb"),
+        as_attachment=True,
+        filename=trabajo["nombre_descarga"],
+    )
 
-        elif periodo == "semana":
-            fecha_actual = hoy - timedelta(weeks=cantidad - 1 - i)
+# =============================================
+# ESTADISTICAS
+# =============================================
+from .services.cache_dashboard import obtener_dashboard
+from .services.estadisticas import PERIODOS
 
-        elif periodo == "mes":
-            fecha_actual = hoy - timedelta(days=(30 * (cantidad - 1 - i)))
 
-        elif periodo == "gestion":
-            fecha_actual = hoy - timedelta(days=(365 * (cantidad - 1 - i)))  
- 
-        ## Filtros según periodo
+def periodo_y_cantidad(datos):
+    """
+    Valida "periodo" y "cantidad" (dashboard, Excel y reportes): periodo conocido y
+    1 <= cantidad <= DASHBOARD_CANTIDAD_MAX. Devuelve (periodo, cantidad, error).
+    """
+    periodo = datos.get("periodo", "dia")
+    if periodo not in PERIODOS:
+        return None, None, f"Periodo no soportado. Opciones: {', '.join(PERIODOS)}"
+    try:
+        cantidad = int(datos.get("cantidad", 7))
+    except (TypeError, ValueError):
+        return None, None, "El parámetro 'cantidad' debe ser un número entero."
+    if not 1 <= cantidad <= settings.DASHBOARD_CANTIDAD_MAX:
+        return None, None, f"El parámetro 'cantidad' debe estar entre 1 y {settings.DASHBOARD_CANTIDAD_MAX}."
+    return periodo, cantidad, None
 
-        if periodo == "dia":
-            recibidas = Recibida.objects.filter(
-                fecha_registro__date=fecha_actual.date()
-            ).count()
 
-            enviadas = CorrespondenciaElaborada.objects.filter(
-                fecha_registro__date=fecha_actual.date()
-            ).count()
-        
-        elif periodo == "semana":
-
-            inicio_semana = fecha_actual - timedelta(days=fecha_actual.weekday())
-            fin_semana = inicio_semana + timedelta(days=6)
-
-            recibidas = Recibida.objects.filter(
-                fecha_registro__date__range=[
-                    inicio_semana.date(),
-                    fin_semana.date()
-                ]
-            ).count()
-
-            enviadas = CorrespondenciaElaborada.objects.filter(
-                fecha_registro__date__range=[
-                        inicio_semana.date(),
-                        fin_semana.date()
-                    ]
-                ).count()
-
-        elif periodo == "mes":
-
-            recibidas = Recibida.objects.filter(
-                fecha_registro__year=fecha_actual.year,
-                fecha_registro__month=fecha_actual.month
-            ).count()
-
-            enviadas = CorrespondenciaElaborada.objects.filter(
-                fecha_registro__year=fecha_actual.year,
-                fecha_registro__month=fecha_actual.month
-             ).count()
-
-        elif periodo == "gestion":
-
-            recibidas = Recibida.objects.filter(
-                fecha_registro__year=fecha_actual.year
-            ).count()
-
-            enviadas = CorrespondenciaElaborada.objects.filter(
-                fecha_registro__year=fecha_actual.year
-            ).count()
-
-        recibida_vs_enviada.append({
-            'fecha': formatear_fecha(fecha_actual, periodo),
-            'recibida': recibidas,
-            'enviada': enviadas
-        })
-
-    # 4. Estado de documentos
-    estado_documentos = Correspondencia.objects.values('estado').annotate(
-        cantidad=Count('id_correspondencia')
-    ).order_by('-cantidad')
-    
-    # 5. Documentos pendientes y atrasados
-    pendientes = Correspondencia.objects.filter(
-        estado__in=['borrador', 'en_revision']
-    ).count()
-    
-    atrasados = Correspondencia.objects.filter(
-        estado__in=['borrador', 'en_revision'],
-        fecha_registro__lt=fecha_inicio
-    ).count()
-    
-    # 6. Tiempo promedio de respuesta (para Recibida)
-    respuestas = Recibida.objects.filter(
-        fecha_respuesta__isnull=False,
-        fecha_recepcion__gte=fecha_inicio
-    ).annotate(
-        tiempo_respuesta=ExpressionWrapper(
-            F('fecha_respuesta') - F('fecha_recepcion'),
-            output_field=DurationField()
-        )
-    )
-    
-    if respuestas.exists():
-        tiempo_promedio = respuestas.aggregate(
-            avg=Avg('tiempo_respuesta')
-        )['avg']
-        tiempo_promedio_horas = tiempo_promedio.total_seconds() / 3600 if tiempo_promedio else 0
-    else:
-        tiempo_promedio_horas = 0
-    
-    # 7. Tiempo promedio de búsqueda semántica (simulado - necesitarías logs de búsqueda)
-    tiempo_busqueda = 0.8  # Placeholder - necesitarías registrar tiempos de búsqueda
-    
-    # 8. Búsquedas exitosas vs sin resultados (simulado - necesitarías logs de búsqueda)
-    busquedas_exitosas = 85  # Placeholder
-    busquedas_sin_resultados = 15  # Placeholder
-    
-    # 9. Tipos de documentos por ámbito
-    tipos_documentos = PlantillaDocumento.objects.annotate(
-        internos=Count(
-            'correspondencias',
-            filter=Q(correspondencias__ambito='interno')
-        ),
-        externos=Count(
-            'correspondencias',
-            filter=Q(correspondencias__ambito='externo')
-        )
-    ).values(
-        'tipo',
-        'internos',
-        'externos'
-    ).order_by('tipo')
-        
-    # 10. Flujo mensual de correspondencia
-    flujo_correspondencia = Correspondencia.objects.filter(
-        fecha_registro__gte=fecha_inicio
-    ).annotate(
-        fecha=truncado('fecha_registro')
-    ).values('fecha').annotate(
-        cantidad=Count('id_correspondencia')
-    ).order_by('fecha')
-    
-    # 11. Documentos procesados por día
-    procesados_por_dia = []
-
-    for i in range(cantidad):
-
-        if periodo == "dia":
-            fecha_actual = hoy - timedelta(days=cantidad - 1 - i)
-
-        elif periodo == "semana":
-            fecha_actual = hoy - timedelta(weeks=cantidad - 1 - i)
-
-        elif periodo == "mes":
-            fecha_actual = hoy - timedelta(days=30 * (cantidad - 1 - i))
-
-        elif periodo == "gestion":
-            fecha_actual = hoy - timedelta(days=365 * (cantidad - 1 - i))
-
-        # CONSULTAS
-        if periodo == "dia":
-
-            procesados = Correspondencia.objects.filter(
-                fecha_registro__date=fecha_actual.date(),
-                estado__in=['aprobado', 'archivado', 'enviado']
-            ).count()
-
-            pendientes_dia = Correspondencia.objects.filter(
-                fecha_registro__date=fecha_actual.date(),
-                estado__in=['borrador', 'en_revision']
-            ).count()
-
-        elif periodo == "semana":
-
-            inicio_semana = fecha_actual - timedelta(days=fecha_actual.weekday())
-            fin_semana = inicio_semana + timedelta(days=6)
-
-            procesados = Correspondencia.objects.filter(
-                fecha_registro__date__range=[
-                    inicio_semana.date(),
-                    fin_semana.date()
-                ],
-                estado__in=['aprobado', 'archivado', 'enviado']
-            ).count()
-
-            pendientes_dia = Correspondencia.objects.filter(
-                fecha_registro__date__range=[
-                    inicio_semana.date(),
-                    fin_semana.date()
-                ],
-                estado__in=['borrador', 'en_revision']
-            ).count()
-
-        elif periodo == "mes":
-
-            procesados = Correspondencia.objects.filter(
-                fecha_registro__year=fecha_actual.year,
-                fecha_registro__month=fecha_actual.month,
-                estado__in=['aprobado', 'archivado', 'enviado']
-            ).count()
-
-            pendientes_dia = Correspondencia.objects.filter(
-                fecha_registro__year=fecha_actual.year,
-                fecha_registro__month=fecha_actual.month,
-                estado__in=['borrador', 'en_revision']
-            ).count()
-
-        elif periodo == "gestion":
-
-            procesados = Correspondencia.objects.filter(
-                fecha_registro__year=fecha_actual.year,
-                estado__in=['aprobado', 'archivado', 'enviado']
-            ).count()
-
-            pendientes_dia = Correspondencia.objects.filter(
-                fecha_registro__year=fecha_actual.year,
-                estado__in=['borrador', 'en_revision']
-            ).count()
-
-        procesados_por_dia.append({
-            'fecha': formatear_fecha(fecha_actual, periodo),
-            'procesados': procesados,
-            'pendientes': pendientes_dia
-        })
-    # 12. Días con mayor actividad
-    dias_actividad = Correspondencia.objects.annotate(
-        fecha=truncado('fecha_registro')
-    ).values('fecha').annotate(
-        cantidad=Count('id_correspondencia')
-    ).order_by('-cantidad')[:5]
-    
-    # 13. Rendimiento del sistema de búsqueda (simulado)
-    rendimiento_busqueda = 94  # Placeholder - necesitarías métricas reales
-    
-    return Response({
-        'recibida_data': [          #%A Convierte una fecha a Monday, Tuesday, etc. 
-            {'fecha': formatear_fecha(item['fecha'], periodo), 'cantidad': item['cantidad']}
-            for item in recibida_data
-        ],
-        'enviada_data': [
-            {'fecha': formatear_fecha(item['fecha'], periodo), 'cantidad': item['cantidad']}
-            for item in enviada_data
-        ],
-        'recibida_vs_enviada': recibida_vs_enviada,
-        'estado_documentos': [
-            {'name': item['estado'].capitalize(), 'cantidad': item['cantidad']}
-            for item in estado_documentos
-        ],
-        'pendientes_atrasados': [
-            {'name': 'Pendientes', 'cantidad': pendientes},
-            {'name': 'Atrasados', 'cantidad': atrasados}
-        ],
-        'tiempo_promedio_respuesta': round(tiempo_promedio_horas, 2),
-        'tiempo_busqueda': tiempo_busqueda,
-        'busquedas_exitosas_sin_resultados': [
-            {'name': 'Exitosas', 'cantidad': busquedas_exitosas},
-            {'name': 'Sin resultados', 'cantidad': busquedas_sin_resultados}
-        ],
-        'tipos_documentos': [
-            {
-                'tipo': item['tipo'].capitalize(),
-                'internos': item['internos'],
-                'externos': item['externos'],
-            }
-            for item in tipos_documentos
-        ],
-        'flujo_correspondencia': [
-            {'fecha': formatear_fecha(item['fecha'],periodo), 'cantidad': item['cantidad']} #%B
-            for item in flujo_correspondencia
-        ],
-        'procesados_por_dia': procesados_por_dia,
-        'dias_mayor_actividad': [
-            {'fecha': formatear_fecha(item['fecha'],periodo), 'cantidad': item['cantidad']}
-            for item in dias_actividad
-        ],
-        'rendimiento_busqueda': rendimiento_busqueda
-    })
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def estadisticas_dashboard(request):
+    """
+    Endpoint principal que retorna todas las estadísticas para el dashboard
+    """
+    periodo, cantidad, error = periodo_y_cantidad(request.GET)
+    if error:
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(obtener_dashboard(periodo, cantidad))
 # =============================================
 # ARCHIVO EXCEL
 # =============================================
-from openpyxl import Workbook
-from django.http import HttpResponse
+from .services.excel import generar_excel
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def exportar_excel(request):
 
     hoy = timezone.now()
 
-    periodo = request.GET.get("periodo", "dia")
-    cantidad = int(request.GET.get("cantidad", 7))
-
-    # CONFIGURACIÓN
-    if periodo == "dia":
-        fecha_inicio = hoy - timedelta(days=cantidad)
+    # CONFIGURACIÓN: mismo periodo/cantidad acotados que el dashboard
+    periodo, cantidad, error = periodo_y_cantidad(request.GET)
+    if error:
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+    fecha_inicio = hoy - PERIODOS[periodo][1] * cantidad
 
-    elif periodo == "semana":
-        fecha_inicio = hoy - timedelta(weeks=cantidad)
-
-    elif periodo == "mes":
-        fecha_inicio = hoy - timedelta(days=30 * cantidad)
-
-    elif periodo == "gestion":
-        fecha_inicio = hoy - timedelta(days=365 * cantidad)
-
-    else:
-        fecha_inicio = hoy - timedelta(days=7)
-
-    # CONSULTA
-    recibidas = Recibida.objects.filter(
-        fecha_registro__gte=fecha_inicio
-    )
-    enviadas = CorrespondenciaElaborada.objects.filter(
-        fecha_envio__gte=fecha_inicio
+    # El libro se arma en un archivo temporal y se envía por bloques: la memoria no crece con las filas
+    return FileResponse(
+        generar_excel(fecha_inicio),
+        as_attachment=True,
+        filename="reporte_correspondencia.xlsx",
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
     )
-    # CREAR EXCEL
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Reporte Correspondencia"
-
-    # ENCABEZADOS
-    ws.append([
-        "TIPO",
-        "ID",
-        "NRO REGISTRO/CITE",
-        "FECHA RECEPCIÓN",
-        "FECHA RESPUESTA",
-        "FECHA ENVÍO",
-        "FECHA SEGUIMIENTO",
-        "ESTADO",
-        "PRIORIDAD",
-        "ÁMBITO"
-    ])
-
-    ##RECIBIDAS
-    for doc in recibidas:
-        ws.append([
-             "RECIBIDA",
-            str(doc.id_correspondencia),
-            doc.nro_registro if hasattr(doc, 'nro_registro') else "-",
-
-            doc.fecha_recepcion.strftime("%d/%m/%Y")
-            if doc.fecha_recepcion else "-",
-
-            doc.fecha_respuesta.strftime("%d/%m/%Y")
-            if doc.fecha_respuesta else "-",
-
-            "-",  # fecha envio
-
-            "-",  # fecha seguimiento
 
-            doc.estado,
 
-            doc.prioridad if hasattr(doc, 'prioridad') else "-",
-
-            "-"  # ambito no existe
-             ])
-
-
-    for doc in enviadas:
-
-        ws.append([
-            "ENVIADA",
-
-            str(doc.id_correspondencia),
+# =============================================
+# REPORTES ASÍNCRONOS (XLSX / CSV / PARQUET)
+# =============================================
+from datetime import date
+from .services.reportes import (
+    AMBITOS_REPORTE, FORMATOS_REPORTE, TIPOS_REPORTE,
+    crear_trabajo as crear_trabajo_reporte,
+    formato_disponible,
+    get_storage_reportes,
+    obtener_trabajo as obtener_trabajo_reporte,
+)
+from .tasks import generar_reporte_task
 
-            doc.cite if hasattr(doc, 'cite') else "-",
 
-            "-",  # fecha recepcion
+def _filtros_reporte(datos):
+    """
+    Valida los filtros del reporte. El rango es desde/hasta (AAAA-MM-DD, inclusivos) o,
+    si no se envía, periodo + cantidad validados como en exportar_excel.
+    Devuelve (filtros, error).
+    """
+    filtros = {}
+    for campo, opciones in (("tipo", TIPOS_REPORTE), ("ambito", AMBITOS_REPORTE),
+                            ("estado", [e for e, _ in Correspondencia.TIPO_CHOICES_ESTADO])):
+        valor = datos.get(campo) or None
+        if valor is not None and valor not in opciones:
+            return None, f"'{campo}' inválido. Opciones: {', '.join(opciones)}"
+        filtros[campo] = valor
 
-            "-",  # fecha respuesta
+    try:
+        desde = date.fromisoformat(datos["desde"]) if datos.get("desde") else None
+        hasta = date.fromisoformat(datos["hasta"]) if datos.get("hasta") else None
+    except (TypeError, ValueError):
+        return None, "'desde'/'hasta' deben ser fechas AAAA-MM-DD."
+    if desde and hasta and desde > hasta:
+        return None, "'desde' no puede ser posterior a 'hasta'."
+
+    if not desde and not hasta:
+        # Mismo periodo/cantidad acotados que el dashboard: sin rango explícito no se exporta todo el historial
+        periodo, cantidad, error = periodo_y_cantidad(datos)
+        if error:
+            return None, error
+        desde = (timezone.now() - PERIODOS[periodo][1] * cantidad).date()
+    filtros["desde"] = desde.isoformat() if desde else None
+    filtros["hasta"] = hasta.isoformat() if hasta else None
+    return filtros, None
+
+
+def _obtener_reporte_usuario(request, trabajo_id):
+    trabajo = obtener_trabajo_reporte(trabajo_id)
+    if not trabajo or trabajo["usuario_id"] != request.user.id:
+        return None
+    return trabajo
 
-            doc.fecha_envio.strftime("%d/%m/%Y")
-            if doc.fecha_envio else "-",
 
-            doc.fecha_seguimiento.strftime("%d/%m/%Y")
-            if hasattr(doc, 'fecha_seguimiento') and doc.fecha_seguimiento
-            else "-",
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def crear_reporte(request):
+    """
+    Crea un reporte de correspondencia en Celery.
+    Body: {"formato": "xlsx" | "csv" | "parquet", "desde": "2023-01-01", "hasta": "2025-12-31",
+           "tipo": "recibida" | "enviada", "estado": "...", "ambito": "interno" | "externo"}
+    (en lugar de desde/hasta se acepta "periodo" + "cantidad").
+    """
+    formato = request.data.get("formato", "xlsx")
+    if formato not in FORMATOS_REPORTE:
+        return Response({"error": f"Formato no soportado. Opciones: {', '.join(FORMATOS_REPORTE)}"}, status=status.HTTP_400_BAD_REQUEST)
+    if not formato_disponible(formato):
+        return Response({"error": f"El formato {formato} no está disponible en este servidor."}, status=status.HTTP_400_BAD_REQUEST)
+    filtros, error = _filtros_reporte(request.data)
+    if error:
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+    trabajo = crear_trabajo_reporte(request.user.id, formato, filtros)
+    generar_reporte_task.delay(trabajo["id"])
+    return Response({
+        "id": trabajo["id"],
+        "estado": trabajo["estado"],
+        "url_estado": reverse("estado_reporte", args=[trabajo["id"]]),
+    }, status=status.HTTP_202_ACCEPTED)
 
-            doc.estado,
 
-            doc.prioridad if hasattr(doc, 'prioridad') else "-",
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def estado_reporte(request, trabajo_id):
+    trabajo = _obtener_reporte_usuario(request, trabajo_id)
+    if not trabajo:
+        return Response({"error": "Reporte no encontrado o expirado."}, status=status.HTTP_404_NOT_FOUND)
+
+    payload = {k: trabajo.get(k) for k in ("id", "estado", "formato", "filtros", "creado", "terminado", "total", "procesadas", "error")}
+    if trabajo["total"]:
+        payload["progreso"] = round(100 * trabajo["procesadas"] / trabajo["total"], 1)
+    if trabajo["estado"] == "completado":
+        payload["url_descarga"] = reverse("descargar_reporte", args=[trabajo["id"]])
+    return Response(payload, status=status.HTTP_200_OK)
 
-            doc.ambito if hasattr(doc, 'ambito') else "-"
-        ])
 
-    # RESPUESTA
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def descargar_reporte(request, trabajo_id):
+    trabajo = _obtener_reporte_usuario(request, trabajo_id)
+    if not trabajo:
+        return Response({"error": "Reporte no encontrado o expirado."}, status=status.HTTP_404_NOT_FOUND)
+    if trabajo["estado"] != "completado":
+        return Response({"error": "El reporte aún no está listo.", "estado": trabajo["estado"]}, status=status.HTTP_409_CONFLICT)
 
-    response['Content-Disposition'] = (
-        'attachment; filename="reporte_correspondencia.xlsx"'
+    return FileResponse(
+        get_storage_reportes().open(trabajo["archivo"], "rb"),
+        as_attachment=True,
+        filename=trabajo["nombre_descarga"],
     )
-
-    wb.save(response)
-
-    return response
\ No newline at end of file
@@ -0,0 +1,112 @@
+#Caché de embeddings de consultas: LRU en memoria del proceso + Redis compartido entre workers.
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+
+from documento.busquedaSemantica.embeddings import generar_embedding
+from documento.redis_utils import get_redis_client
+from gestion_documental.ai.model_loader import get_model_id
+
+logger = logging.getLogger(__name__)
+
+_lru = OrderedDict()
+_lock = threading.Lock()
+_contadores = {"hits_memoria": 0, "hits_redis": 0, "misses": 0, "errores_redis": 0}
+
+
+def normalizar_consulta(texto):
+    # El tokenizer de MiniLM ya ignora mayúsculas y espacios repetidos
+    return " ".join((texto or "").lower().split())
+
+
+def _clave(texto_normalizado):
+    digest = hashlib.sha256(texto_normalizado.encode("utf-8")).hexdigest()
+    return f"emb_consulta:{get_model_id()}:{digest}"
+
+
+def _contar(nombre):
+    with _lock:
+        _contadores[nombre] += 1
+
+
+def _guardar_en_memoria(clave, vector):
+    with _lock:
+        _lru[clave] = vector
+        _lru.move_to_end(clave)
+        while len(_lru) > settings.EMBEDDINGS_CACHE_MAX_ITEMS:
+            _lru.popitem(last=False)
+
+
+def _leer_memoria(clave):
+    with _lock:
+        vector = _lru.get(clave)
+        if vector is not None:
+            _lru.move_to_end(clave)
+        return vector
+
+
+def _leer_redis(clave):
+    try:
+        contenido = get_redis_client().get(clave)
+    except Exception as exc:
+        _contar("errores_redis")
+        logger.warning("Caché Redis de embeddings no disponible: %s", exc)
+        return None
+    if not contenido:
+        return None
+    return np.frombuffer(contenido, dtype=np.float32)
+
+
+def _escribir_redis(clave, vector):
+    try:
+        get_redis_client().set(clave, vector.tobytes(), ex=settings.EMBEDDINGS_CACHE_TTL)
+    except Exception as exc:
+        _contar("errores_redis")
+        logger.warning("No se pudo guardar el embedding en Redis: %s", exc)
+
+
+def generar_embedding_consulta(texto):
+    """
+    Devuelve el embedding de una consulta de búsqueda, usando la caché si es posible.
+
+    Orden de búsqueda: LRU del proceso → Redis (float32 en bytes, con TTL) → modelo.
+    La clave es el texto normalizado más el id del modelo, así un cambio de
+    modelo o de max_seq_length no reutiliza vectores viejos.
+
+    Returns:
+        np.ndarray: Vector float32 de solo lectura
+    """
+    normalizado = normalizar_consulta(texto)
+    clave = _clave(normalizado)
+
+    vector = _leer_memoria(clave)
+    if vector is not None:
+        _contar("hits_memoria")
+        return vector
+
+    vector = _leer_redis(clave)
+    if vector is not None:
+        _contar("hits_redis")
+    else:
+        _contar("misses")
+        vector = np.asarray(generar_embedding(normalizado), dtype=np.float32)
+        _escribir_redis(clave, vector)
+
+    vector.setflags(write=False)
+    _guardar_en_memoria(clave, vector)
+    return vector
+
+
+def estadisticas_cache():
+    """Contadores de aciertos/fallos de este proceso y tamaño actual del LRU."""
+    with _lock:
+        return {**_contadores, "items_memoria": len(_lru)}
+
+
+def limpiar_cache_memoria():
+    with _lock:
+        _lru.clear()
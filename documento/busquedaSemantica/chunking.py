@@ -0,0 +1,109 @@
+#Divide el texto extraído en fragmentos (chunks) que respetan oraciones y el límite de tokens del modelo.
+import re
+from collections import deque, namedtuple
+
+from django.conf import settings
+from gestion_documental.ai.model_loader import get_max_seq_length, get_tokenizer
+
+# Un fragmento conoce su posición dentro del texto original (inicio/fin en caracteres)
+Fragmento = namedtuple("Fragmento", ["orden", "texto", "inicio", "fin"])
+
+# Una oración termina en . ! ? (el texto limpio ya viene sin saltos de línea)
+_ORACION = re.compile(r"[^.!?]+[.!?]*")
+_PALABRA = re.compile(r"\S+")
+
+# Tokens especiales ([CLS] y [SEP]) que el modelo agrega a cada secuencia
+_TOKENS_ESPECIALES = 2
+
+
+def _max_tokens_por_defecto():
+    if settings.CHUNK_MAX_TOKENS:
+        return settings.CHUNK_MAX_TOKENS
+    return get_max_seq_length() - _TOKENS_ESPECIALES
+
+
+def _offsets_tokens(texto, tokenizer):
+    """
+    Devuelve la posición (inicio, fin) de cada token dentro de `texto`.
+    Sin tokenizer rápido se aproxima con palabras separadas por espacios.
+    """
+    if tokenizer is not None and getattr(tokenizer, "is_fast", False):
+        codificado = tokenizer(
+            texto,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+        )
+        return codificado["offset_mapping"]
+    return [m.span() for m in _PALABRA.finditer(texto)]
+
+
+def _unidades(texto, tokenizer, tam_pieza):
+    """
+    Recorre el texto oración por oración y produce (inicio, fin, n_tokens).
+    Las oraciones más largas que `tam_pieza` se cortan en límites de token.
+    """
+    for oracion in _ORACION.finditer(texto):
+        inicio_oracion = oracion.start()
+        offsets = _offsets_tokens(oracion.group(), tokenizer)
+        if not offsets:
+            continue
+        for i in range(0, len(offsets), tam_pieza):
+            pieza = offsets[i:i + tam_pieza]
+            yield inicio_oracion + pieza[0][0], inicio_oracion + pieza[-1][1], len(pieza)
+
+
+def generar_fragmentos(texto, max_tokens=None, solapamiento=None, tokenizer=None):
+    """
+    Genera fragmentos de texto con ventana deslizante medida en tokens del modelo.
+
+    Los fragmentos se arman con oraciones completas hasta llenar `max_tokens`;
+    cada fragmento nuevo repite las últimas oraciones del anterior hasta
+    `solapamiento` tokens. Es un generador: solo se copia el fragmento que se
+    entrega, nunca el texto completo.
+
+    Args:
+        texto: Texto limpio a dividir
+        max_tokens: Tokens por fragmento (por defecto max_seq_length del modelo)
+        solapamiento: Tokens repetidos entre fragmentos consecutivos
+        tokenizer: Tokenizer a usar (por defecto el del modelo SBERT)
+
+    Yields:
+        Fragmento(orden, texto, inicio, fin)
+    """
+    if not texto:
+        return
+
+    max_tokens = max_tokens or _max_tokens_por_defecto()
+    if solapamiento is None:
+        solapamiento = settings.CHUNK_SOLAPAMIENTO_TOKENS
+    solapamiento = max(0, min(solapamiento, max_tokens - 1))
+    tokenizer = tokenizer or get_tokenizer()
+
+    # Las oraciones largas se cortan en piezas del tamaño del solapamiento,
+    # así el solapamiento también funciona dentro de una oración muy larga.
+    tam_pieza = solapamiento or max_tokens
+
+    ventana = deque()  # (inicio, fin, n_tokens)
+    tokens_ventana = 0
+    orden = 0
+
+    def _emitir():
+        inicio, fin = ventana[0][0], ventana[-1][1]
+        return Fragmento(orden, texto[inicio:fin], inicio, fin)
+
+    for unidad in _unidades(texto, tokenizer, tam_pieza):
+        if ventana and tokens_ventana + unidad[2] > max_tokens:
+            yield _emitir()
+            orden += 1
+            # Conservar solo la cola de la ventana que entra en el solapamiento
+            while ventana and (
+                tokens_ventana > solapamiento
+                or tokens_ventana + unidad[2] > max_tokens
+            ):
+                tokens_ventana -= ventana.popleft()[2]
+        ventana.append(unidad)
+        tokens_ventana += unidad[2]
+
+    if ventana:
+        yield _emitir()
@@ -1,8 +1,105 @@
+import logging
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
 from gestion_documental.ai.model_loader import get_model  # nuestro singleton SBERT
+from gestion_documental.ai.cliente_inferencia import codificar_remoto, ServicioInferenciaNoDisponible
+from documento.busquedaSemantica.chunking import generar_fragmentos
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 384  # all-MiniLM-L6-v2
+
+
+def _codificar(textos, batch_size):
+    """
+    Codifica una lista de textos con el servidor de inferencia si está configurado
+    (EMBEDDINGS_SERVICE_URL); si no, o si falla y se permite el fallback, con el modelo en proceso.
+    """
+    if settings.EMBEDDINGS_SERVICE_URL:
+        try:
+            return codificar_remoto(textos, settings.EMBEDDINGS_SERVICE_URL, timeout=settings.EMBEDDINGS_SERVICE_TIMEOUT)
+        except ServicioInferenciaNoDisponible as exc:
+            if not settings.EMBEDDINGS_SERVICE_FALLBACK:
+                raise
+            logger.warning("Servidor de inferencia no disponible, usando modelo local: %s", exc)
+
+    modelo = get_model()
+    return np.asarray(
+        modelo.encode(
+            textos,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        ),
+        dtype=np.float32,
+    )
+
 
 def generar_embedding(texto):
     """
     Genera un embedding para un texto usando el modelo SBERT único.
     """
-    modelo = get_model()
-    return modelo.encode(texto)
\ No newline at end of file
+    return _codificar([texto], batch_size=1)[0]
+
+
+def generar_embeddings_lote(textos, batch_size=None):
+    """
+    Genera los embeddings de varios textos en lotes y los devuelve en una sola matriz.
+
+    Cada lote es una única pasada por el modelo, en lugar de una llamada a
+    `encode` por texto. Los textos se consumen de forma perezosa, así que
+    `textos` puede ser un generador (por ejemplo el de chunking.generar_fragmentos)
+    y en memoria solo vive un lote de textos a la vez.
+
+    Args:
+        textos: Iterable de textos a codificar
+        batch_size: Textos por pasada del modelo (por defecto settings.EMBEDDINGS_BATCH_SIZE)
+
+    Returns:
+        np.ndarray: Matriz float32 de forma (n_textos, EMBEDDING_DIM)
+    """
+    batch_size = batch_size or settings.EMBEDDINGS_BATCH_SIZE
+    iterador = iter(textos)
+    lotes = []
+
+    while True:
+        lote = list(islice(iterador, batch_size))
+        if not lote:
+            break
+        lotes.append(_codificar(lote, batch_size))
+
+    if not lotes:
+        return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+    return np.vstack(lotes)
+
+
+def generar_embeddings_fragmentos(texto, max_tokens=None, solapamiento=None):
+    """
+    Divide el texto en fragmentos y genera el embedding de cada uno en lote.
+
+    Returns:
+        tuple: (spans, matriz) donde spans es la lista de (inicio, fin) de cada
+        fragmento dentro de `texto` y matriz tiene una fila por fragmento.
+    """
+    spans = []
+
+    def _textos():
+        for fragmento in generar_fragmentos(texto, max_tokens=max_tokens, solapamiento=solapamiento):
+            spans.append((fragmento.inicio, fragmento.fin))
+            yield fragmento.texto
+
+    matriz = generar_embeddings_lote(_textos())
+    return spans, matriz
+
+
+def vector_promedio(embeddings):
+    """
+    Vector del documento completo: promedio de los embeddings de sus fragmentos.
+    Sin fragmentos (texto vacío o solo espacios) devuelve None en vez del NaN de np.mean.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if not len(embeddings):
+        return None
+    return embeddings.mean(axis=0).tolist()
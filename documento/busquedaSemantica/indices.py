@@ -0,0 +1,80 @@
+#Índices ANN (pgvector) de los VectorField y parámetros de búsqueda por consulta.
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, transaction
+from pgvector.django import HnswIndex, IvfflatIndex
+
+
+def indices_vectoriales():
+    """
+    Devuelve (modelo, indice) de todos los índices HNSW/IVFFlat declarados en Meta.indexes.
+    """
+    encontrados = []
+    for modelo in apps.get_models():
+        for indice in modelo._meta.indexes:
+            if isinstance(indice, (HnswIndex, IvfflatIndex)):
+                encontrados.append((modelo, indice))
+    return encontrados
+
+
+def _acotar(valor, por_defecto, maximo):
+    try:
+        valor = int(valor)
+    except (TypeError, ValueError):
+        return por_defecto
+    return max(1, min(valor, maximo))
+
+
+def parametros_desde_request(request, filas=None):
+    """
+    Lee ?ef_search= y ?probes= de la petición, acotados por los máximos de settings.
+
+    HNSW devuelve como mucho ef_search vecinos: con `filas` (p. ej. página * tamaño de página)
+    ef_search sube al menos a ese valor, también acotado por PGVECTOR_HNSW_EF_SEARCH_MAX.
+    Más allá del máximo las páginas salen vacías salvo que PGVECTOR_HNSW_ITERATIVE_SCAN esté activo.
+    """
+    params = request.query_params if hasattr(request, "query_params") else request.GET
+    ef_search = _acotar(
+        params.get("ef_search"),
+        settings.PGVECTOR_HNSW_EF_SEARCH,
+        settings.PGVECTOR_HNSW_EF_SEARCH_MAX,
+    )
+    if filas:
+        ef_search = max(ef_search, min(filas, settings.PGVECTOR_HNSW_EF_SEARCH_MAX))
+    return {
+        "ef_search": ef_search,
+        "probes": _acotar(
+            params.get("probes"),
+            settings.PGVECTOR_IVFFLAT_PROBES,
+            settings.PGVECTOR_IVFFLAT_PROBES_MAX,
+        ),
+    }
+
+
+@contextmanager
+def parametros_busqueda_vectorial(ef_search=None, probes=None, using="default"):
+    """
+    Fija hnsw.ef_search e ivfflat.probes solo para las consultas dentro del bloque.
+
+    Usa set_config(..., true) (equivalente a SET LOCAL) dentro de una transacción,
+    así el valor no queda pegado a la conexión persistente (conn_max_age).
+    Los querysets son perezosos: deben evaluarse dentro del bloque.
+    """
+    ef_search = ef_search or settings.PGVECTOR_HNSW_EF_SEARCH
+    probes = probes or settings.PGVECTOR_IVFFLAT_PROBES
+
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('hnsw.ef_search', %s, true), set_config('ivfflat.probes', %s, true)",
+                [str(ef_search), str(probes)],
+            )
+            if settings.PGVECTOR_HNSW_ITERATIVE_SCAN:
+                # pgvector >= 0.8: si el filtro o el OFFSET agotan los ef_search candidatos, el índice sigue buscando
+                cursor.execute(
+                    "SELECT set_config('hnsw.iterative_scan', %s, true)",
+                    [settings.PGVECTOR_HNSW_ITERATIVE_SCAN],
+                )
+        yield
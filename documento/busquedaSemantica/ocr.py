@@ -1,8 +1,18 @@
+import logging
+import multiprocessing
 import os
+import threading
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import pytesseract
+from django.conf import settings
 from pdf2image import convert_from_path
 from pdf2image.exceptions import PDFInfoNotInstalledError
 
+logger = logging.getLogger(__name__)
+
 # Configurar Tesseract según entorno
 if os.name == "nt":  # Windows (local)
     pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
@@ -10,33 +20,159 @@ else:  # Linux (Railway)
     pytesseract.pytesseract.tesseract_cmd = "/usr/bin/tesseract"
 
 
-def extraer_texto_de_imagen(imagen, idioma="spa"):
-    return pytesseract.image_to_string(imagen, lang=idioma)
+class _EntornoTesseract(Mapping):
+    """
+    Entorno de cada proceso de tesseract: os.environ (leído en cada llamada) más OMP_THREAD_LIMIT=1.
+    Las páginas se procesan en paralelo (OCR_WORKERS), así que cada Tesseract usa un solo hilo;
+    si no, cada uno abre su pool de OpenMP y compiten por los mismos núcleos. Solo afecta al
+    subproceso: el entorno del worker (y p. ej. torch en el mismo proceso) no cambia.
+    """
+
+    def _entorno(self):
+        return {**os.environ, "OMP_THREAD_LIMIT": "1"}
+
+    def __getitem__(self, clave):
+        return self._entorno()[clave]
+
+    def __iter__(self):
+        return iter(self._entorno())
+
+    def __len__(self):
+        return len(self._entorno())
+
+
+# pytesseract lanza tesseract con env=pytesseract.pytesseract.environ (sirve igual con hilos o procesos)
+pytesseract.pytesseract.environ = _EntornoTesseract()
+
+# pypdfium2 no es thread-safe: con el pool de hilos el renderizado se serializa
+_PDFIUM_LOCK = threading.Lock()
+
+
+def extraer_texto_de_imagen(imagen, idioma="spa", timeout=0):
+    return pytesseract.image_to_string(imagen, lang=idioma, timeout=timeout)
+
+
+def extraer_capa_texto(ruta_pdf):
+    """
+    Lee la capa de texto nativa de cada página (PDFs generados digitalmente).
+    Las páginas escaneadas devuelven una cadena vacía o casi vacía.
+
+    Returns:
+        list[str]: Texto de cada página, en orden
+    """
+    import pypdfium2 as pdfium
+
+    textos = []
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(ruta_pdf)
+        try:
+            for pagina in pdf:
+                capa = pagina.get_textpage()
+                textos.append(capa.get_text_range())
+                capa.close()
+                pagina.close()
+        finally:
+            pdf.close()
+    return textos
+
 
+def necesita_ocr(texto_pagina):
+    """Una página con menos de OCR_MIN_CARACTERES_PAGINA caracteres visibles se considera escaneada."""
+    return len("".join(texto_pagina.split())) < settings.OCR_MIN_CARACTERES_PAGINA
 
-def extraer_texto_de_pdf(ruta_pdf, idioma="spa"):
+
+def _renderizar_pagina(ruta_pdf, numero, dpi, timeout):
+    """Renderiza una sola página (numerada desde 1) a imagen PIL."""
     try:
-        paginas = convert_from_path(
+        return convert_from_path(
             ruta_pdf,
-            first_page=1,
-            last_page=2
-        )
+            dpi=dpi,
+            first_page=numero,
+            last_page=numero,
+            timeout=timeout or None,
+        )[0]
     except PDFInfoNotInstalledError:
         import pypdfium2 as pdfium
 
-        pdf = pdfium.PdfDocument(ruta_pdf)
-        scale = 300 / 72
-        total_paginas = min(len(pdf), 2)
+        with _PDFIUM_LOCK:
+            pdf = pdfium.PdfDocument(ruta_pdf)
+            try:
+                return pdf[numero - 1].render(scale=dpi / 72).to_pil()
+            finally:
+                pdf.close()
+
+
+def _ocr_pagina(ruta_pdf, numero, idioma, dpi, timeout):
+    """
+    Renderiza y hace OCR de una página. Se ejecuta dentro del pool,
+    así cada página abre el PDF por su cuenta y no se pasan imágenes entre procesos.
+    """
+    try:
+        imagen = _renderizar_pagina(ruta_pdf, numero, dpi, timeout)
+        return extraer_texto_de_imagen(imagen, idioma, timeout=timeout)
+    except Exception as exc:
+        # Una página ilegible o que excede el timeout no debe perder el resto del documento
+        logger.warning("⚠️ OCR falló en página %s de %s: %s", numero, ruta_pdf, exc)
+        return ""
+
+
+def _ocr_en_pool(pool_cls, workers, ruta_pdf, numeros, argumentos):
+    with pool_cls(max_workers=workers) as pool:
+        futuros = [pool.submit(_ocr_pagina, ruta_pdf, n, *argumentos) for n in numeros]
+        # Se recogen en el orden de las páginas, no en el de terminación
+        return [futuro.result() for futuro in futuros]
+
+
+def _ocr_paginas(ruta_pdf, numeros, idioma):
+    """OCR de las páginas indicadas (numeradas desde 1), en paralelo. Devuelve los textos en el mismo orden."""
+    argumentos = (idioma, settings.OCR_DPI, settings.OCR_TIMEOUT_PAGINA)
+    workers = max(1, min(settings.OCR_WORKERS, len(numeros)))
+
+    if workers == 1:
+        return [_ocr_pagina(ruta_pdf, n, *argumentos) for n in numeros]
+    if multiprocessing.current_process().daemon:
+        # Los procesos daemon (p. ej. workers prefork de Celery) no pueden tener hijos.
+        # Los hilos igual paralelizan: Tesseract y pdftoppm corren como procesos externos.
+        return _ocr_en_pool(ThreadPoolExecutor, workers, ruta_pdf, numeros, argumentos)
+    try:
+        return _ocr_en_pool(ProcessPoolExecutor, workers, ruta_pdf, numeros, argumentos)
+    except (AssertionError, BrokenProcessPool) as exc:
+        logger.warning("⚠️ Pool de procesos no disponible (%s), usando hilos", exc)
+        return _ocr_en_pool(ThreadPoolExecutor, workers, ruta_pdf, numeros, argumentos)
+
+
+def extraer_texto_de_pdf(ruta_pdf, idioma="spa", max_paginas=None):
+    """
+    Extrae el texto de un PDF. Primero lee la capa de texto nativa y solo
+    rasteriza y hace OCR (en paralelo) de las páginas que no la tienen.
+
+    Args:
+        ruta_pdf: Ruta del PDF
+        idioma: Idioma de Tesseract
+        max_paginas: Máximo de páginas a las que se hace OCR (por defecto OCR_MAX_PAGINAS; 0 = todas)
+
+    Returns:
+        str: Texto de las páginas en orden, separado por "--- Pagina N ---"
+    """
+    if max_paginas is None:
+        max_paginas = settings.OCR_MAX_PAGINAS
+
+    textos = extraer_capa_texto(ruta_pdf)
+    paginas_ocr = [i + 1 for i, texto in enumerate(textos) if necesita_ocr(texto)]
+    if max_paginas and len(paginas_ocr) > max_paginas:
+        # Las páginas escaneadas que pasan el límite quedan sin texto
+        for numero in paginas_ocr[max_paginas:]:
+            textos[numero - 1] = ""
+        paginas_ocr = paginas_ocr[:max_paginas]
 
-        paginas = [
-            pdf[i].render(scale=scale).to_pil()
-            for i in range(total_paginas)
-        ]
+    if paginas_ocr:
+        logger.info("🔍 OCR de %s/%s páginas de %s", len(paginas_ocr), len(textos), ruta_pdf)
+        for numero, texto in zip(paginas_ocr, _ocr_paginas(ruta_pdf, paginas_ocr, idioma)):
+            textos[numero - 1] = texto
 
     texto_completo = ""
 
-    for i, pagina in enumerate(paginas, start=1):
-        texto_pagina = extraer_texto_de_imagen(pagina, idioma)
+    for i, texto_pagina in enumerate(textos, start=1):
         texto_completo += f"\n--- Pagina {i} ---\n{texto_pagina}"
 
-    return texto_completo
\ No newline at end of file
+    return texto_completo
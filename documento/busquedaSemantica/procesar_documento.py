@@ -9,7 +9,7 @@ def procesar_documento(nombre_documento: str, redis_key: str, async_processing:
     
     Args:
         nombre_documento: Nombre del documento a procesar
-        redis_key: Clave en Redis donde está el archivo
+        redis_key: Referencia de traspaso del archivo (ver traspaso_archivos.py)
     """
     if async_processing:
         # Versión asíncrona usando Celery
@@ -21,41 +21,36 @@ def procesar_documento(nombre_documento: str, redis_key: str, async_processing:
         ).apply_async()
     # Reemplaza todo el bloque else:
     else:
-        # Versión síncrona usando Redis
+        # Versión síncrona: abre el archivo desde su referencia de traspaso
         from documento.models import Documento
-        from documento.redis_utils import obtener_archivo_redis, limpiar_archivo_temporal
+        from documento.traspaso_archivos import abrir_referencia, liberar_referencia
         from documento.busquedaSemantica.ocr import extraer_texto_de_imagen, extraer_texto_de_pdf
         from documento.busquedaSemantica.clean_text import limpiar_texto_ocr
-        from documento.busquedaSemantica.embeddings import generar_embedding
+        from documento.busquedaSemantica.embeddings import generar_embeddings_fragmentos, vector_promedio
         from PIL import Image
         
         doc = Documento.objects.get(nombre_documento=nombre_documento)
-        ruta_temporal = obtener_archivo_redis(redis_key)
         
-        if not ruta_temporal:
-            raise ValueError("No se pudo crear archivo temporal desde Redis")
-        
-        try:
+        with abrir_referencia(redis_key) as ruta_archivo:
             # 1️⃣ OCR
-            ext = os.path.splitext(ruta_temporal)[1].lower()
+            ext = os.path.splitext(ruta_archivo)[1].lower()
             if ext in (".png", ".jpg", ".jpeg"):
-                imagen = Image.open(ruta_temporal)
+                imagen = Image.open(ruta_archivo)
                 texto = extraer_texto_de_imagen(imagen)
             elif ext == ".pdf":
-                texto = extraer_texto_de_pdf(ruta_temporal)
+                texto = extraer_texto_de_pdf(ruta_archivo)
             else:
                 raise ValueError(f"Formato no soportado: {ext}")
+        liberar_referencia(redis_key)
 
-            # 2️⃣ Limpieza
-            texto_limpio = limpiar_texto_ocr(texto)
-            
-            # 3️⃣ Generar embeddings
-            embedding = generar_embedding(texto_limpio)
-            
-            # 4️⃣ Guardar en BD
-            doc.contenido_extraido = texto_limpio
-            doc.vector_embedding = embedding.tolist() if hasattr(embedding, "tolist") else embedding
-            doc.save(update_fields=["contenido_extraido", "vector_embedding"])
-            
-        finally:
-            limpiar_archivo_temporal(ruta_temporal)
\ No newline at end of file
+        # 2️⃣ Limpieza
+        texto_limpio = limpiar_texto_ocr(texto)
+        
+        # 3️⃣ Generar embeddings (mismos chunks que embeddings_task, codificados en lote)
+        spans, embeddings = generar_embeddings_fragmentos(texto_limpio)
+        
+        # 4️⃣ Guardar en BD
+        doc.contenido_extraido = texto_limpio
+        doc.vector_embedding = vector_promedio(embeddings)
+        doc.save(update_fields=["contenido_extraido", "vector_embedding"])
+        doc.guardar_chunks(spans, embeddings)
@@ -0,0 +1,110 @@
+#Regenera los embeddings de filas ya guardadas (documentos y correspondencia elaborada) por lotes.
+#Lo usan el comando reindex_embeddings y la tarea reindexar_lote_task.
+from itertools import islice
+
+from django.db import transaction
+
+from documento.busquedaSemantica.chunking import generar_fragmentos
+from documento.busquedaSemantica.embeddings import generar_embeddings_lote
+
+FUENTES = ("documentos", "elaboradas")
+
+
+def queryset_fuente(fuente, desde_id=None):
+    """Filas a reindexar de la fuente, ordenadas por pk para poder reanudar con `desde_id`."""
+    if fuente == "documentos":
+        from documento.models import Documento
+        qs = Documento.objects.filter(contenido_extraido__isnull=False).exclude(contenido_extraido="")
+    elif fuente == "elaboradas":
+        from correspondencia.models import CorrespondenciaElaborada
+        qs = CorrespondenciaElaborada.objects.all()
+    else:
+        raise ValueError(f"Fuente desconocida: {fuente}. Opciones: {', '.join(FUENTES)}")
+    if desde_id:
+        qs = qs.filter(pk__gte=desde_id)
+    return qs.order_by("pk")
+
+
+def lotes_de_ids(fuente, tamano_lote, desde_id=None, chunk_size=2000):
+    """
+    Recorre los pk de la fuente con un cursor del lado del servidor
+    (iterator) y los entrega en listas de `tamano_lote`.
+    """
+    ids = queryset_fuente(fuente, desde_id).values_list("pk", flat=True).iterator(chunk_size=chunk_size)
+    while True:
+        lote = list(islice(ids, tamano_lote))
+        if not lote:
+            return
+        yield lote
+
+
+def reindexar_documentos(ids):
+    """
+    Vuelve a fragmentar y codificar el texto ya extraído de los documentos (sin OCR).
+    Todos los fragmentos del lote se codifican juntos y los chunks se reemplazan en bloque.
+    """
+    from documento.models import Documento, DocumentoChunk
+
+    documentos = list(Documento.objects.filter(pk__in=ids).only("pk", "contenido_extraido"))
+    spans_por_doc = []
+
+    def _textos():
+        for doc in documentos:
+            spans = []
+            for fragmento in generar_fragmentos(doc.contenido_extraido):
+                spans.append((fragmento.inicio, fragmento.fin))
+                yield fragmento.texto
+            spans_por_doc.append(spans)
+
+    matriz = generar_embeddings_lote(_textos())
+
+    chunks = []
+    inicio_fila = 0
+    for doc, spans in zip(documentos, spans_por_doc):
+        vectores = matriz[inicio_fila:inicio_fila + len(spans)]
+        inicio_fila += len(spans)
+        doc.vector_embedding = vectores.mean(axis=0).tolist() if len(vectores) else None
+        chunks.extend(
+            DocumentoChunk(documento=doc, orden=orden, inicio=inicio, fin=fin, vector_embedding=list(vector))
+            for orden, ((inicio, fin), vector) in enumerate(zip(spans, vectores))
+        )
+
+    with transaction.atomic():
+        Documento.objects.bulk_update(documentos, ["vector_embedding"], batch_size=500)
+        DocumentoChunk.objects.filter(documento__in=documentos).delete()
+        DocumentoChunk.objects.bulk_create(chunks, batch_size=500)
+    return len(documentos)
+
+
+def reindexar_elaboradas(ids):
+    """Recalcula vector_embedding_html con el mismo texto semántico que generar_embedding_html_task."""
+    from correspondencia.models import CorrespondenciaElaborada, _build_semantic_text, _semantic_fingerprint
+
+    elaboradas = []
+    textos = []
+    for doc in CorrespondenciaElaborada.objects.filter(pk__in=ids):
+        texto = _build_semantic_text(doc)
+        huella = _semantic_fingerprint(texto)
+        # Mismo texto y mismo modelo: el vector guardado sigue vigente
+        if not texto or (huella == doc.huella_semantica and doc.vector_embedding_html is not None):
+            continue
+        doc.huella_semantica = huella
+        elaboradas.append(doc)
+        textos.append(texto)
+
+    for doc, vector in zip(elaboradas, generar_embeddings_lote(textos)):
+        doc.vector_embedding_html = vector.tolist()
+    # bulk_update no llama a save(): no se regenera el HTML ni se encolan tareas por fila
+    CorrespondenciaElaborada.objects.bulk_update(
+        elaboradas, ["vector_embedding_html", "huella_semantica"], batch_size=500
+    )
+    return len(elaboradas)
+
+
+def reindexar_lote(fuente, ids):
+    """Reindexa un lote de pk de la fuente. Devuelve cuántas filas se actualizaron."""
+    if fuente == "documentos":
+        return reindexar_documentos(ids)
+    if fuente == "elaboradas":
+        return reindexar_elaboradas(ids)
+    raise ValueError(f"Fuente desconocida: {fuente}. Opciones: {', '.join(FUENTES)}")
@@ -0,0 +1,69 @@
+#Comando para regenerar los embeddings de filas existentes (backfill o cambio de modelo).
+#Uso: python manage.py reindex_embeddings --fuente documentos --lote 64 [--desde-id 1200] [--max-por-segundo 50] [--dry-run] [--celery]
+import time
+
+from celery import chord, group
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from documento.busquedaSemantica.reindexado import FUENTES, lotes_de_ids, queryset_fuente, reindexar_lote
+
+
+class Command(BaseCommand):
+    help = "Regenera los embeddings de documentos y correspondencia elaborada por lotes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fuente", action="append", dest="fuentes", choices=FUENTES,
+            help="Qué reindexar (repetible). Por defecto todas.",
+        )
+        parser.add_argument("--lote", type=int, default=64, help="Filas por lote (una pasada del modelo y un bulk_update)")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Filas por lectura del cursor del servidor")
+        parser.add_argument("--desde-id", type=int, help="Reanudar desde este pk (inclusive)")
+        parser.add_argument("--max-por-segundo", type=float, default=0, help="Límite de filas por segundo (0 = sin límite)")
+        parser.add_argument("--dry-run", action="store_true", help="Solo cuenta filas y lotes, no escribe nada")
+        parser.add_argument("--celery", action="store_true", help="Reparte los lotes entre los workers de Celery")
+
+    def handle(self, *args, **options):
+        for fuente in options["fuentes"] or FUENTES:
+            if options["dry_run"]:
+                total = queryset_fuente(fuente, options["desde_id"]).count()
+                lotes = -(-total // options["lote"])
+                self.stdout.write(f"🔎 {fuente}: {total} filas en {lotes} lotes (dry-run, sin cambios)")
+                continue
+
+            lotes = lotes_de_ids(fuente, options["lote"], options["desde_id"], options["chunk_size"])
+            if options["celery"]:
+                self._encolar(fuente, lotes)
+            else:
+                self._procesar(fuente, lotes, options["max_por_segundo"])
+
+    def _procesar(self, fuente, lotes, max_por_segundo):
+        total = 0
+        inicio = time.monotonic()
+        for ids in lotes:
+            total += reindexar_lote(fuente, ids)
+            # El último id permite reanudar con --desde-id si el comando se interrumpe
+            self.stdout.write(f"🔄 {fuente}: {total} filas, último id {ids[-1]}")
+            if max_por_segundo:
+                # Dormir lo necesario para no superar el ritmo pedido
+                espera = total / max_por_segundo - (time.monotonic() - inicio)
+                if espera > 0:
+                    time.sleep(espera)
+        self.stdout.write(self.style.SUCCESS(f"✅ {fuente}: {total} filas reindexadas en {time.monotonic() - inicio:.1f} seg"))
+
+    def _encolar(self, fuente, lotes):
+        from documento.tasks import reindexar_lote_task, resumen_reindexado_task
+
+        tareas = group(reindexar_lote_task.s(fuente, ids) for ids in lotes)
+        if not tareas.tasks:
+            self.stdout.write(f"ℹ️ {fuente}: nada que reindexar")
+            return
+
+        # El chord necesita un result backend para saber cuándo terminaron todos los lotes
+        if settings.CELERY_RESULT_BACKEND:
+            chord(tareas)(resumen_reindexado_task.s(fuente))
+        else:
+            self.stdout.write(self.style.WARNING("⚠️ Sin CELERY_RESULT_BACKEND: se encola un group sin resumen final"))
+            tareas.apply_async()
+        self.stdout.write(self.style.SUCCESS(f"✅ {fuente}: {len(tareas.tasks)} lotes encolados"))
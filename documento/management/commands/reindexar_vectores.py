@@ -0,0 +1,81 @@
+#Comando para reindexar o reconstruir los índices vectoriales (HNSW/IVFFlat) sin bloquear escrituras.
+#Uso: python manage.py reindexar_vectores [--reconstruir --tipo ivfflat --lists 200]
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from documento.busquedaSemantica.indices import indices_vectoriales
+
+
+class Command(BaseCommand):
+    help = "Reindexa (REINDEX CONCURRENTLY) o reconstruye los índices vectoriales HNSW/IVFFlat"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--indice", action="append", dest="indices",
+            help="Nombre del índice a procesar (repetible). Por defecto todos.",
+        )
+        parser.add_argument(
+            "--reconstruir", action="store_true",
+            help="Crea un índice nuevo con CREATE INDEX CONCURRENTLY y reemplaza al actual.",
+        )
+        parser.add_argument("--tipo", choices=["hnsw", "ivfflat"], default="hnsw")
+        parser.add_argument("--m", type=int, default=16, help="HNSW: conexiones por nodo")
+        parser.add_argument("--ef-construction", type=int, default=64, help="HNSW: candidatos al construir")
+        parser.add_argument("--lists", type=int, help="IVFFlat: listas (por defecto filas/1000, mínimo 10)")
+        parser.add_argument(
+            "--maintenance-work-mem", default="512MB",
+            help="Memoria para construir el índice (SET maintenance_work_mem)",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Los índices vectoriales requieren PostgreSQL con pgvector")
+
+        indices = indices_vectoriales()
+        if options["indices"]:
+            indices = [(m, i) for m, i in indices if i.name in options["indices"]]
+            if not indices:
+                raise CommandError(f"No se encontraron los índices: {', '.join(options['indices'])}")
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('maintenance_work_mem', %s, false)", [options["maintenance_work_mem"]])
+
+        for modelo, indice in indices:
+            if options["reconstruir"]:
+                self._reconstruir(modelo, indice, options)
+            else:
+                self.stdout.write(f"🔄 REINDEX CONCURRENTLY {indice.name}")
+                with connection.cursor() as cursor:
+                    cursor.execute(f"REINDEX INDEX CONCURRENTLY {connection.ops.quote_name(indice.name)}")
+            self.stdout.write(self.style.SUCCESS(f"✅ {indice.name} listo"))
+
+    def _reconstruir(self, modelo, indice, options):
+        qn = connection.ops.quote_name
+        tabla = modelo._meta.db_table
+        columna = modelo._meta.get_field(indice.fields[0]).column
+        temporal = f"{indice.name}_nuevo"[:63]
+
+        if options["tipo"] == "hnsw":
+            with_params = f"m = {options['m']}, ef_construction = {options['ef_construction']}"
+        else:
+            lists = options["lists"] or self._lists_por_defecto(tabla)
+            with_params = f"lists = {lists}"
+
+        self.stdout.write(f"🏗️ Construyendo {options['tipo']} ({with_params}) sobre {tabla}.{columna}")
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {qn(temporal)}")
+            cursor.execute(
+                f"CREATE INDEX CONCURRENTLY {qn(temporal)} ON {qn(tabla)} "
+                f"USING {options['tipo']} ({qn(columna)} vector_cosine_ops) WITH ({with_params})"
+            )
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {qn(indice.name)}")
+            cursor.execute(f"ALTER INDEX {qn(temporal)} RENAME TO {qn(indice.name)}")
+
+    @staticmethod
+    def _lists_por_defecto(tabla):
+        # Recomendación de pgvector: filas / 1000 hasta 1M de filas
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [tabla])
+            fila = cursor.fetchone()
+        filas = fila[0] if fila and fila[0] > 0 else 0
+        return max(10, filas // 1000)
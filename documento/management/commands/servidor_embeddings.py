@@ -0,0 +1,32 @@
+#Levanta el servidor local de inferencia que carga el modelo SBERT una sola vez.
+#Uso: python manage.py servidor_embeddings --direccion unix:///tmp/embeddings.sock
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from gestion_documental.ai.servicio_inferencia import crear_servidor
+
+
+class Command(BaseCommand):
+    help = "Servidor de embeddings (HTTP o socket Unix) con micro-batching de peticiones concurrentes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--direccion", default=settings.EMBEDDINGS_SERVICE_URL or "http://127.0.0.1:8765",
+            help='"unix:///ruta.sock" o "http://host:puerto" (por defecto EMBEDDINGS_SERVICE_URL)',
+        )
+        parser.add_argument("--max-lote", type=int, default=settings.EMBEDDINGS_SERVICE_MAX_LOTE)
+        parser.add_argument("--espera-ms", type=int, default=settings.EMBEDDINGS_SERVICE_ESPERA_MS)
+
+    def handle(self, *args, **options):
+        servidor = crear_servidor(
+            options["direccion"],
+            max_lote=options["max_lote"],
+            espera_ms=options["espera_ms"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"🧠 Servidor de embeddings escuchando en {options['direccion']}"))
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 10:37
+
+import django.db.models.deletion
+import pgvector.django.indexes
+import pgvector.django.vector
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documento', '0006_remove_documento_archivo_data_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('orden', models.PositiveIntegerField()),
+                ('inicio', models.PositiveIntegerField()),
+                ('fin', models.PositiveIntegerField()),
+                ('vector_embedding', pgvector.django.vector.VectorField(dimensions=384)),
+                ('documento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='documento.documento')),
+            ],
+            options={
+                'ordering': ['documento', 'orden'],
+                'indexes': [pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['vector_embedding'], m=16, name='documento_chunk_hnsw_idx', opclasses=['vector_cosine_ops'])],
+                'constraints': [models.UniqueConstraint(fields=('documento', 'orden'), name='unique_chunk_documento_orden')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 10:38
+
+import pgvector.django.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ('documento', '0007_documentochunk'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='documento',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['vector_embedding'], m=16, name='documento_vector_hnsw_idx', opclasses=['vector_cosine_ops']),
+        ),
+    ]
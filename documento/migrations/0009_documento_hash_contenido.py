@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documento', '0008_documento_vector_hnsw_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documento',
+            name='hash_contenido',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction
+import hashlib
 import os
-from pgvector.django import VectorField
+from pgvector.django import VectorField, HnswIndex
 
 def ruta_archivo(instance, filename):
     tipo = instance.correspondencia.tipo if instance.correspondencia else 'otros'
@@ -12,39 +13,149 @@ def ruta_archivo(instance, filename):
     anio = instance.correspondencia.fecha_registro.year if instance.correspondencia and instance.correspondencia.fecha_registro else "sin_fecha"
     return os.path.join('documentos', sindicato, tipo, str(anio), filename)
 
+
+
+def calcular_hash_archivo(archivo):
+    """SHA-256 del contenido del archivo, leído por bloques (no carga el archivo completo en memoria)."""
+    sha = hashlib.sha256()
+    for bloque in archivo.chunks():
+        sha.update(bloque)
+    return sha.hexdigest()
+
     
 class Documento(models.Model):
     id_documento = models.AutoField(primary_key=True)
     nombre_documento = models.CharField(max_length=255, blank=True)
     archivo = models.FileField(upload_to=ruta_archivo, blank=True, null=True)
-    archivo_redis_key = models.CharField(max_length=255, null=True, blank=True)
+    archivo_redis_key = models.CharField(max_length=255, null=True, blank=True)  # Referencia de traspaso a los workers de OCR
     fecha_subida = models.DateTimeField(auto_now_add=True)
     correspondencia = models.ForeignKey('correspondencia.Correspondencia', on_delete=models.CASCADE, related_name='documentos') 
     vector_embedding = VectorField(dimensions=384, null=True, blank=True)  # Usa 384 o 768 según tu modelo
     contenido_extraido = models.TextField(blank=True, null=True)  # ← Texto plano del PDF
+    hash_contenido = models.CharField(max_length=64, null=True, blank=True, db_index=True)  # SHA-256 del archivo
+
+    class Meta:
+        indexes = [
+            # Índice ANN por distancia coseno para las búsquedas con CosineDistance
+            HnswIndex(
+                name='documento_vector_hnsw_idx',
+                fields=['vector_embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops'],
+            ),
+        ]
     
     def save(self, *args, **kwargs):
+        # El hash se calcula antes del primer guardado: con él se detectan archivos repetidos
+        if self.archivo and not self.hash_contenido:
+            self.hash_contenido = calcular_hash_archivo(self.archivo)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'hash_contenido'}
+
     # Primero guardar el modelo para obtener ID
         super().save(*args, **kwargs)
-        
-        # Guardar archivo en Redis si existe y no está guardado
+
+        # Mismo archivo ya procesado (p. ej. una circular adjunta a varias correspondencias):
+        # se copian texto, vector y chunks sin pasar por Redis ni por la cadena de Celery
+        if self.hash_contenido and not self.contenido_extraido:
+            origen = self.buscar_procesado_por_hash()
+            if origen:
+                self.reutilizar_resultados(origen)
+                print(f"♻️ Documento duplicado, resultados reutilizados de #{origen.pk}: {self.nombre_documento}")
+                return
+
+        # Dejar el archivo disponible para los workers (Redis o disco compartido) si no lo está
         if self.archivo and not self.archivo_redis_key:
             redis_key = f"documento_{self.id_documento}_{self.nombre_documento}"
-            from documento.redis_utils import guardar_archivo_redis
-            guardar_archivo_redis(self.archivo, redis_key)
-            self.archivo_redis_key = redis_key
+            from documento.traspaso_archivos import entregar_archivo
+            self.archivo_redis_key = entregar_archivo(self.archivo, redis_key)
             # Guardar nuevamente para actualizar el campo redis_key
             super().save(update_fields=['archivo_redis_key'])
-            print(f"✅ Archivo guardado en Redis: {redis_key}")
+            print(f"✅ Archivo entregado a los workers: {self.archivo_redis_key}")
 
-        # Procesar OCR si hay archivo en Redis y no está procesado
+        # Procesar OCR si el archivo fue entregado y no está procesado
         if self.archivo_redis_key and not self.contenido_extraido:
-            print(f"🚀 Procesando OCR desde Redis: {self.archivo_redis_key}")
+            print(f"🚀 Procesando OCR: {self.archivo_redis_key}")
             from documento.busquedaSemantica.procesar_documento import procesar_documento
             procesar_documento(self.nombre_documento, self.archivo_redis_key, async_processing=True)
         elif self.archivo_redis_key and self.contenido_extraido:
                 print(f"ℹ️ Documento ya procesado: {self.nombre_documento}")
 
+    def buscar_procesado_por_hash(self):
+        """Otro documento con el mismo contenido que ya tenga texto extraído, o None."""
+        return (
+            Documento.objects
+            .filter(hash_contenido=self.hash_contenido, contenido_extraido__isnull=False)
+            .exclude(pk=self.pk)
+            .order_by('pk')
+            .first()
+        )
+
+    def reutilizar_resultados(self, origen):
+        """Copia texto extraído, vector y chunks de `origen` (mismo hash_contenido)."""
+        self.contenido_extraido = origen.contenido_extraido
+        self.vector_embedding = origen.vector_embedding
+        chunks = list(origen.chunks.values_list('inicio', 'fin', 'vector_embedding'))
+        with transaction.atomic():
+            super().save(update_fields=['contenido_extraido', 'vector_embedding'])
+            self.guardar_chunks(
+                [(inicio, fin) for inicio, fin, _ in chunks],
+                [vector for _, _, vector in chunks],
+            )
+
+    def guardar_chunks(self, spans, embeddings):
+        """
+        Reemplaza los chunks del documento por los nuevos fragmentos.
+
+        Args:
+            spans: Lista de (inicio, fin) de cada fragmento dentro de contenido_extraido
+            embeddings: Vectores de cada fragmento, en el mismo orden que spans
+        """
+        with transaction.atomic():
+            self.chunks.all().delete()
+            DocumentoChunk.objects.bulk_create(
+                [
+                    DocumentoChunk(
+                        documento=self,
+                        orden=orden,
+                        inicio=inicio,
+                        fin=fin,
+                        vector_embedding=list(embedding),
+                    )
+                    for orden, ((inicio, fin), embedding) in enumerate(zip(spans, embeddings))
+                ],
+                batch_size=500,
+            )
+
+
+class DocumentoChunk(models.Model):
+    # Fragmento del texto extraído con su propio vector, para búsqueda por pasajes
+    documento = models.ForeignKey(Documento, on_delete=models.CASCADE, related_name='chunks')
+    orden = models.PositiveIntegerField()
+    inicio = models.PositiveIntegerField()  # Posición en contenido_extraido (caracteres)
+    fin = models.PositiveIntegerField()
+    vector_embedding = VectorField(dimensions=384)
+
+    class Meta:
+        ordering = ['documento', 'orden']
+        constraints = [
+            models.UniqueConstraint(fields=['documento', 'orden'], name='unique_chunk_documento_orden')
+        ]
+        indexes = [
+            # Índice ANN por distancia coseno (misma métrica que CosineDistance)
+            HnswIndex(
+                name='documento_chunk_hnsw_idx',
+                fields=['vector_embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops'],
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.documento.nombre_documento} #{self.orden}"
+
 TIPO_DOCUMENTO_CHOICES = [
     ('comunicado', 'Comunicado'),
     ('convocatoria', 'Convocatoria'),
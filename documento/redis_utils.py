@@ -1,57 +1,86 @@
 import redis
-import tempfile
 import os
+import threading
 from django.conf import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+class PoolConMetricas(redis.BlockingConnectionPool):
+    """
+    Pool de conexiones compartido por el proceso. Si se agotan las conexiones
+    espera hasta `timeout` en vez de fallar, y cuenta su uso para estadisticas_redis().
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._lock_metricas = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def reset(self):
+        # También se llama tras un fork: el proceso hijo empieza con contadores propios
+        self.metricas = {"prestamos": 0, "en_uso": 0, "max_en_uso": 0, "errores": 0}
+        super().reset()
+
+    def get_connection(self, *args, **kwargs):
+        try:
+            conexion = super().get_connection(*args, **kwargs)
+        except redis.RedisError:
+            with self._lock_metricas:
+                self.metricas["errores"] += 1
+            raise
+        with self._lock_metricas:
+            self.metricas["prestamos"] += 1
+            self.metricas["en_uso"] += 1
+            self.metricas["max_en_uso"] = max(self.metricas["max_en_uso"], self.metricas["en_uso"])
+        return conexion
+
+    def release(self, connection):
+        with self._lock_metricas:
+            self.metricas["en_uso"] = max(0, self.metricas["en_uso"] - 1)
+        super().release(connection)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_redis_pool():
+    """Pool único por proceso, con la misma URL y límites que el broker de Celery."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                logger.info(f"Creando pool de Redis: {settings.REDIS_URL}")
+                _pool = PoolConMetricas.from_url(
+                    settings.REDIS_URL,
+                    max_connections=settings.REDIS_MAX_CONEXIONES,
+                    timeout=settings.REDIS_SOCKET_TIMEOUT,
+                    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+                    retry_on_timeout=True,
+                    decode_responses=False,
+                )
+    return _pool
+
+
 def get_redis_client():
-    """Obtener cliente Redis configurado para Railway"""
-    redis_url = settings.REDIS_URL
-    logger.info(f"Conectando a Redis: {redis_url}")
-    return redis.from_url(redis_url, decode_responses=False)
+    """Cliente Redis sobre el pool del proceso (no abre una conexión nueva por llamada)"""
+    return redis.Redis(connection_pool=get_redis_pool())
 
-def guardar_archivo_redis(archivo, key):
-    """Guardar archivo en Redis"""
-    try:
-        client = get_redis_client()
-        archivo.seek(0)
-        contenido = archivo.read()
-        
-        # Guardar en Redis con TTL de 1 hora
-        client.set(key, contenido)
-        client.expire(key, 3600)
-        
-        logger.info(f"✅ Archivo guardado en Redis: {key} (tamaño: {len(contenido)} bytes)")
-        return key
-        
-    except Exception as e:
-        logger.error(f"❌ Error guardando archivo en Redis: {str(e)}")
-        raise
 
-def obtener_archivo_redis(key):
-    """Obtener archivo desde Redis"""
-    try:
-        client = get_redis_client()
-        contenido = client.get(key)
-        
-        if not contenido:
-            logger.error(f"❌ Archivo no encontrado en Redis: {key}")
-            return None
-        
-        # Crear archivo temporal
-        ext = os.path.splitext(key)[1].lower() or '.pdf'
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=ext)
-        temp_file.write(contenido)
-        temp_file.close()
-        
-        logger.info(f"✅ Archivo temporal creado desde Redis: {temp_file.name}")
-        return temp_file.name
-        
-    except Exception as e:
-        logger.error(f"❌ Error obteniendo archivo desde Redis: {str(e)}")
-        return None
+def estadisticas_redis():
+    """Uso del pool de Redis de este proceso."""
+    if _pool is None:
+        return {"max_conexiones": settings.REDIS_MAX_CONEXIONES, "creadas": 0, "prestamos": 0,
+                "en_uso": 0, "max_en_uso": 0, "errores": 0}
+    with _pool._lock_metricas:
+        return {
+            "max_conexiones": _pool.max_connections,
+            "creadas": len(_pool._connections),
+            **_pool.metricas,
+        }
 
 def limpiar_archivo_temporal(ruta_temporal):
     """Eliminar archivo temporal"""
@@ -4,8 +4,9 @@ from celery import shared_task
 from celery.utils.log import get_task_logger
 from documento.busquedaSemantica.ocr import extraer_texto_de_pdf, extraer_texto_de_imagen
 from documento.busquedaSemantica.clean_text import limpiar_texto_ocr
-from documento.busquedaSemantica.embeddings import generar_embedding
+from documento.busquedaSemantica.embeddings import generar_embeddings_fragmentos, vector_promedio
 from documento.models import Documento
+from django.db import transaction
 from PIL import Image
 import os
 import time
@@ -21,40 +22,41 @@ logger = get_task_logger(__name__)
 # -----------------------
 @shared_task(bind=True)
 def ocr_task(self, nombre_documento, redis_key):
-    """Procesar OCR desde Redis storage"""
-    from documento.redis_utils import obtener_archivo_redis, limpiar_archivo_temporal
+    """Procesar OCR del archivo indicado por la referencia de traspaso (ver traspaso_archivos.py)"""
+    from documento.traspaso_archivos import abrir_referencia, liberar_referencia
     
-    print(f"🔍 Redis key recibida: {redis_key}")
+    print(f"🔍 Referencia recibida: {redis_key}")
     
-    # Obtener archivo desde Redis
-    ruta_temporal = obtener_archivo_redis(redis_key)
-    
-    if not ruta_temporal:
-        raise ValueError(f"No se pudo obtener archivo desde Redis: {redis_key}")
-    
-    try:
-        print(f"🔍 Archivo temporal: {ruta_temporal}")
-        print(f"🔍 Existe archivo: {os.path.exists(ruta_temporal)}")
+    with abrir_referencia(redis_key) as ruta_archivo:
+        print(f"🔍 Archivo: {ruta_archivo}")
         
         # Procesar OCR
-        ext = os.path.splitext(ruta_temporal)[1].lower()
+        ext = os.path.splitext(ruta_archivo)[1].lower()
         if ext in (".png", ".jpg", ".jpeg"):
             from PIL import Image
-            imagen = Image.open(ruta_temporal)
+            imagen = Image.open(ruta_archivo)
             texto = extraer_texto_de_imagen(imagen)
         elif ext == ".pdf":
-            texto = extraer_texto_de_pdf(ruta_temporal)
+            texto = extraer_texto_de_pdf(ruta_archivo)
         else:
             raise ValueError(f"Formato no soportado: {ext}")
-        
-        # Limpiar archivo temporal
-        limpiar_archivo_temporal(ruta_temporal)
-        
-        return {"nombre_documento": nombre_documento, "texto": texto}
-        
-    except Exception as e:
-        limpiar_archivo_temporal(ruta_temporal)
-        raise
+    
+    # Solo se libera si el OCR terminó; si falla, el TTL (o limpiar_traspasos_task en modo local) deja tiempo para reintentar
+    liberar_referencia(redis_key)
+    
+    return {"nombre_documento": nombre_documento, "texto": texto}
+
+
+@shared_task(bind=True)
+def limpiar_traspasos_task(self):
+    """Tarea periódica (beat): borra las copias de traspaso locales que superan ARCHIVOS_TRASPASO_TTL."""
+    from documento.traspaso_archivos import limpiar_traspasos_vencidos
+
+    return {
+        "ok": True,
+        "borrados": limpiar_traspasos_vencidos()
+    }
+
 # -----------------------
 # Task 2: Limpieza de texto
 # -----------------------
@@ -70,13 +72,14 @@ def limpiar_task(self, data):
 # Task 3: Generación de embeddings
 # -----------------------
 @shared_task(bind=True)
-def embeddings_task(self, data, chunk_size=256): #Chunk fragmento o trozo de texto. 
+def embeddings_task(self, data, max_tokens=None, solapamiento=None): #Chunk fragmento o trozo de texto. 
     start_time = time.time()
     texto = data["texto_limpio"]
-    # Dividir en chunks si es muy largo
-    chunks = [texto[i:i+chunk_size] for i in range(0, len(texto), chunk_size)]
-    embeddings = [generar_embedding(chunk).tolist() for chunk in chunks]
-    data["embeddings"] = embeddings
+    # Dividir en chunks por oraciones y tokens del modelo, con solapamiento.
+    # Todos los chunks se codifican en lotes, no una pasada del modelo por chunk
+    spans, embeddings = generar_embeddings_fragmentos(texto, max_tokens=max_tokens, solapamiento=solapamiento)
+    data["spans"] = spans
+    data["embeddings"] = embeddings.tolist()
     end_time = time.time()
     #logger.info(f"[Embeddings] Documento '{data['nombre_documento']}' embeddings generados en {end_time - start_time:.2f} seg")
     return data
@@ -92,15 +95,34 @@ def guardar_task(self, data):
     if not doc:
         raise ValueError(f"Documento '{nombre_documento}' no encontrado en BD")
 
-    # Promediar todos los embeddings
-    import numpy as np
-    embeddings = np.array(data["embeddings"])
-    embedding_promedio = np.mean(embeddings, axis=0).tolist()
-
+    # Promediar todos los embeddings (vector del documento completo); sin texto queda en None
     doc.contenido_extraido = data["texto_limpio"]
-    doc.vector_embedding = embedding_promedio
-    doc.save(update_fields=["contenido_extraido", "vector_embedding"])
+    doc.vector_embedding = vector_promedio(data["embeddings"])
+    with transaction.atomic():
+        doc.save(update_fields=["contenido_extraido", "vector_embedding"])
+        # Un vector por chunk para la búsqueda por pasajes
+        doc.guardar_chunks(data.get("spans", []), data["embeddings"])
 
     end_time = time.time()
     logger.info(f"[BD] Documento '{nombre_documento}' guardado en {end_time - start_time:.2f} seg")
-    return doc.pk
\ No newline at end of file
+    return doc.pk
+
+# -----------------------
+# Reindexado masivo (manage.py reindex_embeddings --celery)
+# -----------------------
+@shared_task(bind=True, autoretry_for=(Exception,), retry_kwargs={"max_retries": 3, "countdown": 10})
+def reindexar_lote_task(self, fuente, ids):
+    from documento.busquedaSemantica.reindexado import reindexar_lote
+
+    start_time = time.time()
+    actualizados = reindexar_lote(fuente, ids)
+    logger.info(f"[Reindexado] {fuente}: {actualizados} filas (ids {ids[0]}-{ids[-1]}) en {time.time() - start_time:.2f} seg")
+    return actualizados
+
+
+@shared_task
+def resumen_reindexado_task(resultados, fuente):
+    """Callback del chord: se ejecuta cuando terminaron todos los lotes."""
+    total = sum(resultados)
+    logger.info(f"[Reindexado] {fuente} completo: {total} filas actualizadas")
+    return total
@@ -1,3 +1,109 @@
-from django.test import TestCase
+import unittest
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase
+
+from documento.busquedaSemantica.chunking import generar_fragmentos
+from documento.busquedaSemantica.embeddings import vector_promedio
+from gestion_documental.ai.model_loader import cargar_modelo
+
+
+class ParidadBackendsEmbeddingsTest(SimpleTestCase):
+    """Los backends ONNX deben dar vectores casi iguales a los del modelo PyTorch fp32."""
+
+    TEXTOS = [
+        "se convoca a reunión ordinaria del directorio para el día lunes.",
+        "solicitud de informe sobre el estado de los trámites pendientes.",
+        "memorando de designación de comisión de revisión de documentos.",
+        "nota de respuesta a la invitación recibida de la federación.",
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        try:
+            import onnxruntime  # noqa: F401
+            import optimum  # noqa: F401
+        except ImportError:
+            raise unittest.SkipTest("optimum[onnxruntime] no está instalado")
+        try:
+            cls.referencia = cargar_modelo("torch").encode(cls.TEXTOS, normalize_embeddings=True)
+        except OSError as exc:
+            raise unittest.SkipTest(f"Modelo no disponible: {exc}")
+
+    def _similitud_minima(self, backend):
+        vectores = cargar_modelo(backend).encode(self.TEXTOS, normalize_embeddings=True)
+        return float(np.min(np.sum(vectores * self.referencia, axis=1)))
+
+    def test_onnx_fp32_igual_a_torch(self):
+        self.assertGreaterEqual(self._similitud_minima("onnx"), 0.999)
+
+    def test_onnx_int8_cercano_a_torch(self):
+        self.assertGreaterEqual(self._similitud_minima("onnx-int8"), 0.98)
+
+
+class VectorPromedioTest(SimpleTestCase):
+    """El vector del documento es el promedio de sus fragmentos; sin fragmentos queda en None (no NaN)."""
+
+    def test_promedio_de_los_fragmentos(self):
+        self.assertEqual(vector_promedio([[1.0, 2.0], [3.0, 4.0]]), [2.0, 3.0])
+
+    def test_sin_fragmentos_devuelve_none(self):
+        self.assertIsNone(vector_promedio([]))
+        self.assertIsNone(vector_promedio(np.zeros((0, 384))))
+
+
+class _TokenizerPalabras:
+    """Tokenizer no rápido: el chunker cuenta una palabra por token (sin cargar el modelo)."""
+
+    is_fast = False
+
+
+class GenerarFragmentosTest(SimpleTestCase):
+    """Ventana deslizante del chunker: oraciones completas, solapamiento y oraciones más largas que la ventana."""
+
+    ORACIONES = ["uno dos tres.", "cuatro cinco seis.", "siete ocho nueve.", "diez once doce."]
+
+    def _fragmentos(self, texto, max_tokens, solapamiento):
+        return list(generar_fragmentos(texto, max_tokens=max_tokens, solapamiento=solapamiento, tokenizer=_TokenizerPalabras()))
+
+    def test_texto_vacio(self):
+        self.assertEqual(self._fragmentos("", 6, 0), [])
+        self.assertEqual(self._fragmentos("   ", 6, 0), [])
+
+    def test_texto_corto_es_un_solo_fragmento(self):
+        fragmentos = self._fragmentos("Hola mundo.", 6, 2)
+        self.assertEqual([(f.orden, f.texto) for f in fragmentos], [(0, "Hola mundo.")])
+
+    def test_respeta_limites_de_oracion(self):
+        texto = " ".join(self.ORACIONES)
+        fragmentos = self._fragmentos(texto, 6, 0)
+        self.assertEqual(
+            [f.texto for f in fragmentos],
+            [" ".join(self.ORACIONES[:2]), " ".join(self.ORACIONES[2:])],
+        )
+        for fragmento in fragmentos:
+            self.assertEqual(texto[fragmento.inicio:fragmento.fin], fragmento.texto)
+
+    def test_solapamiento_repite_la_ultima_oracion(self):
+        fragmentos = self._fragmentos(" ".join(self.ORACIONES), 6, 3)
+        self.assertEqual(
+            [f.texto for f in fragmentos],
+            [" ".join(self.ORACIONES[i:i + 2]) for i in range(3)],
+        )
+        self.assertEqual([f.orden for f in fragmentos], [0, 1, 2])
+
+    def test_oracion_mas_larga_que_la_ventana(self):
+        texto = " ".join(f"palabra{i}" for i in range(20))
+        fragmentos = self._fragmentos(texto, 8, 2)
+
+        self.assertGreater(len(fragmentos), 1)
+        self.assertEqual(fragmentos[0].inicio, 0)
+        self.assertEqual(fragmentos[-1].fin, len(texto))
+        for anterior, siguiente in zip(fragmentos, fragmentos[1:]):
+            # Cada fragmento empieza antes de que termine el anterior (solapamiento dentro de la oración)
+            self.assertLess(siguiente.inicio, anterior.fin)
+            self.assertGreater(siguiente.fin, anterior.fin)
+        for fragmento in fragmentos:
+            self.assertLessEqual(len(fragmento.texto.split()), 8)
+            self.assertEqual(texto[fragmento.inicio:fragmento.fin], fragmento.texto)
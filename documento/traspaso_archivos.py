@@ -0,0 +1,170 @@
+#Traspaso de archivos subidos a los workers de OCR. El modelo guarda solo una referencia
+#("media:", "local:" o "redis:") y la tarea abre el archivo a partir de ella.
+import os
+import shutil
+import tempfile
+import time
+import logging
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from documento.redis_utils import get_redis_client, limpiar_archivo_temporal
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de cada parte en Redis y partes por pipeline o MGET (acota la memoria del cliente)
+TAMANO_PARTE = 1024 * 1024
+PARTES_POR_PIPELINE = 8
+
+
+def _clave_parte(clave, indice):
+    return f"{clave}:parte:{indice}"
+
+
+def _subir_a_redis(archivo, clave):
+    """Sube el archivo a Redis por partes, cada una con SET ... EX en un solo comando."""
+    client = get_redis_client()
+    ttl = settings.ARCHIVOS_TRASPASO_TTL
+    pipe = client.pipeline(transaction=False)
+    partes = 0
+    tamano = 0
+    archivo.open("rb")
+    try:
+        for bloque in archivo.chunks(chunk_size=TAMANO_PARTE):
+            pipe.set(_clave_parte(clave, partes), bloque, ex=ttl)
+            partes += 1
+            tamano += len(bloque)
+            if partes % PARTES_POR_PIPELINE == 0:
+                pipe.execute()
+    finally:
+        archivo.close()
+    # La cabecera va al final: quien la lea ya tiene todas las partes disponibles
+    pipe.set(clave, partes, ex=ttl)
+    pipe.execute()
+    logger.info(f"✅ Archivo enviado a Redis: {clave} ({partes} partes, {tamano} bytes)")
+
+
+def _descargar_de_redis(clave, destino):
+    client = get_redis_client()
+    cabecera = client.get(clave)
+    if cabecera is None:
+        raise FileNotFoundError(f"Archivo no encontrado en Redis: {clave}")
+    try:
+        partes = int(cabecera)
+    except ValueError:
+        # Formato anterior: el archivo completo en una sola clave
+        destino.write(cabecera)
+        return
+    # Las partes se piden de a PARTES_POR_PIPELINE en un solo viaje de red
+    for desde in range(0, partes, PARTES_POR_PIPELINE):
+        indices = range(desde, min(desde + PARTES_POR_PIPELINE, partes))
+        for indice, bloque in zip(indices, client.mget([_clave_parte(clave, i) for i in indices])):
+            if bloque is None:
+                raise FileNotFoundError(f"Parte {indice} del archivo expiró en Redis: {clave}")
+            destino.write(bloque)
+
+
+def entregar_archivo(archivo, clave):
+    """
+    Deja el archivo disponible para los workers y devuelve su referencia.
+
+    Según ARCHIVOS_TRASPASO:
+        "redis": partes de 1 MB en Redis con TTL (workers sin disco compartido)
+        "local": sin copia si ARCHIVOS_TRASPASO_DIR está vacío (MEDIA_ROOT compartido),
+                 o copia en streaming a ese volumen compartido
+
+    Args:
+        archivo: FieldFile ya guardado en el storage
+        clave: Nombre único (conserva la extensión del archivo)
+    """
+    modo = settings.ARCHIVOS_TRASPASO
+    if modo == "redis":
+        _subir_a_redis(archivo, clave)
+        return f"redis:{clave}"
+
+    if modo == "local":
+        if not settings.ARCHIVOS_TRASPASO_DIR:
+            return f"media:{archivo.name}"
+        os.makedirs(settings.ARCHIVOS_TRASPASO_DIR, exist_ok=True)
+        ruta = os.path.join(settings.ARCHIVOS_TRASPASO_DIR, clave)
+        archivo.open("rb")
+        try:
+            with open(ruta, "wb") as destino:
+                shutil.copyfileobj(archivo, destino, TAMANO_PARTE)
+        finally:
+            archivo.close()
+        return f"local:{ruta}"
+
+    raise ValueError(f"ARCHIVOS_TRASPASO inválido: {modo}. Opciones: redis, local")
+
+
+@contextmanager
+def abrir_referencia(referencia):
+    """
+    Entrega una ruta local al archivo de la referencia. Los archivos locales se
+    usan en su lugar; solo lo que viene de Redis se escribe en un temporal.
+    """
+    tipo, _, valor = referencia.partition(":")
+    if tipo == "media":
+        yield default_storage.path(valor)
+        return
+    if tipo == "local":
+        yield valor
+        return
+
+    # "redis:clave", o una clave sin prefijo del formato anterior
+    clave = valor if tipo == "redis" else referencia
+    ext = os.path.splitext(clave)[1].lower() or ".pdf"
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=ext)
+    try:
+        with temp_file:
+            _descargar_de_redis(clave, temp_file)
+        yield temp_file.name
+    finally:
+        limpiar_archivo_temporal(temp_file.name)
+
+
+def liberar_referencia(referencia):
+    """Libera la copia de traspaso una vez procesado el archivo (el original en media no se toca)."""
+    tipo, _, valor = referencia.partition(":")
+    try:
+        if tipo == "local":
+            os.unlink(valor)
+        elif tipo == "redis":
+            client = get_redis_client()
+            partes = client.get(valor)
+            claves = [valor]
+            if partes is not None and partes.isdigit():
+                claves += [_clave_parte(valor, i) for i in range(int(partes))]
+            client.delete(*claves)
+        logger.info(f"🧹 Traspaso liberado: {referencia}")
+    except Exception as e:
+        logger.warning(f"⚠️ Error liberando traspaso {referencia}: {str(e)}")
+
+
+def limpiar_traspasos_vencidos():
+    """
+    Equivalente al TTL de Redis para el modo "local": borra las copias de ARCHIVOS_TRASPASO_DIR
+    con más de ARCHIVOS_TRASPASO_TTL segundos. Si el OCR o los embeddings fallan, la copia
+    queda para un reintento y esta limpieza (tarea periódica) la borra después.
+    Devuelve la cantidad de archivos borrados.
+    """
+    directorio = settings.ARCHIVOS_TRASPASO_DIR
+    if not directorio or not os.path.isdir(directorio):
+        return 0
+
+    limite = time.time() - settings.ARCHIVOS_TRASPASO_TTL
+    borrados = 0
+    with os.scandir(directorio) as entradas:
+        for entrada in entradas:
+            try:
+                if entrada.is_file() and entrada.stat().st_mtime < limite:
+                    os.unlink(entrada.path)
+                    borrados += 1
+            except FileNotFoundError:
+                # Otro worker la liberó mientras se recorría el directorio
+                continue
+    logger.info(f"🧹 Traspasos locales vencidos borrados: {borrados}")
+    return borrados
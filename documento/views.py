@@ -3,12 +3,15 @@ from rest_framework import viewsets
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser
 from rest_framework.decorators import api_view
+from django.db.models import F
+from django.db.models.functions import Substr
 from pgvector.django import CosineDistance
 
 from .serializers import DocumentoSerializer, PlantillaDocumentoSerializer
-from .models import Documento, PlantillaDocumento
+from .models import Documento, DocumentoChunk, PlantillaDocumento
 from gestion_documental.mixins import PaginacionYAllDataMixin
-from gestion_documental.ai.model_loader import get_model
+from .busquedaSemantica.cache_embeddings import generar_embedding_consulta
+from .busquedaSemantica.indices import parametros_busqueda_vectorial, parametros_desde_request
 # -------------------------------
 # ViewSet para Documentos
 # -------------------------------
@@ -36,6 +39,72 @@ class PlantillaDocumentoViewSet(PaginacionYAllDataMixin, viewsets.ModelViewSet):
 # -------------------------------
 # API para búsqueda semántica
 # -------------------------------
+RESULTADOS_MAX = 5              # Documentos devueltos
+FRAGMENTOS_POR_DOCUMENTO = 3    # Pasajes devueltos por documento
+CHUNKS_CANDIDATOS = 50          # Vecinos más cercanos pedidos al índice HNSW
+
+
+def _buscar_por_chunks(embedding_consulta):
+    """
+    Busca los pasajes más parecidos en DocumentoChunk y los agrupa por documento,
+    respetando el orden de similitud del mejor pasaje de cada documento.
+    """
+    candidatos = (
+        DocumentoChunk.objects
+        .annotate(
+            distancia=CosineDistance('vector_embedding', embedding_consulta),
+            texto=Substr('documento__contenido_extraido', F('inicio') + 1, F('fin') - F('inicio')),
+        )
+        .order_by('distancia')
+        .values('documento_id', 'documento__nombre_documento', 'orden', 'texto', 'distancia')
+        [:CHUNKS_CANDIDATOS]
+    )
+
+    agrupados = {}
+    for chunk in candidatos:
+        doc = agrupados.get(chunk['documento_id'])
+        if doc is None:
+            if len(agrupados) >= RESULTADOS_MAX:
+                continue
+            doc = agrupados[chunk['documento_id']] = {
+                'id': chunk['documento_id'],
+                'nombre_documento': chunk['documento__nombre_documento'],
+                'texto_plano': (chunk['texto'] or '')[:200],
+                'similitud': round(1 - chunk['distancia'], 4),
+                'fragmentos': [],
+            }
+        if len(doc['fragmentos']) < FRAGMENTOS_POR_DOCUMENTO:
+            doc['fragmentos'].append({
+                'orden': chunk['orden'],
+                'texto': chunk['texto'],
+                'similitud': round(1 - chunk['distancia'], 4),
+            })
+    return list(agrupados.values())
+
+
+def _buscar_por_documento(embedding_consulta):
+    # Documentos procesados antes de existir DocumentoChunk solo tienen el vector promedio
+    documentos = (
+        Documento.objects
+        .filter(chunks__isnull=True, vector_embedding__isnull=False)
+        .annotate(similitud=CosineDistance('vector_embedding', embedding_consulta))
+        .order_by('similitud')[:RESULTADOS_MAX]
+    )
+
+    data = []
+    for doc in documentos:
+        if doc.similitud is None:
+            continue
+        data.append({
+            'id': doc.pk,
+            'nombre_documento': doc.nombre_documento,
+            'texto_plano': doc.contenido_extraido[:200] if doc.contenido_extraido else '',
+            'similitud': round(1 - doc.similitud, 4),
+            'fragmentos': [],
+        })
+    return data
+
+
 @api_view(['POST'])
 def buscar_documentos_semanticos(request):
     consulta = request.data.get('consulta', '')
@@ -43,26 +112,14 @@ def buscar_documentos_semanticos(request):
         return Response({'error': 'Consulta no proporcionada'}, status=400)
 
     try:
-        modelo = get_model()
-        embedding_consulta = modelo.encode(consulta).tolist()
-        documentos = (
-            Documento.objects
-            .annotate(similitud=CosineDistance('vector_embedding', embedding_consulta))
-            .order_by('similitud')[:5]
-        )
+        embedding_consulta = generar_embedding_consulta(consulta).tolist()
 
-        data = []
-        for doc in documentos:
-            if doc.similitud is None:
-                continue
-            data.append({
-                'id': doc.pk,
-                'nombre_documento': doc.nombre_documento,
-                'texto_plano': doc.contenido_extraido[:200] if doc.contenido_extraido else '',
-                'similitud': round(1 - doc.similitud, 4),
-            })
+        with parametros_busqueda_vectorial(**parametros_desde_request(request)):
+            # Los documentos sin chunks compiten con los demás por su vector promedio
+            data = _buscar_por_chunks(embedding_consulta) + _buscar_por_documento(embedding_consulta)
+        data = sorted(data, key=lambda doc: doc['similitud'], reverse=True)[:RESULTADOS_MAX]
 
         return Response(data)
 
     except Exception as e:
-        return Response({'error': f'Error en búsqueda semántica: {str(e)}'}, status=500)
\ No newline at end of file
+        return Response({'error': f'Error en búsqueda semántica: {str(e)}'}, status=500)
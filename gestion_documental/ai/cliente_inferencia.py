@@ -0,0 +1,61 @@
+#Cliente del servidor de inferencia (servicio_inferencia.py). No importa torch.
+import base64
+import http.client
+import json
+import socket
+
+import numpy as np
+
+
+class ServicioInferenciaNoDisponible(Exception):
+    """El servidor de embeddings no respondió o respondió con error."""
+
+
+class _ConexionUnix(http.client.HTTPConnection):
+    def __init__(self, ruta, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.ruta = ruta
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.ruta)
+
+
+def _conexion(direccion, timeout):
+    if direccion.startswith("unix://"):
+        return _ConexionUnix(direccion[len("unix://"):], timeout)
+    host_puerto = direccion.split("://", 1)[-1].rstrip("/")
+    return http.client.HTTPConnection(host_puerto, timeout=timeout)
+
+
+def codificar_remoto(textos, direccion, timeout=10):
+    """
+    Pide al servidor de inferencia los embeddings de `textos`.
+
+    Returns:
+        np.ndarray: Matriz float32 con una fila por texto
+
+    Raises:
+        ServicioInferenciaNoDisponible: Si el servidor no responde o devuelve error
+    """
+    conexion = _conexion(direccion, timeout)
+    try:
+        conexion.request(
+            "POST",
+            "/embeddings",
+            body=json.dumps({"textos": list(textos)}),
+            headers={"Content-Type": "application/json"},
+        )
+        respuesta = conexion.getresponse()
+        payload = json.loads(respuesta.read())
+    except (OSError, http.client.HTTPException, ValueError) as exc:
+        raise ServicioInferenciaNoDisponible(str(exc)) from exc
+    finally:
+        conexion.close()
+
+    if respuesta.status != 200:
+        raise ServicioInferenciaNoDisponible(payload.get("error", f"HTTP {respuesta.status}"))
+
+    matriz = np.frombuffer(base64.b64decode(payload["embeddings"]), dtype=np.float32)
+    return matriz.reshape(payload["forma"])
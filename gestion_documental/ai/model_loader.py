@@ -1,17 +1,118 @@
 import os
-import torch
+from django.conf import settings
 #FOR SOULTION SSL
 import ssl
 import certifi
 
 _model = None
+_tokenizer = None
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def get_max_seq_length():
+    # Railway reduce la secuencia para ahorrar memoria
+    return 256 if os.getenv('RAILWAY_ENVIRONMENT', '') != '' else 512
+
+
+def get_backend():
+    backend = settings.EMBEDDINGS_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"EMBEDDINGS_BACKEND inválido: {backend}. Opciones: {', '.join(BACKENDS)}")
+    return backend
+
+
+def get_model_id():
+    """
+    Identificador del modelo y su configuración, sin cargarlo.
+    Sirve para versionar cachés de embeddings.
+    """
+    return f"{MODEL_NAME}:{get_max_seq_length()}:{get_backend()}"
+
+
+def _exportar_onnx(backend):
+    """
+    Exporta el modelo a ONNX (y lo cuantiza a int8 si se pide) una sola vez
+    en EMBEDDINGS_MODELOS_DIR. Devuelve el archivo .onnx a cargar.
+    """
+    try:
+        import onnxruntime  # noqa: F401
+        import optimum  # noqa: F401
+    except ImportError:
+        raise ImportError("Necesitas instalar optimum y onnxruntime: pip install optimum[onnxruntime]")
+    from filelock import FileLock
+    from sentence_transformers import SentenceTransformer
+
+    ruta = os.path.join(settings.EMBEDDINGS_MODELOS_DIR, MODEL_NAME)
+    archivo_fp32 = "onnx/model.onnx"
+    archivo_int8 = f"onnx/model_qint8_{settings.EMBEDDINGS_ONNX_CUANTIZACION}.onnx"
+    os.makedirs(ruta, exist_ok=True)
+
+    # Varios workers pueden arrancar a la vez: solo uno exporta
+    with FileLock(os.path.join(ruta, ".exportando.lock")):
+        if not os.path.exists(os.path.join(ruta, archivo_fp32)):
+            print(f"📦 Exportando {MODEL_NAME} a ONNX en {ruta}")
+            SentenceTransformer(MODEL_NAME, backend="onnx").save(ruta)
+
+        if backend == "onnx":
+            return ruta, archivo_fp32
+
+        if not os.path.exists(os.path.join(ruta, archivo_int8)):
+            from sentence_transformers.backend import export_dynamic_quantized_onnx_model
+            print(f"📦 Cuantizando a int8 ({settings.EMBEDDINGS_ONNX_CUANTIZACION})")
+            modelo_fp32 = SentenceTransformer(ruta, backend="onnx", model_kwargs={"file_name": archivo_fp32})
+            export_dynamic_quantized_onnx_model(modelo_fp32, settings.EMBEDDINGS_ONNX_CUANTIZACION, ruta)
+
+    return ruta, archivo_int8
+
+
+def cargar_modelo(backend, device="cpu"):
+    """
+    Carga una instancia nueva del modelo con el backend indicado (sin singleton).
+
+    Args:
+        backend: "torch" (PyTorch fp32), "onnx" (ONNX Runtime fp32) u "onnx-int8" (cuantizado dinámico)
+        device: Dispositivo para torch; ONNX siempre corre en CPU
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        # Cargar modelo primero sin especificar dispositivo
+        modelo = SentenceTransformer(MODEL_NAME)
+        # Mover al dispositivo DESPUÉS de la carga completa
+        return modelo.to(device)
+
+    ruta, archivo = _exportar_onnx(backend)
+    return SentenceTransformer(
+        ruta,
+        backend="onnx",
+        model_kwargs={"file_name": archivo, "provider": "CPUExecutionProvider"},
+    )
+
+
+def get_tokenizer():
+    """
+    Tokenizer del modelo. Si el modelo no está cargado en este proceso
+    se carga solo el tokenizer (no requiere torch).
+    """
+    global _tokenizer
+    if _model is not None:
+        return _model.tokenizer
+    if _tokenizer is None:
+        from transformers import AutoTokenizer
+        _tokenizer = AutoTokenizer.from_pretrained(f"sentence-transformers/{MODEL_NAME}")
+    return _tokenizer
+
 
 def get_model(): #Solo carga el modelo
     global _model
     if _model is None:
         print("🧠 Cargando modelo SBERT...")
         try:
-            from sentence_transformers import SentenceTransformer
+            # torch se importa solo aquí: los procesos que usan el servidor de inferencia nunca lo cargan
+            import torch
+            import sentence_transformers  # noqa: F401
         except ImportError:
             raise ImportError("Necesitas instalar sentence-transformers: pip install sentence-transformers")
         
@@ -21,22 +122,20 @@ def get_model(): #Solo carga el modelo
         if railway_env:
             # Configuración para Railway (producción)
             device = 'cpu'  # Railway no tiene GPU
-            max_seq = 256    # Reducir para ahorrar memoria
+            max_seq = get_max_seq_length()    # Reducir para ahorrar memoria
             print("🚂 Entorno Railway detectado - usando configuración optimizada")
         else:
             # Configuración para desarrollo local
             device = 'cuda' if torch.cuda.is_available() else 'cpu'
-            max_seq = 512    # Máximo rendimiento local
+            max_seq = get_max_seq_length()    # Máximo rendimiento local
             print("💻 Entorno local detectado - usando configuración completa")
         
         print(f"🔧 Usando dispositivo: {device}")
         
         try:
-            # Cargar modelo primero sin especificar dispositivo
-            _model = SentenceTransformer("all-MiniLM-L6-v2")
-            
-            # Mover al dispositivo DESPUÉS de la carga completa
-            _model = _model.to(device)
+            backend = get_backend()
+            print(f"🔌 Backend de inferencia: {backend}")
+            _model = cargar_modelo(backend, device)
             
             # 🔥 Configuración específica por entorno
             _model.max_seq_length = max_seq
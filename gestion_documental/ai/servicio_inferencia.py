@@ -0,0 +1,150 @@
+#Servidor local de inferencia: es el único proceso que carga torch y el modelo SBERT.
+#Los workers de gunicorn le piden embeddings por HTTP (TCP o socket Unix) con cliente_inferencia.py.
+#Las peticiones concurrentes se juntan en un solo lote (micro-batching) antes de llamar a encode().
+import base64
+import json
+import logging
+import os
+import queue
+import socketserver
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from gestion_documental.ai.model_loader import get_model, get_model_id
+
+logger = logging.getLogger(__name__)
+
+
+class Lotificador:
+    """
+    Junta los textos de varias peticiones concurrentes y los codifica en una sola pasada.
+
+    Un hilo de fondo toma la primera petición de la cola y espera hasta
+    `espera_ms` por más peticiones, sin pasar de `max_lote` textos.
+    """
+
+    def __init__(self, max_lote=64, espera_ms=5):
+        self.max_lote = max_lote
+        self.espera = espera_ms / 1000
+        self._cola = queue.Queue()
+        # El modelo se carga al iniciar el servidor, no en la primera petición
+        self._modelo = get_model()
+        self._hilo = threading.Thread(target=self._bucle, name="lotificador-embeddings", daemon=True)
+        self._hilo.start()
+
+    def codificar(self, textos):
+        futuro = Future()
+        self._cola.put((textos, futuro))
+        return futuro.result()
+
+    def _bucle(self):
+        while True:
+            pendientes = [self._cola.get()]
+            total = len(pendientes[0][0])
+            while total < self.max_lote:
+                try:
+                    pendiente = self._cola.get(timeout=self.espera)
+                except queue.Empty:
+                    break
+                pendientes.append(pendiente)
+                total += len(pendiente[0])
+
+            textos = [texto for lote, _ in pendientes for texto in lote]
+            try:
+                matriz = np.asarray(
+                    self._modelo.encode(textos, batch_size=self.max_lote, convert_to_numpy=True, show_progress_bar=False),
+                    dtype=np.float32,
+                )
+            except Exception as exc:
+                for _, futuro in pendientes:
+                    futuro.set_exception(exc)
+                continue
+
+            inicio = 0
+            for lote, futuro in pendientes:
+                futuro.set_result(matriz[inicio:inicio + len(lote)])
+                inicio += len(lote)
+
+
+class ManejadorEmbeddings(BaseHTTPRequestHandler):
+    lotificador = None  # Se asigna al iniciar el servidor
+
+    def do_GET(self):
+        if self.path != "/salud":
+            return self._responder(404, {"error": "Ruta no encontrada"})
+        return self._responder(200, {"status": "ok", "modelo": get_model_id()})
+
+    def do_POST(self):
+        if self.path != "/embeddings":
+            return self._responder(404, {"error": "Ruta no encontrada"})
+        try:
+            largo = int(self.headers.get("Content-Length", 0))
+            textos = json.loads(self.rfile.read(largo))["textos"]
+            if not isinstance(textos, list) or not all(isinstance(t, str) for t in textos):
+                raise ValueError("'textos' debe ser una lista de strings")
+        except (ValueError, KeyError) as exc:
+            return self._responder(400, {"error": str(exc)})
+
+        try:
+            matriz = self.lotificador.codificar(textos) if textos else np.empty((0, 0), dtype=np.float32)
+        except Exception as exc:
+            logger.exception("Error generando embeddings")
+            return self._responder(500, {"error": str(exc)})
+
+        return self._responder(200, {
+            "modelo": get_model_id(),
+            "forma": list(matriz.shape),
+            # float32 en base64: ~4 veces más compacto que una lista JSON de floats
+            "embeddings": base64.b64encode(np.ascontiguousarray(matriz).tobytes()).decode("ascii"),
+        })
+
+    def _responder(self, status, payload):
+        cuerpo = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class ServidorHTTP(ThreadingHTTPServer):
+    # Con el backlog por defecto (5) las ráfagas de gunicorn reciben "connection refused"
+    request_queue_size = 128
+
+
+class ServidorUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def get_request(self):
+        # En socket Unix la dirección del cliente es una cadena vacía; el manejador espera (host, puerto)
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+def crear_servidor(direccion, max_lote=64, espera_ms=5):
+    """
+    Crea el servidor de embeddings.
+
+    Args:
+        direccion: "unix:///ruta/al.sock" o "http://host:puerto"
+    """
+    ManejadorEmbeddings.lotificador = Lotificador(max_lote=max_lote, espera_ms=espera_ms)
+
+    if direccion.startswith("unix://"):
+        ruta = direccion[len("unix://"):]
+        if os.path.exists(ruta):
+            os.unlink(ruta)
+        servidor = ServidorUnix(ruta, ManejadorEmbeddings)
+        os.chmod(ruta, 0o660)
+        return servidor
+
+    host_puerto = direccion.split("://", 1)[-1].rstrip("/")
+    host, _, puerto = host_puerto.rpartition(":")
+    return ServidorHTTP((host or "127.0.0.1", int(puerto)), ManejadorEmbeddings)
@@ -1,9 +1,31 @@
-from rest_framework import status
-from rest_framework.response import Response
-from .pagination import PaginacionPersonalizada
+import logging
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+from .pagination import PaginacionKeyset, PaginacionPersonalizada
+
+logger = logging.getLogger(__name__)
+
 
 class PaginacionYAllDataMixin:
     pagination_class = PaginacionPersonalizada  # Esto se aplica directamente a las vistas que usen este mixin
+    paginacion_cursor = False  # True en las vistas que aceptan ?cursor= (PaginacionKeyset)
+
+    def usar_paginacion_cursor(self):
+        return self.paginacion_cursor and PaginacionKeyset.cursor_query_param in self.request.query_params
+
+    @property
+    def paginator(self):
+        # ?cursor= cambia a paginación keyset solo en este request
+        if not hasattr(self, '_paginator') and self.usar_paginacion_cursor():
+            self._paginator = PaginacionKeyset()
+        return super().paginator
+
+    def contexto_consulta(self):
+        """Contexto en el que se evalúa el queryset de all_data (p. ej. parámetros de búsqueda vectorial)."""
+        return nullcontext()
 
     def list(self, request, *args, **kwargs):
         # Maneja el parámetro 'all_data' para obtener todos los elementos sin paginación
@@ -12,9 +34,61 @@ class PaginacionYAllDataMixin:
         if all_data:
              # ✅ Aplica filtros, búsqueda y ordenamiento
             queryset = self.filter_queryset(self.get_queryset())
-            
-            serializer = self.get_serializer(queryset, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return self.respuesta_streaming(queryset, ndjson=request.query_params.get('formato') == 'ndjson')
 
         # Si no es 'all_data', utiliza la paginación normal
         return super().list(request, *args, **kwargs)
+
+    def respuesta_streaming(self, queryset, ndjson=False):
+        """
+        Envía el queryset completo por partes: se lee con cursor del servidor de a
+        ALL_DATA_CHUNK_SIZE filas (los prefetch se aplican por bloque) y cada bloque se
+        serializa y se envía antes de leer el siguiente. Como mucho ALL_DATA_MAX_FILAS filas;
+        si hay más, la respuesta lleva la cabecera X-All-Data-Truncado (expuesta por CORS).
+        ndjson=True entrega un objeto por línea en vez de un arreglo JSON; si se truncó,
+        la última línea es {"_truncado": true, "limite": N}.
+        """
+        limite = settings.ALL_DATA_MAX_FILAS
+        with self.contexto_consulta():
+            truncado = queryset[limite:limite + 1].exists()
+        if truncado:
+            logger.warning(f"all_data truncado a {limite} filas en {self.__class__.__name__}")
+
+        response = StreamingHttpResponse(
+            self._serializar_por_bloques(queryset[:limite], ndjson, limite if truncado else None),
+            content_type='application/x-ndjson' if ndjson else 'application/json',
+        )
+        if truncado:
+            response['X-All-Data-Truncado'] = str(limite)
+        return response
+
+    def _serializar_por_bloques(self, queryset, ndjson, truncado_en=None):
+        encoder = JSONEncoder(ensure_ascii=False)
+        bloque = []
+        primero = True
+
+        def emitir(filas):
+            nonlocal primero
+            datos = self.get_serializer(filas, many=True).data
+            if ndjson:
+                return "".join(encoder.encode(item) + "\n" for item in datos)
+            partes = [encoder.encode(item) for item in datos]
+            texto = ("" if primero else ",") + ",".join(partes)
+            primero = False
+            return texto
+
+        if not ndjson:
+            yield "["
+        with self.contexto_consulta():
+            for fila in queryset.iterator(chunk_size=settings.ALL_DATA_CHUNK_SIZE):
+                bloque.append(fila)
+                if len(bloque) == settings.ALL_DATA_CHUNK_SIZE:
+                    yield emitir(bloque)
+                    bloque = []
+            if bloque:
+                yield emitir(bloque)
+        if not ndjson:
+            yield "]"
+        elif truncado_en is not None:
+            # Marca en el cuerpo: el cliente la ve aunque no pueda leer la cabecera
+            yield encoder.encode({"_truncado": True, "limite": truncado_en}) + "\n"
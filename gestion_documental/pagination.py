@@ -1,6 +1,13 @@
 # pagination.py
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from django.db import connection
+from django.db.models import Q
+from datetime import datetime
+import base64
+import json
 import math
 
 class PaginacionPersonalizada(PageNumberPagination):
@@ -23,3 +30,95 @@ class PaginacionPersonalizada(PageNumberPagination):
             'previous': self.get_previous_link(),
             'results': data
         })
+
+
+class PaginacionKeyset(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre (fecha_registro, id_correspondencia), de lo más
+    reciente a lo más antiguo. Cada página filtra "menor que la última fila vista" en vez de
+    usar OFFSET, así que una página profunda cuesta lo mismo que la primera.
+
+    ?cursor=          primera página (el parámetro vacío activa el modo cursor)
+    ?cursor=<token>   página siguiente (el token viene en 'next')
+    ?count=exact      agrega el total con COUNT(*)
+    ?count=approx     agrega un total estimado por PostgreSQL (pg_class.reltuples o el plan de la consulta)
+    Sin count no se cuenta nada. El orden es fijo: ?ordering no aplica en este modo.
+    """
+    page_size = PaginacionPersonalizada.page_size
+    page_size_query_param = PaginacionPersonalizada.page_size_query_param
+    max_page_size = PaginacionPersonalizada.max_page_size
+    cursor_query_param = 'cursor'
+    campos = ('fecha_registro', 'id_correspondencia')
+
+    def get_page_size(self, request):
+        try:
+            return max(1, min(int(request.query_params[self.page_size_query_param]), self.max_page_size))
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def codificar_cursor(self, fila):
+        fecha, pk = (getattr(fila, campo) for campo in self.campos)
+        return base64.urlsafe_b64encode(json.dumps([fecha.isoformat(), pk]).encode()).decode()
+
+    def decodificar_cursor(self, token):
+        try:
+            fecha, pk = json.loads(base64.urlsafe_b64decode(token.encode()))
+            return datetime.fromisoformat(fecha), int(pk)
+        except (ValueError, TypeError):
+            raise NotFound("Cursor inválido.")
+
+    def contar(self, queryset, modo):
+        if modo == 'exact':
+            return queryset.count()
+        if modo != 'approx':
+            return None
+        if not queryset.query.where:
+            # Sin filtros: la estadística de la tabla que mantiene ANALYZE/autovacuum
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                fila = cursor.fetchone()
+            return max(fila[0], 0) if fila else None
+        # Con filtros: filas que el planificador estima para la consulta filtrada
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.per_page = self.get_page_size(request)
+        self.total = self.contar(queryset, request.query_params.get('count'))
+        self.estimado = request.query_params.get('count') == 'approx'
+
+        campo_fecha, campo_id = self.campos
+        queryset = queryset.order_by(f'-{campo_fecha}', f'-{campo_id}')
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            fecha, pk = self.decodificar_cursor(token)
+            # El límite sobre la fecha sola deja que PostgreSQL recorra el índice por rango
+            queryset = queryset.filter(**{f'{campo_fecha}__lte': fecha}).filter(
+                Q(**{f'{campo_fecha}__lt': fecha}) | Q(**{f'{campo_id}__lt': pk})
+            )
+
+        filas = list(queryset[:self.per_page + 1])
+        self.hay_siguiente = len(filas) > self.per_page
+        filas = filas[:self.per_page]
+        self.siguiente = self.codificar_cursor(filas[-1]) if self.hay_siguiente else None
+        return filas
+
+    def get_next_link(self):
+        if not self.siguiente:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.siguiente)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'total': self.total,
+            'total_estimado': self.estimado,
+            'per_page': self.per_page,
+            'next': self.get_next_link(),
+            'previous': None,
+            'results': data
+        })
@@ -5,6 +5,7 @@ Django settings for gestion_documental project.
 from pathlib import Path
 import os
 import dj_database_url
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -30,6 +31,8 @@ CORS_ALLOWED_ORIGINS = split_env_list("CORS_ALLOWED_ORIGINS", "http://localhost:
 CORS_ALLOW_ALL_ORIGINS = os.getenv(
     "CORS_ALLOW_ALL_ORIGINS", "True" if DEBUG else "False"
 ).lower() == "true"
+# Cabeceras propias que el frontend (otro origen) puede leer: aviso de all_data truncado
+CORS_EXPOSE_HEADERS = ["X-All-Data-Truncado"]
 
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -178,6 +181,116 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "America/La_Paz"
 
+# Pool de conexiones a Redis por proceso (redis_utils.get_redis_pool) y los mismos límites para el broker
+REDIS_MAX_CONEXIONES = int(os.getenv("REDIS_MAX_CONEXIONES", "20"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "5"))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+CELERY_BROKER_POOL_LIMIT = REDIS_MAX_CONEXIONES
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "socket_timeout": REDIS_SOCKET_TIMEOUT,
+    "socket_connect_timeout": REDIS_SOCKET_TIMEOUT,
+    "health_check_interval": REDIS_HEALTH_CHECK_INTERVAL,
+}
+
+# Traspaso de archivos subidos a los workers de OCR: "redis" (por partes, con TTL) o "local" (disco compartido).
+# En "local" con ARCHIVOS_TRASPASO_DIR vacío los workers leen directo de MEDIA_ROOT; las copias en
+# ARCHIVOS_TRASPASO_DIR que no se liberan (OCR fallido) se borran pasado ARCHIVOS_TRASPASO_TTL (beat).
+ARCHIVOS_TRASPASO = os.getenv("ARCHIVOS_TRASPASO", "redis")
+ARCHIVOS_TRASPASO_DIR = os.getenv("ARCHIVOS_TRASPASO_DIR", "")
+ARCHIVOS_TRASPASO_TTL = int(os.getenv("ARCHIVOS_TRASPASO_TTL", "3600"))
+
+# Plantillas Jinja2 de correspondencia: carpeta de la caché de bytecode (vacío = temporal del sistema)
+# y cantidad de plantillas compiladas en memoria por proceso
+JINJA2_BYTECODE_CACHE_DIR = os.getenv("JINJA2_BYTECODE_CACHE_DIR", "")
+JINJA2_PLANTILLAS_CACHE = int(os.getenv("JINJA2_PLANTILLAS_CACHE", "200"))
+
+# PDF de correspondencia: motor, renders simultáneos por proceso y segundos máximos de espera en cola
+# antes de responder 503. "wkhtmltopdf" lanza un proceso por PDF (binario del sistema, ver nixpacks.toml);
+# "weasyprint" renderiza dentro del proceso, sin arranque por PDF (necesita Pango, ver Dockerfile)
+PDF_BACKEND = os.getenv("PDF_BACKEND", "wkhtmltopdf")
+PDF_MAX_CONCURRENTES = int(os.getenv("PDF_MAX_CONCURRENTES", "2"))
+PDF_ESPERA_MAX = float(os.getenv("PDF_ESPERA_MAX", "30"))
+# Caché de PDFs renderizados: alias de STORAGES (p. ej. uno de S3) o, si está vacío, esta carpeta local (no pública)
+PDF_CACHE_STORAGE = os.getenv("PDF_CACHE_STORAGE", "")
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", str(BASE_DIR / "pdf_cache"))
+# Exportaciones asíncronas PDF/Word: storage de los archivos, segundos que se conservan (estado y archivo) y máximo de documentos
+EXPORTACIONES_STORAGE = os.getenv("EXPORTACIONES_STORAGE", "")
+EXPORTACIONES_DIR = os.getenv("EXPORTACIONES_DIR", str(BASE_DIR / "exportaciones"))
+EXPORTACIONES_TTL = int(os.getenv("EXPORTACIONES_TTL", str(60 * 60 * 24)))
+EXPORTACIONES_MAX_IDS = int(os.getenv("EXPORTACIONES_MAX_IDS", "500"))
+
+# Reportes asíncronos XLSX/CSV/Parquet: storage de los archivos y segundos que se conservan (estado y archivo)
+REPORTES_STORAGE = os.getenv("REPORTES_STORAGE", "")
+REPORTES_DIR = os.getenv("REPORTES_DIR", str(BASE_DIR / "reportes"))
+REPORTES_RETENCION = int(os.getenv("REPORTES_RETENCION", str(60 * 60 * 24 * 3)))
+# Listados con ?all_data=true: filas leídas y serializadas por bloque, y máximo de filas por respuesta
+ALL_DATA_CHUNK_SIZE = int(os.getenv("ALL_DATA_CHUNK_SIZE", "500"))
+ALL_DATA_MAX_FILAS = int(os.getenv("ALL_DATA_MAX_FILAS", "20000"))
+# Caché del dashboard en Redis: segundos que una copia se considera vigente (luego se sirve y se recalcula
+# en segundo plano), segundos que se conserva una copia vieja y máximo de periodos por consulta
+DASHBOARD_CACHE_FRESCO = int(os.getenv("DASHBOARD_CACHE_FRESCO", "300"))
+DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", str(60 * 60 * 24)))
+DASHBOARD_CANTIDAD_MAX = int(os.getenv("DASHBOARD_CANTIDAD_MAX", "60"))
+# Resumen diario MetricaDiaria (dashboard): días hacia atrás que recalcula la tarea periódica y hora en que corre.
+# Tareas periódicas (repaso de métricas y limpieza de reportes, exportaciones y traspasos vencidos): requieren levantar beat,
+# celery -A gestion_documental beat
+METRICAS_DIAS_REPASO = int(os.getenv("METRICAS_DIAS_REPASO", "7"))
+CELERY_BEAT_SCHEDULE = {
+    "repasar-metricas-diarias": {
+        "task": "correspondencia.tasks.repasar_metricas_task",
+        "schedule": crontab(hour=int(os.getenv("METRICAS_HORA_REPASO", "2")), minute=0),
+    },
+    "limpiar-reportes": {
+        "task": "correspondencia.tasks.limpiar_reportes_task",
+        "schedule": crontab(minute=30),
+    },
+    "limpiar-exportaciones": {
+        "task": "correspondencia.tasks.limpiar_exportaciones_task",
+        "schedule": crontab(minute=45),
+    },
+    "limpiar-traspasos": {
+        "task": "documento.tasks.limpiar_traspasos_task",
+        "schedule": crontab(minute="*/15"),
+    },
+}
+
+#BÚSQUEDA SEMÁNTICA#
+# Textos por pasada del modelo SBERT al generar embeddings en lote
+EMBEDDINGS_BATCH_SIZE = int(os.getenv("EMBEDDINGS_BATCH_SIZE", "32"))
+# Tamaño de los fragmentos en tokens (0 = max_seq_length del modelo) y tokens repetidos entre fragmentos
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "0"))
+CHUNK_SOLAPAMIENTO_TOKENS = int(os.getenv("CHUNK_SOLAPAMIENTO_TOKENS", "32"))
+# OCR de PDFs escaneados: páginas a las que se hace OCR (0 = todas), procesos en paralelo, timeout por página (s) y resolución
+OCR_MAX_PAGINAS = int(os.getenv("OCR_MAX_PAGINAS", "20"))
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(min(4, os.cpu_count() or 1))))
+OCR_TIMEOUT_PAGINA = int(os.getenv("OCR_TIMEOUT_PAGINA", "60"))
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+# Páginas con menos caracteres que esto en su capa de texto nativa se consideran escaneadas y pasan por OCR
+OCR_MIN_CARACTERES_PAGINA = int(os.getenv("OCR_MIN_CARACTERES_PAGINA", "50"))
+# Backend del modelo: "torch" (fp32), "onnx" (ONNX Runtime fp32) u "onnx-int8" (cuantizado, requiere optimum[onnxruntime])
+EMBEDDINGS_BACKEND = os.getenv("EMBEDDINGS_BACKEND", "torch")
+# Carpeta donde se exporta el modelo ONNX una sola vez, y set de instrucciones para la cuantización
+EMBEDDINGS_MODELOS_DIR = os.getenv("EMBEDDINGS_MODELOS_DIR", os.path.join(Path.home(), ".cache", "gestion_documental", "modelos"))
+EMBEDDINGS_ONNX_CUANTIZACION = os.getenv("EMBEDDINGS_ONNX_CUANTIZACION", "avx2")
+# Servidor de inferencia (manage.py servidor_embeddings). Vacío = cargar el modelo en cada proceso.
+# Ej: "unix:///tmp/embeddings.sock" o "http://127.0.0.1:8765"
+EMBEDDINGS_SERVICE_URL = os.getenv("EMBEDDINGS_SERVICE_URL", "")
+EMBEDDINGS_SERVICE_TIMEOUT = float(os.getenv("EMBEDDINGS_SERVICE_TIMEOUT", "10"))
+EMBEDDINGS_SERVICE_FALLBACK = os.getenv("EMBEDDINGS_SERVICE_FALLBACK", "True").lower() == "true"
+EMBEDDINGS_SERVICE_MAX_LOTE = int(os.getenv("EMBEDDINGS_SERVICE_MAX_LOTE", "64"))
+EMBEDDINGS_SERVICE_ESPERA_MS = int(os.getenv("EMBEDDINGS_SERVICE_ESPERA_MS", "5"))
+# Caché de embeddings de consultas: entradas del LRU por proceso y TTL en Redis (segundos)
+EMBEDDINGS_CACHE_MAX_ITEMS = int(os.getenv("EMBEDDINGS_CACHE_MAX_ITEMS", "1024"))
+EMBEDDINGS_CACHE_TTL = int(os.getenv("EMBEDDINGS_CACHE_TTL", str(60 * 60 * 24)))
+# Parámetros de búsqueda de los índices pgvector (por defecto y máximo aceptado vía ?ef_search= / ?probes=)
+PGVECTOR_HNSW_EF_SEARCH = int(os.getenv("PGVECTOR_HNSW_EF_SEARCH", "100"))
+PGVECTOR_HNSW_EF_SEARCH_MAX = int(os.getenv("PGVECTOR_HNSW_EF_SEARCH_MAX", "400"))
+PGVECTOR_IVFFLAT_PROBES = int(os.getenv("PGVECTOR_IVFFLAT_PROBES", "10"))
+PGVECTOR_IVFFLAT_PROBES_MAX = int(os.getenv("PGVECTOR_IVFFLAT_PROBES_MAX", "100"))
+# hnsw.iterative_scan ("relaxed_order" o "strict_order"; vacío = desactivado). Requiere pgvector >= 0.8:
+# con versiones anteriores la consulta falla, por eso no se activa por defecto
+PGVECTOR_HNSW_ITERATIVE_SCAN = os.getenv("PGVECTOR_HNSW_ITERATIVE_SCAN", "")
+
 
 ## settings.py - Modificar sección LOGGING
 LOGGING = {
@@ -23,9 +23,13 @@ from django.http import JsonResponse
 def health_check(request):
     """Health check endpoint para Railway, para verificar si la aplicación 
     está en fucionamiento"""
+    from documento.redis_utils import estadisticas_redis
+    from documento.busquedaSemantica.cache_embeddings import estadisticas_cache
     return JsonResponse({
         "status": "healthy", 
-        "service": "SystemGC2"
+        "service": "SystemGC2",
+        "redis_pool": estadisticas_redis(),  # Uso del pool de este proceso (no abre conexiones)
+        "cache_embeddings": estadisticas_cache(),  # Aciertos/fallos de la caché de consultas en este proceso
     })
 
 urlpatterns = [